@@ -0,0 +1,59 @@
+"""
+Benchmark warming the compile cache: compiling cold versus loading a saved cache.
+
+Run with `python benchmarks/bench_cache.py [count]`.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+
+from chinois import css_cache as cc
+
+TEMPLATES = (
+    "div.item-{i} > p.text",
+    "#main-{i} .content ul li a[href^='https://{i}']",
+    "article:not(.draft-{i}) h2 + p:first-of-type",
+    "ul li:nth-child({i}n+1 of .visible)",
+    "a:is(.btn-{i}, .link):has(> img[alt])",
+)
+
+
+def main(count: int = 5000) -> None:
+    """Run the benchmark."""
+
+    patterns = [TEMPLATES[i % len(TEMPLATES)].format(i=i) for i in range(1, count + 1)]
+
+    cache = cc.SelectorCache(maxsize=None)
+    start = time.perf_counter()
+    cache.preload(patterns)
+    cold = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "selectors.cache")
+        cache.save(path)
+        size = os.path.getsize(path)
+
+        warm = cc.SelectorCache(maxsize=None)
+        start = time.perf_counter()
+        warm.load(path)
+        load = time.perf_counter() - start
+
+        # Loaded selectors are only unpickled when first used.
+        start = time.perf_counter()
+        for pattern in patterns:
+            warm.compile(pattern)
+        first_use = time.perf_counter() - start
+
+    print(f"{count} patterns ({size / 1024:.0f} KiB on disk)")
+    print(f"compile: {cold * 1000:.1f} ms")
+    print(f"   load: {load * 1000:.1f} ms ({cold / load:.1f}x faster)")
+    total = load + first_use
+    print(f"   load + first use: {total * 1000:.1f} ms ({cold / total:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,76 @@
+"""
+Benchmark running many queries against a tree versus a frozen snapshot of it.
+
+Run with `python benchmarks/bench_frozen.py [rows]`.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+import campbells
+
+import chinois as ch
+
+PATTERNS = (
+    "tr.row > td.price",
+    "table tr:nth-child(2n+1) td:first-child",
+    "td a[href^='https://']",
+    "div.content p:not(.hidden)",
+    "tr:has(> td.price)",
+    "#main .row:last-child",
+    "td:nth-of-type(3)",
+    "p.note ~ p",
+)
+
+
+def make_markup(rows: int) -> str:
+    """Make a document with a table of the given number of rows."""
+
+    body = [
+        (
+            f'<tr class="row" id="r{i}"><td class="name">Item {i}</td>'
+            f'<td class="price">{i}.00</td>'
+            f'<td><a href="https://example.com/{i}">link</a></td></tr>'
+        )
+        for i in range(rows)
+    ]
+    notes = [
+        f'<p class="{"note" if i % 5 == 0 else "hidden"}">note {i}</p>'
+        for i in range(rows // 10)
+    ]
+    return (
+        '<html><body><div id="main" class="content">'
+        f"<table>{''.join(body)}</table>{''.join(notes)}"
+        "</div></body></html>"
+    )
+
+
+def main(rows: int = 2000) -> None:
+    """Run the benchmark."""
+
+    soup = campbells.CampbellsSoup(make_markup(rows), "html.parser")
+    selectors = [ch.compile(pattern) for pattern in PATTERNS]
+
+    start = time.perf_counter()
+    expected = [sel.select(soup) for sel in selectors]
+    tree = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frozen = ch.FrozenDocument(soup)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [sel.select(frozen) for sel in selectors]
+    query = time.perf_counter() - start
+    assert results == expected
+
+    print(f"{len(frozen)} elements, {len(selectors)} queries")
+    print(f"      tree: {tree * 1000:.1f} ms")
+    print(f"    frozen: {query * 1000:.1f} ms ({tree / query:.1f}x faster)")
+    print(f"     build: {build * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,56 @@
+"""
+Benchmark selector parsing, bypassing the compile cache.
+
+Run with `python benchmarks/bench_parse.py [repeat]`.
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+
+from chinois import css_parser as cp
+
+PATTERNS = (
+    "div",
+    "div.item > p.text",
+    "#main .content ul li a[href^='https://']",
+    "article:not(.draft) h2 + p:first-of-type",
+    "ul li:nth-child(2n+1 of .visible)",
+    "input[type=checkbox]:checked ~ label",
+    "table > tbody > tr:nth-last-of-type(-n+3) td",
+    "a:is(.btn, .link):has(> img[alt])",
+    "p:-soup-contains('price', 'cost', 'total')",
+    ":root > body section[data-id='42' i]",
+    "html|div ~ span:lang(en, 'de-*'):dir(ltr)",
+    "div/* comment */ > .a,\n.b ~ .c",
+)
+
+
+def parse() -> None:
+    """Parse every pattern once."""
+
+    for pattern in PATTERNS:
+        cp.CSSParser(pattern).process_selectors()
+
+
+def tokenize() -> None:
+    """Tokenize every pattern once."""
+
+    for pattern in PATTERNS:
+        parser = cp.CSSParser(pattern)
+        for _ in parser.selector_iter(parser.pattern):
+            pass
+
+
+def main(repeat: int = 2000) -> None:
+    """Run the benchmark."""
+
+    for name, func in (("tokenize", tokenize), ("parse", parse)):
+        best = min(timeit.repeat(func, number=repeat // 10, repeat=10))
+        per_pattern = best / (repeat // 10) / len(PATTERNS)
+        print(f"{name:>8}: {per_pattern * 1e6:.1f} us per pattern")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,77 @@
+"""
+Benchmark selecting from an lxml tree with XPath versus matching in Python.
+
+Run with `python benchmarks/bench_xpath.py [rows]`.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+from lxml import html
+
+import chinois as ch
+from chinois import css_lxml as cl
+
+PATTERNS = (
+    "tr.row > td.price",
+    "table tr:nth-child(2n+1) td:first-child",
+    "td a[href^='https://']",
+    "div.content p:not(.hidden)",
+    "#main .row:last-child",
+    "td:nth-of-type(3)",
+    "p.note ~ p",
+    "[type=checkbox]",
+)
+
+
+def make_markup(rows: int) -> str:
+    """Make a document with a table of the given number of rows."""
+
+    body = [
+        (
+            f'<tr class="row" id="r{i}"><td class="name">Item {i}</td>'
+            f'<td class="price">{i}.00</td>'
+            f'<td><a href="https://example.com/{i}">link</a>'
+            f'<input type="{"checkbox" if i % 3 else "text"}"></td></tr>'
+        )
+        for i in range(rows)
+    ]
+    notes = [
+        f'<p class="{"note" if i % 5 == 0 else "hidden"}">note {i}</p>'
+        for i in range(rows // 10)
+    ]
+    return (
+        '<html><body><div id="main" class="content">'
+        f"<table>{''.join(body)}</table>{''.join(notes)}"
+        "</div></body></html>"
+    )
+
+
+def main(rows: int = 2000) -> None:
+    """Run the benchmark."""
+
+    tree = html.document_fromstring(make_markup(rows)).getroottree()
+    selectors = [ch.compile(pattern) for pattern in PATTERNS]
+
+    start = time.perf_counter()
+    expected = []
+    for sel in selectors:
+        session = cl.LxmlMatch(sel.selectors, tree, sel.namespaces, sel.flags)
+        session.queries = None
+        expected.append(list(session.select()))
+    python = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [sel.select(tree) for sel in selectors]
+    xpath = time.perf_counter() - start
+    assert results == expected
+
+    print(f"{sum(1 for _ in tree.iter())} elements, {len(selectors)} queries")
+    print(f"    python: {python * 1000:.1f} ms")
+    print(f"     xpath: {xpath * 1000:.1f} ms ({python / xpath:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -8,38 +8,50 @@ Chinois is adapted from Soup Sieve under the MIT license.
 
 from __future__ import annotations
 
-from typing import Any, Iterable, Iterator
-
-try:
-    import campbells  # type: ignore[import]
-except ImportError:
-    campbells = None
-try:
-    import bisque  # type: ignore[import]
-except ImportError:
-    bisque = None
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
 
+from . import css_backend as cb
+from . import css_cache as cc
+from . import css_cost as cx
+from . import css_frozen as cf
+from . import css_index as ci
 from . import css_match as cm
 from . import css_parser as cp
+from . import css_set as cs
 from . import css_types as ct
-from .util import DEBUG, SelectorSyntaxError  # noqa: F401
+from .util import DEBUG, SelectorCostError, SelectorSyntaxError  # noqa: F401
+
+if TYPE_CHECKING:  # pragma: no cover
+    import bisque
+    import campbells
 
 __version__ = "0.2.2"
 
 __all__ = [
     "DEBUG",
+    "DocumentIndex",
+    "FrozenDocument",
+    "SelectorCostError",
+    "SelectorSet",
     "SelectorSyntaxError",
     "SoupSieve",
+    "cache",
     "closest",
     "compile",
+    "compile_many",
     "filter",
     "iselect",
+    "lint",
     "match",
     "select",
     "select_one",
 ]
 
 SoupSieve = cm.SoupSieve
+cache = cc.cache
+DocumentIndex = ci.DocumentIndex
+FrozenDocument = cf.FrozenDocument
+SelectorSet = cs.SelectorSet
 
 
 def compile(  # noqa: A001
@@ -48,9 +60,15 @@ def compile(  # noqa: A001
     flags: int = 0,
     *,
     custom: dict[str, str] | None = None,
+    max_cost: int | None = None,
     **kwargs: Any,
 ) -> cm.SoupSieve:
-    """Compile CSS pattern."""
+    """
+    Compile CSS pattern.
+
+    With `max_cost`, selectors estimated to cost more (see `SoupSieve.cost`) are
+    rejected with a `SelectorCostError`.
+    """
 
     if isinstance(pattern, SoupSieve):
         if flags:
@@ -65,20 +83,59 @@ def compile(  # noqa: A001
             raise ValueError(
                 "Cannot process 'custom' argument on a compiled selector list",
             )
-        return pattern
+        compiled = pattern
+    else:
+        compiled = cache.compile(pattern, namespaces, flags, custom=custom)
+
+    if max_cost is not None:
+        cost = compiled.cost
+        if cost > max_cost:
+            raise SelectorCostError(compiled.pattern, cost, max_cost)
+    return compiled
+
+
+def compile_many(
+    patterns: Iterable[str],
+    namespaces: dict[str, str] | None = None,
+    flags: int = 0,
+    *,
+    custom: dict[str, str] | None = None,
+    workers: int | None = None,
+) -> list[cm.SoupSieve | SelectorSyntaxError]:
+    """
+    Compile many CSS patterns at once.
 
-    return cp._cached_css_compile(
-        pattern,
-        ct.Namespaces(namespaces) if namespaces is not None else namespaces,
-        ct.CustomSelectors(custom) if custom is not None else custom,
+    Returns the compiled selector, or the syntax error, of each pattern in order.
+    """
+
+    return cache.compile_many(
+        patterns,
+        namespaces,
         flags,
+        custom=custom,
+        workers=workers,
+    )
+
+
+def lint(
+    pattern: str | cm.SoupSieve,
+    namespaces: dict[str, str] | None = None,
+    flags: int = 0,
+    *,
+    custom: dict[str, str] | None = None,
+) -> list[cx.Lint]:
+    """Report costly constructs in a CSS pattern, with cheaper alternatives."""
+
+    return cx.lint_selectors(
+        compile(pattern, namespaces, flags, custom=custom).selectors,
     )
 
 
 def purge() -> None:
     """Purge cached patterns."""
 
-    cp._purge_cache()
+    cache.clear()
+    cp.resolve_custom.cache_clear()
 
 
 def closest(
@@ -130,11 +187,12 @@ def select_one(
     flags: int = 0,
     *,
     custom: dict[str, str] | None = None,
+    index: ci.DocumentIndex | None = None,
     **kwargs: Any,
 ) -> bisque.Tag | campbells.Tag:
     """Select a single tag."""
 
-    return compile(select, namespaces, flags, **kwargs).select_one(tag)
+    return compile(select, namespaces, flags, **kwargs).select_one(tag, index=index)
 
 
 def select(
@@ -145,11 +203,12 @@ def select(
     flags: int = 0,
     *,
     custom: dict[str, str] | None = None,
+    index: ci.DocumentIndex | None = None,
     **kwargs: Any,
 ) -> list[bisque.Tag] | list[campbells.Tag]:
     """Select the specified tags."""
 
-    return compile(select, namespaces, flags, **kwargs).select(tag, limit)
+    return compile(select, namespaces, flags, **kwargs).select(tag, limit, index=index)
 
 
 def iselect(
@@ -160,11 +219,16 @@ def iselect(
     flags: int = 0,
     *,
     custom: dict[str, str] | None = None,
+    index: ci.DocumentIndex | None = None,
     **kwargs: Any,
 ) -> Iterator[bisque.Tag] | Iterator[campbells.Tag]:
     """Iterate the specified tags."""
 
-    yield from compile(select, namespaces, flags, **kwargs).iselect(tag, limit)
+    yield from compile(select, namespaces, flags, **kwargs).iselect(
+        tag,
+        limit,
+        index=index,
+    )
 
 
 def escape(ident: str) -> str:
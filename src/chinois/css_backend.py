@@ -0,0 +1,135 @@
+"""Registry of the supported document backends."""
+
+from __future__ import annotations
+
+import importlib
+from functools import lru_cache
+from typing import Any
+
+__all__ = (
+    "CDATA",
+    "DECLARATION",
+    "DOC",
+    "NAVIGABLE_STRING",
+    "PROCESSING_INSTRUCTION",
+    "SPECIAL_STRING",
+    "TAG",
+    "get_adapter",
+    "get_category",
+)
+
+# Node categories (bit flags, as a node can fall under several)
+TAG = 0x01
+DOC = 0x02
+NAVIGABLE_STRING = 0x04
+SPECIAL_STRING = 0x08
+CDATA = 0x10
+DECLARATION = 0x20
+PROCESSING_INSTRUCTION = 0x40
+
+# Class names that make up each category, looked up on each installed backend
+CATEGORY_NAMES = (
+    (TAG, ("Tag",)),
+    (DOC, ("Bisque", "CampbellsSoup")),
+    (NAVIGABLE_STRING, ("NavigableString",)),
+    (
+        SPECIAL_STRING,
+        ("Comment", "Declaration", "CData", "ProcessingInstruction", "Doctype"),
+    ),
+    (CDATA, ("CData",)),
+    (DECLARATION, ("Declaration",)),
+    (PROCESSING_INSTRUCTION, ("ProcessingInstruction",)),
+)
+
+
+# Top level modules of the supported backends
+BACKEND_NAMES = ("campbells", "bisque")
+
+# Categories of each concrete node type seen so far
+CATEGORIES = {}  # type: dict[type, int]
+
+# Matching sessions for other trees, by the module of their element type. Each is a
+# `CSSMatch` subclass that overrides the navigation primitives of `_DocumentNav`.
+ADAPTERS = {
+    "lxml.etree": (".css_lxml", "LxmlMatch"),
+    "xml.etree.ElementTree": (".css_etree", "ElementTreeMatch"),
+}
+
+# Adapter of each concrete node type seen so far (`None` for the backends' own)
+ADAPTER_CLASSES = {}  # type: dict[type, type | None]
+
+
+@lru_cache(maxsize=None)
+def get_category_classes(backend: str) -> tuple[tuple[int, tuple[type, ...]], ...]:
+    """
+    Get one class tuple per category for a backend.
+
+    Backends are only looked up once a node of theirs is seen, so a process using one
+    backend never pays for importing the other. The backends import this package
+    themselves, which is another reason not to import them up front.
+    """
+
+    module = importlib.import_module(backend)
+    return tuple(
+        (
+            category,
+            tuple(getattr(module, name) for name in names if hasattr(module, name)),
+        )
+        for category, names in CATEGORY_NAMES
+    )
+
+
+def get_backends(kind: type) -> list[str]:
+    """Get the backends a node type derives from."""
+
+    backends = []
+    for base in kind.__mro__:
+        backend = base.__module__.partition(".")[0]
+        if backend in BACKEND_NAMES and backend not in backends:
+            backends.append(backend)
+    return backends
+
+
+def categorize(kind: type) -> int:
+    """Work out (and remember) the categories of a node type."""
+
+    category = 0
+    for backend in get_backends(kind):
+        for flag, classes in get_category_classes(backend):
+            if classes and issubclass(kind, classes):
+                category |= flag
+    CATEGORIES[kind] = category
+    return category
+
+
+def get_category(obj: Any) -> int:
+    """Get the category flags of a node."""
+
+    kind = type(obj)
+    category = CATEGORIES.get(kind)
+    if category is None:
+        category = categorize(kind)
+    return category
+
+
+def get_adapter(kind: type) -> type | None:
+    """
+    Get the matching session class for nodes of a type, if it needs an adapter.
+
+    As with the backends, an adapter is only imported once a node of its tree is seen.
+    """
+
+    try:
+        return ADAPTER_CLASSES[kind]
+    except KeyError:
+        pass
+
+    adapter = None
+    for base in kind.__mro__:
+        entry = ADAPTERS.get(base.__module__)
+        if entry is not None:
+            module, name = entry
+            adapter = getattr(importlib.import_module(module, __package__), name)
+            break
+    ADAPTER_CLASSES[kind] = adapter
+    return adapter
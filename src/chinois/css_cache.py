@@ -0,0 +1,628 @@
+"""Cache of compiled selectors."""
+
+from __future__ import annotations
+
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, NamedTuple
+
+from . import css_match as cm
+from . import css_parser as cp
+from . import css_types as ct
+from .util import SelectorSyntaxError
+
+__all__ = ("CacheInfo", "SelectorCache")
+
+# Maximum cached patterns to store by default
+MAXCACHE = 500
+
+# Format of saved cache files (bumped if the layout of the file changes)
+CACHE_FORMAT = 1
+
+# Types that don't reference other objects worth counting
+ATOMIC = (str, bytes, int, float, bool, type(None), type(cp.RE_WS))
+
+
+class CacheInfo(NamedTuple):
+    """Cache statistics."""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int | None
+    currsize: int
+    maxmemory: int | None
+    memory: int | None
+    pinned: int
+    compile_time: float
+
+
+def estimate_size(obj: Any) -> int:
+    """
+    Estimate the memory held by an object and everything it references.
+
+    Objects shared by several compiled selectors (such as the builtin selector lists
+    for pseudo-classes) are counted for each of them, so this is an upper bound.
+    """
+
+    size = 0
+    seen = set()  # type: set[int]
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        if isinstance(o, ATOMIC):
+            continue
+        elif isinstance(o, ct.ImmutableDict):
+            stack.append(o._d)
+        elif isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (tuple, list, set, frozenset)):
+            stack.extend(o)
+        elif isinstance(o, ct.Immutable):
+            stack.extend([getattr(o, key) for key in o.__slots__ if key != "_hash"])
+    return size
+
+
+def make_key(
+    pattern: str,
+    namespaces: dict[str, str] | None,
+    custom: dict[str, str] | None,
+    flags: int,
+) -> tuple[str, ct.Namespaces | None, ct.CustomSelectors | None, int]:
+    """Make a hashable cache key from the compile arguments."""
+
+    return (
+        pattern,
+        ct.Namespaces(namespaces) if namespaces is not None else namespaces,
+        ct.CustomSelectors(custom) if custom is not None else custom,
+        flags,
+    )
+
+
+def canonical_key(
+    key: tuple[Any, ...],
+    tokens: list[Any] | None = None,
+) -> Hashable | None:
+    """
+    Get the key that patterns equivalent to a cache key's pattern share.
+
+    The pattern is tokenized unless its `tokens` are given. `None` is returned if it
+    fails to tokenize.
+    """
+
+    pattern, namespaces, custom, flags = key
+    if tokens is None:
+        try:
+            tokens = cp.tokenize(pattern, flags)
+        except SelectorSyntaxError:
+            return None
+    return (cp.canonical_pattern(tokens), namespaces, custom, flags)
+
+
+def _compile_chunk(
+    patterns: list[str],
+    namespaces: ct.Namespaces | None,
+    custom: ct.CustomSelectors | None,
+    flags: int,
+) -> list[cm.SoupSieve | SelectorSyntaxError]:
+    """Compile patterns in a worker process, collecting errors."""
+
+    results = []  # type: list[cm.SoupSieve | SelectorSyntaxError]
+    for pattern in patterns:
+        try:
+            results.append(cp._css_compile(pattern, namespaces, custom, flags))
+        except SelectorSyntaxError as e:
+            results.append(e)
+    return results
+
+
+class SelectorCache:
+    """
+    Least recently used cache of compiled selectors.
+
+    The cache can be bounded by entry count (`maxsize`), by an estimate of the memory
+    its selectors hold (`maxmemory`), by both, or not at all (`None`). Limits can be
+    changed at any time. Pinned selectors are never evicted, though they do count
+    toward the limits.
+
+    Patterns that only differ in whitespace and comments (`div > p` and
+    `div /* x */>p`, for instance) share one compiled selector, which keeps the
+    `pattern` it was first compiled from.
+
+    Lookups are thread safe, and when several threads ask for the same uncached
+    pattern at once, it is compiled by one of them while the others wait for it.
+    """
+
+    def __init__(
+        self,
+        compiler: Callable[..., cm.SoupSieve] = cp._css_compile,
+        maxsize: int | None = MAXCACHE,
+        maxmemory: int | None = None,
+    ) -> None:
+        """Initialize."""
+
+        self._compiler = compiler
+        self._maxsize = maxsize
+        self._maxmemory = maxmemory
+        self._lock = threading.Lock()
+        # Unpinned entries, in least recently used order. Selectors loaded from a file
+        # are held pickled (as `bytes`) until they are first used.
+        self._entries = (
+            OrderedDict()
+        )  # type: OrderedDict[Hashable, cm.SoupSieve | bytes]
+        self._pinned = {}  # type: dict[Hashable, cm.SoupSieve | bytes]
+        self._sizes = {}  # type: dict[Hashable, int]
+        # Canonical keys (see `css_parser.canonical_pattern`) of the cached patterns,
+        # so that equivalent patterns can share one compiled selector
+        self._canonical = {}  # type: dict[Hashable, Hashable]
+        self._aliases = {}  # type: dict[Hashable, Hashable]
+        self._pending = {}  # type: dict[Hashable, threading.Event]
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        """Reset the statistics."""
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.compile_time = 0.0
+
+    def __len__(self) -> int:
+        """Length."""
+
+        return len(self._entries) + len(self._pinned)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Check if a key is cached."""
+
+        return key in self._entries or key in self._pinned
+
+    @property
+    def maxsize(self) -> int | None:
+        """Maximum number of entries, or `None` for no limit."""
+
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value: int | None) -> None:
+        """Set the maximum number of entries."""
+
+        if value is not None and value < 0:
+            raise ValueError("'maxsize' cannot be negative")
+        with self._lock:
+            self._maxsize = value
+            self._evict()
+
+    @property
+    def maxmemory(self) -> int | None:
+        """Maximum estimated memory in bytes, or `None` for no limit."""
+
+        return self._maxmemory
+
+    @maxmemory.setter
+    def maxmemory(self, value: int | None) -> None:
+        """Set the maximum estimated memory."""
+
+        if value is not None and value < 0:
+            raise ValueError("'maxmemory' cannot be negative")
+        with self._lock:
+            self._maxmemory = value
+            if value is not None:
+                # Sizes are only estimated while there is a memory limit.
+                for entries in (self._entries, self._pinned):
+                    for key, selector in entries.items():
+                        if key not in self._sizes:
+                            self._sizes[key] = estimate_size(selector)
+            self._evict()
+
+    def _lookup(self, key: Hashable) -> cm.SoupSieve | None:
+        """Look up a cached selector (without touching the statistics)."""
+
+        entries = self._pinned if key in self._pinned else self._entries
+        value = entries.get(key)
+        if type(value) is bytes:
+            # Entries loaded from a file are unpickled on first use.
+            value = entries[key] = pickle.loads(value)  # noqa: S301
+            if key in self._sizes:
+                self._sizes[key] = estimate_size(value)
+        return value
+
+    def _forget(self, key: Hashable) -> None:
+        """Forget the canonical key of an entry that is no longer cached."""
+
+        canonical = self._aliases.pop(key, None)
+        if canonical is not None and self._canonical.get(canonical) == key:
+            del self._canonical[canonical]
+
+    def _store(
+        self,
+        key: Hashable,
+        value: cm.SoupSieve,
+        canonical: Hashable | None = None,
+    ) -> None:
+        """Store a newly compiled selector."""
+
+        size = estimate_size(value) if self._maxmemory is not None else None
+        with self._lock:
+            if self._maxsize != 0:
+                self._entries.pop(key, None)
+                self._entries[key] = value
+                if size is not None:
+                    self._sizes[key] = size
+                if canonical is not None:
+                    self._canonical[canonical] = key
+                    self._aliases[key] = canonical
+                self._evict()
+
+    def _evict(self) -> None:
+        """Evict the least recently used entries until the cache is within its limits."""
+
+        maxsize = self._maxsize
+        maxmemory = self._maxmemory
+        memory = sum(self._sizes.values()) if maxmemory is not None else 0
+        while self._entries and (
+            (maxsize is not None and len(self) > maxsize)
+            or (maxmemory is not None and memory > maxmemory)
+        ):
+            key, _ = self._entries.popitem(last=False)
+            memory -= self._sizes.pop(key, 0)
+            self._forget(key)
+            self.evictions += 1
+
+    def get(
+        self,
+        pattern: str,
+        namespaces: ct.Namespaces | None = None,
+        custom: ct.CustomSelectors | None = None,
+        flags: int = 0,
+    ) -> cm.SoupSieve:
+        """Get the compiled selector for a pattern, compiling it if needed."""
+
+        key = (pattern, namespaces, custom, flags)
+        while True:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not None:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+
+            # Another thread is compiling the pattern. Once it is done, the pattern is
+            # either cached or it failed to compile, and we'll compile it ourselves
+            # to get the error.
+            pending.wait()
+
+        try:
+            # Look for an equivalent pattern under the canonical key. Patterns that
+            # fail to tokenize are left for the compiler to report.
+            try:
+                tokens = cp.tokenize(pattern, flags)  # type: list[Any] | None
+            except SelectorSyntaxError:
+                tokens = None
+            canonical = None
+            value = None
+            if tokens is not None:
+                canonical = canonical_key(key, tokens)
+                with self._lock:
+                    alias = self._canonical.get(canonical)
+                    value = self._lookup(alias) if alias is not None else None
+                    if value is not None:
+                        self.hits += 1
+                    else:
+                        self.misses += 1
+            else:
+                with self._lock:
+                    self.misses += 1
+
+            if value is None:
+                start = time.perf_counter()
+                if tokens is not None and self._compiler is cp._css_compile:
+                    value = cp._css_compile(pattern, namespaces, custom, flags, tokens)
+                else:
+                    value = self._compiler(pattern, namespaces, custom, flags)
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.compile_time += elapsed
+
+            self._store(key, value, canonical)
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+        return value
+
+    def compile(  # noqa: A003
+        self,
+        pattern: str,
+        namespaces: dict[str, str] | None = None,
+        flags: int = 0,
+        *,
+        custom: dict[str, str] | None = None,
+    ) -> cm.SoupSieve:
+        """Compile CSS pattern through the cache."""
+
+        return self.get(*make_key(pattern, namespaces, custom, flags))
+
+    def compile_many(
+        self,
+        patterns: Iterable[str],
+        namespaces: dict[str, str] | None = None,
+        flags: int = 0,
+        *,
+        custom: dict[str, str] | None = None,
+        workers: int | None = None,
+    ) -> list[cm.SoupSieve | SelectorSyntaxError]:
+        """
+        Compile many patterns through the cache.
+
+        Duplicate patterns are compiled once, and custom selectors are only processed
+        once for all of them. With `workers`, uncached patterns are compiled across
+        that many processes. Returns one result per pattern, in order: the compiled
+        selector, or the `SelectorSyntaxError` the pattern raised.
+        """
+
+        patterns = list(patterns)
+        keys = {
+            pattern: make_key(pattern, namespaces, custom, flags)
+            for pattern in patterns
+        }
+        results = {}  # type: dict[str, cm.SoupSieve | SelectorSyntaxError]
+
+        if workers is not None and workers > 1 and self._compiler is cp._css_compile:
+            missing = [pattern for pattern, key in keys.items() if key not in self]
+            if len(missing) > 1:
+                results.update(self._compile_in_processes(missing, keys, workers))
+
+        for pattern, key in keys.items():
+            if pattern not in results:
+                try:
+                    results[pattern] = self.get(*key)
+                except SelectorSyntaxError as e:
+                    results[pattern] = e
+        return [results[pattern] for pattern in patterns]
+
+    def _compile_in_processes(
+        self,
+        patterns: list[str],
+        keys: dict[str, tuple[Any, ...]],
+        workers: int,
+    ) -> dict[str, cm.SoupSieve | SelectorSyntaxError]:
+        """Compile patterns across processes and cache them."""
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        namespaces, custom, flags = keys[patterns[0]][1:]
+        chunks = [patterns[i::workers] for i in range(workers)]
+        results = {}  # type: dict[str, cm.SoupSieve | SelectorSyntaxError]
+        start = time.perf_counter()
+        with ProcessPoolExecutor(min(workers, len(chunks))) as pool:
+            compiled = pool.map(
+                _compile_chunk,
+                chunks,
+                [namespaces] * len(chunks),
+                [custom] * len(chunks),
+                [flags] * len(chunks),
+            )
+            for chunk, values in zip(chunks, compiled):
+                results.update(zip(chunk, values))
+        with self._lock:
+            self.misses += len(patterns)
+            self.compile_time += time.perf_counter() - start
+        for pattern, value in results.items():
+            if not isinstance(value, SelectorSyntaxError):
+                key = keys[pattern]
+                self._store(key, value, canonical_key(key))
+        return results
+
+    def pin(
+        self,
+        pattern: str,
+        namespaces: dict[str, str] | None = None,
+        flags: int = 0,
+        *,
+        custom: dict[str, str] | None = None,
+    ) -> cm.SoupSieve:
+        """Compile a pattern (if needed) and keep it cached until it is unpinned."""
+
+        key = make_key(pattern, namespaces, custom, flags)
+        value = self.get(*key)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._pinned[key] = value
+            if self._maxmemory is not None and key not in self._sizes:
+                self._sizes[key] = estimate_size(value)
+            self._evict()
+        return value
+
+    def unpin(
+        self,
+        pattern: str,
+        namespaces: dict[str, str] | None = None,
+        flags: int = 0,
+        *,
+        custom: dict[str, str] | None = None,
+    ) -> None:
+        """Allow a pinned pattern to be evicted again."""
+
+        key = make_key(pattern, namespaces, custom, flags)
+        with self._lock:
+            value = self._pinned.pop(key, None)
+            if value is not None:
+                self._entries[key] = value
+                self._evict()
+
+    def preload(
+        self,
+        patterns: Iterable[str],
+        namespaces: dict[str, str] | None = None,
+        flags: int = 0,
+        *,
+        custom: dict[str, str] | None = None,
+        pin: bool = False,
+    ) -> int:
+        """
+        Compile patterns ahead of time, optionally pinning them.
+
+        Returns the number of patterns compiled (those not already cached).
+        """
+
+        misses = self.misses
+        for pattern in patterns:
+            if pin:
+                self.pin(pattern, namespaces, flags, custom=custom)
+            else:
+                self.compile(pattern, namespaces, flags, custom=custom)
+        return self.misses - misses
+
+    def load_manifest(
+        self,
+        path: str | os.PathLike[str],
+        namespaces: dict[str, str] | None = None,
+        flags: int = 0,
+        *,
+        custom: dict[str, str] | None = None,
+        pin: bool = False,
+    ) -> int:
+        """
+        Preload the patterns listed in a manifest file, one pattern per line.
+
+        Blank lines are ignored. Returns the number of patterns compiled.
+        """
+
+        with open(path, encoding="utf-8") as f:
+            patterns = [line.strip() for line in f]
+        return self.preload(
+            [p for p in patterns if p],
+            namespaces,
+            flags,
+            custom=custom,
+            pin=pin,
+        )
+
+    def save(self, path: str | os.PathLike[str]) -> int:
+        """
+        Save the cached selectors to a file.
+
+        Entries are saved in least recently used order, along with whether they are
+        pinned, and tagged with the `chinois` version. Each selector is pickled on its
+        own so that loading only needs to unpickle the keys. The file is written to a
+        temporary file first and then moved into place, so concurrent readers never see
+        a partial file. Returns the number of entries saved.
+        """
+
+        from . import __version__
+
+        with self._lock:
+            entries = [(key, value, False) for key, value in self._entries.items()]
+            entries.extend([(key, value, True) for key, value in self._pinned.items()])
+        entries = [
+            (
+                key,
+                (
+                    value
+                    if type(value) is bytes
+                    else pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                ),
+                pinned,
+            )
+            for key, value, pinned in entries
+        ]
+
+        data = {"format": CACHE_FORMAT, "version": __version__, "entries": entries}
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        return len(entries)
+
+    def load(self, path: str | os.PathLike[str]) -> int:
+        """
+        Load cached selectors saved by `save`.
+
+        Entries saved by a different version of `chinois` are rejected, as the
+        structure of compiled selectors may have changed. Loaded entries are added as
+        the most recently used ones and are subject to the cache limits. Selectors are
+        only unpickled when they are first used, so loading is cheap even for selectors
+        that are never asked for. Returns the number of entries loaded.
+
+        Only load files you trust: they are unpickled.
+        """
+
+        from . import __version__
+
+        with open(path, "rb") as f:
+            data = pickle.load(f)  # noqa: S301
+        if (
+            not isinstance(data, dict)
+            or data.get("format") != CACHE_FORMAT
+            or data.get("version") != __version__
+        ):
+            return 0
+
+        track_memory = self._maxmemory is not None
+        # Patterns are tokenized (not compiled) so equivalent patterns find the entries.
+        canonicals = [canonical_key(key) for key, _, _ in data["entries"]]
+        with self._lock:
+            for (key, value, pinned), canonical in zip(data["entries"], canonicals):
+                self._entries.pop(key, None)
+                self._pinned.pop(key, None)
+                (self._pinned if pinned else self._entries)[key] = value
+                if track_memory:
+                    self._sizes[key] = estimate_size(value)
+                if canonical is not None:
+                    self._canonical[canonical] = key
+                    self._aliases[key] = canonical
+            self._evict()
+        return len(data["entries"])
+
+    def clear(self) -> None:
+        """Remove all entries (pinned ones included) and reset the statistics."""
+
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+            self._sizes.clear()
+            self._canonical.clear()
+            self._aliases.clear()
+            self._reset_stats()
+
+    def cache_info(self) -> CacheInfo:
+        """Get the cache statistics."""
+
+        with self._lock:
+            return CacheInfo(
+                self.hits,
+                self.misses,
+                self.evictions,
+                self._maxsize,
+                len(self),
+                self._maxmemory,
+                sum(self._sizes.values()) if self._maxmemory is not None else None,
+                len(self._pinned),
+                self.compile_time,
+            )
+
+
+# The cache used by `chinois.compile` and friends
+cache = SelectorCache()
@@ -0,0 +1,206 @@
+"""Static cost estimates and lint checks for compiled selectors."""
+
+from __future__ import annotations
+
+import math
+from typing import Iterator, NamedTuple
+
+from . import css_types as ct
+
+__all__ = ("Lint", "cost_class", "lint_selectors", "selector_cost")
+
+# How many elements a relation visits for each element it is tested from. These are
+# rough guesses for a typical document; only their relative sizes matter.
+RELATION_FACTORS = {
+    " ": 10,  # ancestors
+    ">": 1,  # parent
+    "~": 10,  # preceding siblings
+    "+": 1,  # previous sibling
+    ": ": 100,  # descendants (`:has()`)
+    ":>": 10,  # children (`:has(> ...)`)
+    ":~": 10,  # following siblings (`:has(~ ...)`)
+    ":+": 1,  # next sibling (`:has(+ ...)`)
+}
+# Siblings tested against the `S` of `:nth-child(An+B of S)`
+NTH_OF_FACTOR = 10
+# Text scanned by `:-soup-contains()`
+CONTAINS_FACTOR = 10
+# Share of elements matching a compound that has a tag, id, class, or attribute, and
+# so get as far as its relations
+SELECTIVITY = 0.1
+
+# Upper bounds of the cost classes
+COST_CLASSES = ((10, "low"), (100, "medium"), (1000, "high"))
+
+
+class Lint(NamedTuple):
+    """A potential problem found in a selector."""
+
+    code: str
+    message: str
+
+
+def is_universal(sel: ct.Selector) -> bool:
+    """Check if a compound selector could match any element."""
+
+    return (
+        (sel.tag is None or sel.tag.name == "*")
+        and not sel.ids
+        and not sel.classes
+        and not sel.attributes
+    )
+
+
+def compound_cost(sel: ct.Selector | ct.SelectorNull) -> float:
+    """Estimate the cost of testing one element against a selector."""
+
+    if isinstance(sel, ct.SelectorNull):
+        return 0
+    cost = 1.0
+    cost += CONTAINS_FACTOR * len(sel.contains)
+    for nth in sel.nth:
+        if nth.selectors:
+            # Positions are worked out once per parent, so a simple `S` adds little.
+            cost += NTH_OF_FACTOR * (list_cost(nth.selectors) - 1)
+    for selectors in sel.selectors:
+        cost += list_cost(selectors)
+    if sel.relation and not isinstance(sel.relation[0], ct.SelectorNull):
+        related = sel.relation[0]
+        if related.rel_type is not None:
+            # The scope of `:has()` is universal, so it always goes on to its relation.
+            rate = 1 if is_universal(sel) else SELECTIVITY
+            cost += rate * RELATION_FACTORS[related.rel_type] * compound_cost(related)
+    return cost
+
+
+def list_cost(selectors: ct.SelectorList) -> float:
+    """Estimate the cost of testing one element against a selector list."""
+
+    return sum([compound_cost(sel) for sel in selectors])
+
+
+def selector_cost(selectors: ct.SelectorList) -> int:
+    """
+    Estimate the cost of matching an element against compiled selectors.
+
+    The cost is unitless: a plain compound selector such as `div.item` costs 1, and
+    each relation multiplies the cost of the selector it leads to by how many elements
+    it is likely to visit. It is meant to compare selectors and to catch pathological
+    ones, not to predict running times.
+    """
+
+    return math.ceil(list_cost(selectors))
+
+
+def cost_class(cost: int) -> str:
+    """Get the class of a cost: `low`, `medium`, `high`, or `extreme`."""
+
+    for limit, name in COST_CLASSES:
+        if cost < limit:
+            return name
+    return "extreme"
+
+
+def _walk(
+    selectors: ct.SelectorList,
+    has_depth: int = 0,
+) -> Iterator[tuple[ct.Selector, int]]:
+    """Walk every compound selector, along with how many `:has()` it is nested in."""
+
+    for sel in selectors:
+        if isinstance(sel, ct.SelectorNull):
+            continue
+        yield sel, has_depth
+        for nth in sel.nth:
+            yield from _walk(nth.selectors, has_depth)
+        for sub in sel.selectors:
+            yield from _walk(sub, has_depth + is_has(sub))
+        yield from _walk(sel.relation, has_depth)
+
+
+def is_has(selectors: ct.SelectorList) -> bool:
+    """Check if a selector list is the argument of `:has()`."""
+
+    return any(
+        [
+            isinstance(sel, ct.Selector)
+            and sel.relation
+            and isinstance(sel.relation[0], ct.Selector)
+            and (sel.relation[0].rel_type or "").startswith(":")
+            for sel in selectors
+        ],
+    )
+
+
+def lint_selectors(selectors: ct.SelectorList) -> list[Lint]:
+    """Find selector constructs known to be costly, suggesting cheaper rewrites."""
+
+    found = []  # type: list[Lint]
+
+    def add(code: str, message: str) -> None:
+        if all([lint.code != code for lint in found]):
+            found.append(Lint(code, message))
+
+    for sel, has_depth in _walk(selectors):
+        related = sel.relation[0] if sel.relation else None
+        rel_type = related.rel_type if isinstance(related, ct.Selector) else None
+
+        if has_depth > 1 and rel_type is not None and rel_type.startswith(":"):
+            add(
+                "nested-has",
+                "`:has()` nested in `:has()` searches a subtree for every element of "
+                "a subtree. `:has(a:has(b))` can be written `:has(a b)`.",
+            )
+        if (
+            rel_type == ": "
+            and isinstance(related, ct.Selector)
+            and is_universal(related)
+            and not related.relation
+            and not related.selectors
+            and not related.nth
+            and not related.contains
+        ):
+            add(
+                "has-any-descendant",
+                "`:has(*)` searches all descendants, but an element has a descendant "
+                "element exactly when it has a child: use `:has(> *)`.",
+            )
+        for sub in sel.selectors:
+            if sub.is_not and any(
+                [
+                    isinstance(s, ct.Selector) and any([is_has(x) for x in s.selectors])
+                    for s in sub
+                ],
+            ):
+                add(
+                    "not-has",
+                    "`:not(:has(...))` has to search the whole relation before it can "
+                    "match; use `:has(> ...)` or `:has(+ ...)` if the condition only "
+                    "concerns children or the next sibling.",
+                )
+        for nth in sel.nth:
+            if nth.selectors and list_cost(nth.selectors) > 1:
+                add(
+                    "nth-of-complex",
+                    "`:nth-child(An+B of S)` tests every sibling against `S`. Keep "
+                    "`S` to a simple compound, such as a class.",
+                )
+        if sel.contains and is_universal(sel):
+            add(
+                "contains-unqualified",
+                "`:-soup-contains()` on any element scans the text of the whole "
+                "document for each ancestor; add a tag or class to narrow it down.",
+            )
+        if (
+            rel_type in (" ", "~")
+            and is_universal(sel)
+            and isinstance(related, ct.Selector)
+            and is_universal(related)
+        ):
+            add(
+                "universal-chain",
+                "A universal selector on both sides of a descendant or sibling "
+                "combinator (such as `* *`) tests every element; qualify either side "
+                "with a tag or class.",
+            )
+    return found
@@ -0,0 +1,360 @@
+"""Match selectors natively on `xml.etree.ElementTree` trees."""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from typing import Any, Iterator
+
+from . import css_match as cm
+from . import css_types as ct
+
+__all__ = ("ElementTreeDescendants", "ElementTreeMatch", "TextNode")
+
+
+class TextNode(str):
+    """
+    A run of text in an element tree.
+
+    Element trees keep text on the elements around it: the text before an element's
+    first child is its `text`, and the text after an element is its `tail`. Each run is
+    handed out as a string that remembers where it came from, so that it can be walked
+    like the text nodes of the backends.
+    """
+
+    element: Any
+    is_tail: bool
+
+    def __new__(cls, value: str, element: Any, is_tail: bool) -> TextNode:
+        """Create the text node."""
+
+        node = super().__new__(cls, value)
+        node.element = element
+        node.is_tail = is_tail
+        return node
+
+
+class ElementTreeDescendants:
+    """
+    Walk the nodes under an element of an element tree in document order.
+
+    A stack holds the iterators of the elements being walked, and the children of a tag
+    are only entered when the walk moves on from it, so `skip` can pass over the subtree
+    of the tag yielded last by never entering it.
+    """
+
+    __slots__ = ("match", "walk", "tags", "stack", "pending")
+
+    def __init__(self, match: ElementTreeMatch, el: Any, tags: bool) -> None:
+        """Initialize."""
+
+        self.match = match
+        self.walk = match.iter_nodes if tags else match.get_contents
+        self.tags = tags
+        self.stack = [self.walk(el)]  # type: list[Iterator[Any]]
+        self.pending = None  # type: Any
+
+    def __iter__(self) -> ElementTreeDescendants:
+        """Iterate."""
+
+        return self
+
+    def __next__(self) -> Any:
+        """Get the next node, or the next tag if only tags are walked."""
+
+        if self.pending is not None:
+            self.stack.append(self.walk(self.pending))
+            self.pending = None
+        stack = self.stack
+        while stack:
+            for node in stack[-1]:
+                if self.match.is_tag(node):
+                    self.pending = node
+                    return node
+                if not self.tags:
+                    return node
+            stack.pop()
+        raise StopIteration
+
+    def skip(self) -> None:
+        """Skip the subtree of the node yielded last."""
+
+        self.pending = None
+
+
+class ElementTreeMatch(cm.CSSMatch):
+    """
+    Perform CSS matching on an `xml.etree.ElementTree` tree.
+
+    Element trees are always matched as XML. An `ElementTree` can be given in place of
+    an element to match its whole document. Elements don't know their parent, so
+    parents and siblings are looked up in a map of the tree built on first use, and
+    nothing above the element (or `ElementTree`) given is seen.
+    """
+
+    element_type = ET.Element  # type: type
+    tree_type = ET.ElementTree  # type: type
+    pi_tag = ET.ProcessingInstruction  # type: Any
+
+    def __init__(
+        self,
+        selectors: ct.SelectorList,
+        scope: Any,
+        namespaces: ct.Namespaces | None,
+        flags: int,
+    ) -> None:
+        """Initialize."""
+
+        self.document = self.get_document(scope)
+        self.parent_map = None  # type: dict[Any, tuple[Any, int]] | None
+        self.top = scope
+        super().__init__(selectors, scope, namespaces, flags)
+
+    def get_document(self, scope: Any) -> Any:
+        """Get the tree above the scope's root element, if it is known."""
+
+        return scope if self.is_doc(scope) else None
+
+    @classmethod
+    def assert_valid_input(cls, tag: Any) -> None:
+        """Check if valid input element or tree."""
+
+        if not cls.is_tag(tag) and not cls.is_doc(tag):
+            raise TypeError(
+                "Expected an element or element tree, but instead received type {}".format(
+                    type(tag),
+                ),
+            )
+
+    @classmethod
+    def is_doc(cls, obj: Any) -> bool:
+        """Is element tree."""
+
+        return isinstance(obj, cls.tree_type)
+
+    @classmethod
+    def is_tag(cls, obj: Any) -> bool:
+        """Is tag."""
+
+        return isinstance(obj, cls.element_type) and isinstance(obj.tag, str)
+
+    @staticmethod
+    def is_declaration(obj: Any) -> bool:  # pragma: no cover
+        """Is declaration."""
+
+        return False
+
+    @staticmethod
+    def is_cdata(obj: Any) -> bool:
+        """Is CDATA (element trees merge it into the text around it)."""
+
+        return False
+
+    @classmethod
+    def is_processing_instruction(cls, obj: Any) -> bool:  # pragma: no cover
+        """Is processing instruction."""
+
+        return isinstance(obj, cls.element_type) and obj.tag is cls.pi_tag
+
+    @classmethod
+    def is_navigable_string(cls, obj: Any) -> bool:
+        """Is navigable string."""
+
+        return isinstance(obj, str) or cls.is_special_string(obj)
+
+    @classmethod
+    def is_special_string(cls, obj: Any) -> bool:
+        """Is a comment, processing instruction, or other node that isn't an element."""
+
+        return isinstance(obj, cls.element_type) and not isinstance(obj.tag, str)
+
+    @staticmethod
+    def is_content_string(obj: Any) -> bool:
+        """Check if node is content string."""
+
+        return isinstance(obj, str)
+
+    @classmethod
+    def is_xml_tree(cls, el: Any) -> bool:
+        """Check if element (or document) is from a XML tree."""
+
+        return True
+
+    @staticmethod
+    def get_tag_name(el: Any) -> str | None:
+        """Get tag."""
+
+        try:
+            tag = el.tag
+        except AttributeError:
+            # Element trees have no tag
+            return None
+        return tag.rpartition("}")[2] if tag[:1] == "{" else tag
+
+    @staticmethod
+    def get_prefix_name(el: Any) -> str | None:
+        """Get prefix (element trees don't keep them)."""
+
+        return None
+
+    @staticmethod
+    def get_uri(el: Any) -> str | None:
+        """Get namespace `URI`."""
+
+        tag = getattr(el, "tag", None)
+        return tag[1 : tag.index("}")] if tag and tag[:1] == "{" else None
+
+    @classmethod
+    def get_attrs(cls, el: Any) -> dict[str, Any]:
+        """Get the attributes of an element, as stored by the tree."""
+
+        return {} if cls.is_doc(el) else el.attrib
+
+    @staticmethod
+    def split_namespace(el: Any, attr_name: str) -> tuple[str | None, str | None]:
+        """Return namespace and attribute name without the prefix."""
+
+        if attr_name[:1] == "{":
+            namespace, _, name = attr_name[1:].partition("}")
+            return namespace, name
+        return None, None
+
+    def get_parent_map(self) -> dict[Any, tuple[Any, int]]:
+        """Get the parent of each element, along with its index in the parent."""
+
+        if self.parent_map is None:
+            parent_map = {}  # type: dict[Any, tuple[Any, int]]
+            top = self.top
+            if self.document is not None:
+                top = self.document.getroot()
+                parent_map[top] = (self.document, 0)
+            for parent in top.iter():
+                for index, child in enumerate(parent):
+                    parent_map[child] = (parent, index)
+            self.parent_map = parent_map
+        return self.parent_map
+
+    def get_node_parent(self, el: Any) -> Any:
+        """Get the parent of an element or comment, with the tree above the root."""
+
+        return self.get_parent_map().get(el, (None, 0))[0]
+
+    def get_next_node(self, el: Any) -> Any:
+        """Get the next element or comment."""
+
+        parent, index = self.get_parent_map().get(el, (None, 0))
+        if parent is None or self.is_doc(parent) or index + 1 >= len(parent):
+            return None
+        return parent[index + 1]
+
+    def get_previous_node(self, el: Any) -> Any:
+        """Get the previous element or comment."""
+
+        parent, index = self.get_parent_map().get(el, (None, 0))
+        if parent is None or self.is_doc(parent) or not index:
+            return None
+        return parent[index - 1]
+
+    def iter_nodes(self, el: Any) -> Iterator[Any]:
+        """Iterate the elements and comments directly under an element or tree."""
+
+        if self.is_doc(el):
+            return iter([el.getroot()])
+        return iter(el)
+
+    def get_contents(self, el: Any, no_iframe: bool = False) -> Iterator[Any]:
+        """Get contents."""
+
+        if not no_iframe or not self.is_iframe(el):
+            if not self.is_doc(el) and el.text:
+                yield TextNode(el.text, el, False)
+            for child in self.iter_nodes(el):
+                yield child
+                if child.tail:
+                    yield TextNode(child.tail, child, True)
+
+    def get_children(
+        self,
+        el: Any,
+        start: int | None = None,
+        reverse: bool = False,
+        tags: bool = True,
+        no_iframe: bool = False,
+    ) -> Iterator[Any]:
+        """
+        Get children.
+
+        Unlike the backends, `start` counts the nodes walked: only elements, unless
+        `tags` is false.
+        """
+
+        if no_iframe and self.is_iframe(el):
+            return
+
+        if tags and start is None and not reverse:
+            for child in self.iter_nodes(el):
+                if isinstance(child.tag, str):
+                    yield child
+            return
+
+        if tags:
+            nodes = [child for child in self.iter_nodes(el) if self.is_tag(child)]
+        else:
+            nodes = list(self.get_contents(el))
+        last = len(nodes) - 1
+        if start is None:
+            index = last if reverse else 0
+        else:
+            index = start
+        if 0 <= index <= last:
+            yield from (reversed(nodes[: index + 1]) if reverse else nodes[index:])
+
+    def walk_descendants(self, el: Any, tags: bool = True) -> ElementTreeDescendants:
+        """Walk the descendants of an element in document order."""
+
+        return ElementTreeDescendants(self, el, tags)
+
+    def get_parent(self, el: Any, no_iframe: bool = False) -> Any:
+        """Get parent."""
+
+        parent = self.get_node_parent(el)
+        if no_iframe and parent is not None and self.is_iframe(parent):
+            parent = None
+        return parent
+
+    def get_next(self, el: Any, tags: bool = True) -> Any:
+        """Get next sibling tag."""
+
+        if tags:
+            sibling = self.get_next_node(el)
+            while sibling is not None and not self.is_tag(sibling):
+                sibling = self.get_next_node(sibling)
+            return sibling
+
+        if isinstance(el, TextNode):
+            if el.is_tail:
+                return self.get_next_node(el.element)
+            return next(self.iter_nodes(el.element), None)
+        if el.tail:
+            return TextNode(el.tail, el, True)
+        return self.get_next_node(el)
+
+    def get_previous(self, el: Any, tags: bool = True) -> Any:
+        """Get previous sibling tag."""
+
+        if tags:
+            sibling = self.get_previous_node(el)
+            while sibling is not None and not self.is_tag(sibling):
+                sibling = self.get_previous_node(sibling)
+            return sibling
+
+        if isinstance(el, TextNode):
+            return el.element if el.is_tail else None
+        sibling = self.get_previous_node(el)
+        if sibling is None:
+            parent = self.get_node_parent(el)
+            if parent is not None and not self.is_doc(parent) and parent.text:
+                return TextNode(parent.text, parent, False)
+            return None
+        if sibling.tail:
+            return TextNode(sibling.tail, sibling, True)
+        return sibling
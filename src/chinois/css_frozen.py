@@ -0,0 +1,438 @@
+"""Frozen document snapshot for repeated querying."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Iterator, Sequence
+
+from . import css_match as cm
+from . import css_types as ct
+from . import util
+
+if TYPE_CHECKING:  # pragma: no cover
+    import bisque
+    import campbells
+
+__all__ = ("FrozenDocument",)
+
+
+class FrozenDocument:
+    """
+    Flat, read-only snapshot of a document for repeated querying.
+
+    The elements of the whole document the tag belongs to are numbered in document
+    order, and everything matching needs to know about them is stored in lists indexed
+    by that number: tag names, prefixes, and namespaces (with equal strings shared),
+    the parent, previous and next element siblings, the end of each subtree, the
+    normalized attributes, and the class tokens. Selecting against the snapshot walks
+    these lists instead of the tree and maps the results back to the original tags.
+
+    Positions start at 1, so that every element is truthy like the tag it stands for,
+    and each position is always the same `int` object, so that it can be compared and
+    memoized by identity like a tag. The snapshot must be rebuilt if the document is
+    modified.
+    """
+
+    def __init__(self, tag: bisque.Tag | campbells.Tag) -> None:
+        """Initialize."""
+
+        cm._DocumentNav.assert_valid_input(tag)
+        top = tag
+        while top.parent is not None:
+            top = top.parent
+
+        self.is_xml = cm._DocumentNav.is_xml_tree(top)
+        self.is_document = cm._DocumentNav.is_doc(top)
+        self.nodes = [None]  # type: list[Any]
+        self.elements = [None]  # type: list[Any]
+        self.positions = {}  # type: dict[int, int]
+        self.names = [None]  # type: list[str | None]
+        self.tags = [None]  # type: list[str | None]
+        self.prefixes = [None]  # type: list[str | None]
+        self.namespaces = [None]  # type: list[str | None]
+        self.parents = [None]  # type: list[int | None]
+        self.previous = [None]  # type: list[int | None]
+        self.next = [None]  # type: list[int | None]
+        self.attributes = [None]  # type: list[Any]
+        self.classes = [None]  # type: list[Any]
+        # type: dict[bool, tuple[str, list[int], list[int]]]
+        self.text = {}
+
+        strings = {}  # type: dict[str, str]
+        last_child = [None]  # type: list[int | None]
+        empty = None  # type: cm._Attributes | None
+        stack = [(top, None)]  # type: list[tuple[Any, int | None]]
+        while stack:
+            el, parent = stack.pop()
+            pos = len(self.nodes)
+            self.nodes.append(pos)
+            self.elements.append(el)
+            self.positions[id(el)] = pos
+
+            name = el.name
+            if name is not None:
+                name = strings.setdefault(name, name)
+                lower = name if self.is_xml else util.lower(name)
+                self.tags.append(strings.setdefault(lower, lower))
+            else:
+                self.tags.append(None)
+            self.names.append(name)
+            prefix = el.prefix
+            self.prefixes.append(
+                strings.setdefault(prefix, prefix) if prefix is not None else None,
+            )
+            uri = el.namespace
+            self.namespaces.append(
+                strings.setdefault(uri, uri) if uri is not None else None,
+            )
+
+            self.parents.append(parent)
+            previous = None
+            if parent is not None:
+                previous = last_child[parent]
+                if previous is not None:
+                    self.next[previous] = pos
+                last_child[parent] = pos
+            self.previous.append(previous)
+            self.next.append(None)
+            last_child.append(None)
+
+            if el.attrs:
+                self.attributes.append(cm._Attributes(el, el.attrs))
+            else:
+                # Elements without attributes can all share the same empty table.
+                if empty is None:
+                    empty = cm._Attributes(el, el.attrs)
+                self.attributes.append(empty)
+            self.classes.append(
+                tuple(
+                    [strings.setdefault(c, c) for c in cm._DocumentNav.get_classes(el)],
+                ),
+            )
+
+            stack.extend(
+                [
+                    (child, pos)
+                    for child in reversed(el.contents)
+                    if cm._DocumentNav.is_tag(child)
+                ],
+            )
+
+        # Each element's subtree ends at its last descendant in document order.
+        self.ends = list(self.nodes)  # type: list[Any]
+        for pos in range(len(self.nodes) - 1, 1, -1):
+            parent = self.parents[pos]
+            if self.ends[pos] > self.ends[parent]:
+                self.ends[parent] = self.ends[pos]
+
+        self.tag = tag
+        self.scope = self.positions[id(tag)]
+
+    def __len__(self) -> int:
+        """Length."""
+
+        return len(self.nodes) - 1
+
+    def __contains__(self, el: Any) -> bool:
+        """Check if the element is in the snapshot."""
+
+        pos = self.positions.get(id(el))
+        return pos is not None and self.elements[pos] is el
+
+    def get_position(self, el: Any) -> int | None:
+        """Get the position of the element, if it is in the snapshot."""
+
+        return self.positions[id(el)] if el in self else None
+
+    def get_node(self, obj: Any) -> Any:
+        """Get the position standing for a tag of the snapshot, passing anything else through."""
+
+        pos = self.positions.get(id(obj))
+        if pos is not None and self.elements[pos] is obj:
+            return pos
+        return obj
+
+    def session(
+        self,
+        selectors: ct.SelectorList,
+        namespaces: ct.Namespaces | None,
+        flags: int,
+    ) -> FrozenMatch:
+        """Start a matching session scoped to the tag the snapshot was taken from."""
+
+        return FrozenMatch(selectors, self, namespaces, flags)
+
+
+class FrozenDescendants:
+    """
+    Walk the positions under a position in document order.
+
+    Positions are numbered in document order, so the walk counts up to the end of the
+    subtree, and `skip` jumps to the end of the subtree of the position yielded last.
+    """
+
+    __slots__ = ("doc", "pos", "end")
+
+    def __init__(self, doc: FrozenDocument, pos: int) -> None:
+        """Initialize."""
+
+        self.doc = doc
+        self.pos = pos
+        self.end = doc.ends[pos]
+
+    def __iter__(self) -> FrozenDescendants:
+        """Iterate."""
+
+        return self
+
+    def __next__(self) -> int:
+        """Get the next position."""
+
+        if self.pos >= self.end:
+            raise StopIteration
+        self.pos += 1
+        # Positions are looked up so that the same `int` objects are handed out.
+        return self.doc.nodes[self.pos]
+
+    def skip(self) -> None:
+        """Skip the subtree of the position yielded last."""
+
+        self.pos = self.doc.ends[self.pos]
+
+
+class FrozenNodes(cm._Descendants):
+    """Walk the original nodes under a position, with tags swapped for their positions."""
+
+    __slots__ = ("doc",)
+
+    def __init__(self, doc: FrozenDocument, pos: int) -> None:
+        """Initialize."""
+
+        self.doc = doc
+        super().__init__(doc.elements[pos], False, {})
+
+    def __next__(self) -> Any:
+        """Get the next node."""
+
+        return self.doc.get_node(super().__next__())
+
+
+class FrozenMatch(cm.CSSMatch):
+    """
+    Perform CSS matching against a frozen document.
+
+    Elements are the positions of the snapshot. Text nodes are only reachable through
+    the original tags, so walks that include them yield the original text nodes, with
+    any tags among them swapped for their positions.
+    """
+
+    def __init__(
+        self,
+        selectors: ct.SelectorList,
+        doc: FrozenDocument,
+        namespaces: ct.Namespaces | None,
+        flags: int,
+    ) -> None:
+        """Initialize."""
+
+        self.doc = doc
+        super().__init__(selectors, doc.scope, namespaces, flags)
+
+    @staticmethod
+    def is_tag(obj: Any) -> bool:
+        """Is tag."""
+
+        return type(obj) is int
+
+    def is_doc(self, obj: Any) -> bool:
+        """Is `CampbellsSoup` object."""
+
+        return obj == 1 and self.doc.is_document
+
+    def is_xml_tree(self, el: Any) -> bool:
+        """Check if element (or document) is from a XML tree."""
+
+        return self.doc.is_xml
+
+    def get_contents(self, el: Any, no_iframe: bool = False) -> Iterator[Any]:
+        """Get contents."""
+
+        if not no_iframe or not self.is_iframe(el):
+            get_node = self.doc.get_node
+            for node in self.doc.elements[el].contents:
+                yield get_node(node)
+
+    def get_children(
+        self,
+        el: Any,
+        start: int | None = None,
+        reverse: bool = False,
+        tags: bool = True,
+        no_iframe: bool = False,
+    ) -> Iterator[Any]:
+        """Get children."""
+
+        if no_iframe and self.is_iframe(el):
+            return
+
+        doc = self.doc
+        if tags and start is None and not reverse:
+            # Positions are looked up so that the same `int` objects are handed out.
+            child = doc.nodes[el + 1] if doc.ends[el] > el else None
+            while child is not None:
+                yield child
+                child = doc.next[child]
+        else:
+            for node in super().get_children(
+                doc.elements[el],
+                start,
+                reverse,
+                tags=False,
+            ):
+                node = doc.get_node(node)
+                if not tags or self.is_tag(node):
+                    yield node
+
+    def walk_descendants(self, el: Any, tags: bool = True) -> Any:
+        """Walk the descendants of a position in document order."""
+
+        if tags:
+            return FrozenDescendants(self.doc, el)
+        return FrozenNodes(self.doc, el)
+
+    def get_parent(self, el: Any, no_iframe: bool = False) -> Any:
+        """Get parent."""
+
+        parent = self.doc.parents[el]
+        if no_iframe and parent is not None and self.is_iframe(parent):
+            parent = None
+        return parent
+
+    def get_tag_name(self, el: Any) -> str | None:
+        """Get tag."""
+
+        return self.doc.names[el]
+
+    def get_prefix_name(self, el: Any) -> str | None:
+        """Get prefix."""
+
+        return self.doc.prefixes[el]
+
+    def get_uri(self, el: Any) -> str | None:
+        """Get namespace `URI`."""
+
+        return self.doc.namespaces[el]
+
+    def get_tag(self, el: Any) -> str | None:
+        """Get tag."""
+
+        return self.doc.tags[el]
+
+    def get_next(self, el: Any, tags: bool = True) -> Any:
+        """Get next sibling tag."""
+
+        if tags:
+            return self.doc.next[el]
+        obj = self.doc.elements[el] if self.is_tag(el) else el
+        return self.doc.get_node(obj.next_sibling)
+
+    def get_previous(self, el: Any, tags: bool = True) -> Any:
+        """Get previous sibling tag."""
+
+        if tags:
+            return self.doc.previous[el]
+        obj = self.doc.elements[el] if self.is_tag(el) else el
+        return self.doc.get_node(obj.previous_sibling)
+
+    def has_html_ns(self, el: Any) -> bool:
+        """Check if element has an HTML namespace."""
+
+        return el is not None and self.doc.namespaces[el] == cm.NS_XHTML
+
+    def get_attributes(self, el: Any) -> cm._Attributes:
+        """Get the element's normalized attributes."""
+
+        return self.doc.attributes[el]
+
+    def has_anchor_id(self, el: Any, anchors: frozenset[str]) -> bool:
+        """Check if the element could have one of the anchor ids."""
+
+        ident = self.get_attribute_by_name(el, "id")
+        return isinstance(ident, str) and ident in anchors
+
+    def get_classes(self, el: Any) -> Sequence[str]:
+        """Get classes."""
+
+        return self.doc.classes[el]
+
+    def get_text_index(self, no_iframe: bool) -> tuple[str, list[int], list[int]]:
+        """
+        Get the text index of the whole snapshot.
+
+        This is the same index `CSSMatch` builds, only kept on the snapshot as the start
+        and end offsets of each position, so it is shared by every later query.
+        """
+
+        doc = self.doc
+        index = doc.text.get(no_iframe)
+        if index is not None:
+            return index
+
+        chunks = []  # type: list[str]
+        offset = 0
+        starts = [0] * len(doc.nodes)
+        ends = [0] * len(doc.nodes)
+        segments = [[doc.elements[1]]]
+        while segments:
+            stack = [(node, -1) for node in reversed(segments.pop())]
+            while stack:
+                node, start = stack.pop()
+                if start >= 0:
+                    pos = doc.positions[id(node)]
+                    starts[pos] = start
+                    ends[pos] = offset
+                elif cm._DocumentNav.is_tag(node):
+                    if no_iframe and self.is_iframe(doc.positions[id(node)]):
+                        pos = doc.positions[id(node)]
+                        starts[pos] = ends[pos] = offset
+                        segments.append(node.contents)
+                        continue
+                    stack.append((node, offset))
+                    stack.extend([(child, -1) for child in reversed(node.contents)])
+                elif self.is_content_string(node):
+                    chunks.append(node)
+                    offset += len(node)
+
+        index = doc.text[no_iframe] = ("".join(chunks), starts, ends)
+        return index
+
+    def get_text_span(self, el: Any, no_iframe: bool = False) -> tuple[str, int, int]:
+        """Get a text buffer and the offsets within it that hold the element's text."""
+
+        text, starts, ends = self.get_text_index(no_iframe)
+        return text, starts[el], ends[el]
+
+    def select(self, limit: int = 0, index: Any = None) -> Iterator[Any]:
+        """Match all tags under the targeted tag."""
+
+        if index is not None:
+            raise ValueError("Cannot use a document index with a frozen document")
+
+        elements = self.doc.elements
+        for pos in super().select(limit):
+            yield elements[pos]
+
+    def closest(self) -> Any:
+        """Match closest ancestor."""
+
+        pos = super().closest()
+        return self.doc.elements[pos] if pos is not None else None
+
+    def filter(self) -> list[Any]:  # noqa A001
+        """Filter tag's children."""
+
+        elements = self.doc.elements
+        return [
+            elements[child]
+            for child in self.get_children(self.tag)
+            if self.match(child)
+        ]
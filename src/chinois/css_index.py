@@ -0,0 +1,194 @@
+"""Document index for seeding selection candidates."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, Any, Iterator
+
+from . import css_types as ct
+from . import util
+from .css_match import get_anchor, get_session_class
+
+if TYPE_CHECKING:  # pragma: no cover
+    import bisque
+    import campbells
+
+__all__ = ("DocumentIndex",)
+
+
+def selector_keys(selector: ct.Selector) -> list[tuple[str, str]]:
+    """
+    Get the index keys of the rightmost compound of a selector.
+
+    An element can only match the selector if it is found under every one of the keys,
+    so any single key is enough to find a superset of the matches.
+    """
+
+    keys = [("id", i) for i in selector.ids]
+    keys.extend([("class", c) for c in selector.classes])
+    if selector.tag is not None and selector.tag.name != "*":
+        keys.append(("tag", util.lower(selector.tag.name)))
+    return keys
+
+
+class DocumentIndex:
+    """
+    Inverted index of the tag names, ids, and classes in a document.
+
+    The index is built in one pass and maps each lowercased tag name, id, and class
+    token to the elements that carry it, in document order. Besides soups, the trees
+    matched through an adapter (such as lxml and `ElementTree`) can be indexed. It is
+    a snapshot, so it must be rebuilt if the document is modified.
+    """
+
+    def __init__(self, tag: bisque.Tag | campbells.Tag) -> None:
+        """Initialize."""
+
+        # A session reads the tree, so any tree `chinois` can match can be indexed.
+        session = get_session_class(tag)(ct.SelectorList(), tag, None, 0)
+        self.root = tag
+        self.elements = []  # type: list[Any]
+        self.positions = {}  # type: dict[int, int]
+        self.ends = []  # type: list[int]
+        self.tags = {}  # type: dict[str, list[int]]
+        self.ids = {}  # type: dict[str, list[int]]
+        self.classes = {}  # type: dict[str, list[int]]
+
+        parents = []  # type: list[int]
+        stack = [(tag, -1)]
+        while stack:
+            el, parent = stack.pop()
+            pos = len(self.elements)
+            self.elements.append(el)
+            self.positions[id(el)] = pos
+            parents.append(parent)
+
+            name = session.get_tag_name(el)
+            if name is not None and not session.is_doc(el):
+                self.tags.setdefault(util.lower(name), []).append(pos)
+                ident = session.get_attribute_by_name(el, "id")
+                if isinstance(ident, str):
+                    self.ids.setdefault(ident, []).append(pos)
+                for c in session.get_classes(el):
+                    bucket = self.classes.setdefault(c, [])
+                    # Guard against a class being listed more than once
+                    if not bucket or bucket[-1] != pos:
+                        bucket.append(pos)
+
+            stack.extend(
+                [(child, pos) for child in session.get_children(el, reverse=True)],
+            )
+
+        # Each element's subtree ends at its last descendant in document order.
+        self.ends = list(range(len(self.elements)))
+        for pos in range(len(self.elements) - 1, 0, -1):
+            parent = parents[pos]
+            if self.ends[pos] > self.ends[parent]:
+                self.ends[parent] = self.ends[pos]
+
+    def __len__(self) -> int:
+        """Length."""
+
+        return len(self.elements)
+
+    def __contains__(self, el: Any) -> bool:
+        """Check if the element is in the index."""
+
+        pos = self.positions.get(id(el))
+        return pos is not None and self.elements[pos] is el
+
+    def get_position(self, el: Any) -> int | None:
+        """Get the document position of the element, if it is indexed."""
+
+        return self.positions[id(el)] if el in self else None
+
+    def _bucket(self, kind: str, key: str) -> list[int]:
+        """Get the positions stored under a key."""
+
+        if kind == "id":
+            return self.ids.get(key, [])
+        elif kind == "class":
+            return self.classes.get(key, [])
+        return self.tags.get(key, [])
+
+    def by_tag(self, name: str) -> list[Any]:
+        """Get elements with the tag name (case insensitive)."""
+
+        return [self.elements[pos] for pos in self._bucket("tag", util.lower(name))]
+
+    def by_id(self, ident: str) -> list[Any]:
+        """Get elements with the id."""
+
+        return [self.elements[pos] for pos in self._bucket("id", ident)]
+
+    def by_class(self, name: str) -> list[Any]:
+        """Get elements with the class."""
+
+        return [self.elements[pos] for pos in self._bucket("class", name)]
+
+    def get_anchor_ranges(
+        self,
+        anchor: str,
+        start: int,
+        end: int,
+    ) -> list[tuple[int, int]]:
+        """
+        Get the ranges of positions below the elements with the anchor id.
+
+        Only anchors within the scope (from `start` to `end`) are used, and those nested
+        in an earlier anchor are left out, as their subtree is already covered. If the
+        scope is itself under an anchor, the whole scope is returned.
+        """
+
+        ranges = []  # type: list[tuple[int, int]]
+        for pos in self.ids.get(anchor, []):
+            if pos <= start:
+                if self.ends[pos] >= start:
+                    return [(start + 1, end)]
+            elif pos <= end and (not ranges or pos > ranges[-1][1]):
+                ranges.append((pos + 1, self.ends[pos]))
+        return ranges
+
+    def get_candidates(
+        self,
+        selectors: ct.SelectorList,
+        scope: Any,
+    ) -> Iterator[Any] | None:
+        """
+        Get the candidate descendants of `scope` that could match the selectors.
+
+        For each selector the smallest bucket of its rightmost compound is used, and if
+        the selector is anchored under an id (see `css_match.get_anchor`), only the
+        subtrees of the elements with that id are searched.
+        `None` is returned when the index can't narrow the search, either because the
+        scope isn't indexed or because a selector has no indexable key or anchor.
+        """
+
+        start = self.get_position(scope)
+        if start is None:
+            return None
+        end = self.ends[start]
+
+        positions = set()  # type: set[int]
+        for selector in selectors:
+            if isinstance(selector, ct.SelectorNull):
+                continue
+            keys = selector_keys(selector)
+            anchor = get_anchor(selector)
+            if anchor is not None:
+                ranges = self.get_anchor_ranges(anchor, start, end)
+            elif keys:
+                ranges = [(start + 1, end)]
+            else:
+                return None
+
+            if keys:
+                bucket = min([self._bucket(*key) for key in keys], key=len)
+                for lo, hi in ranges:
+                    positions.update(
+                        bucket[bisect_left(bucket, lo) : bisect_right(bucket, hi)],
+                    )
+            else:
+                for lo, hi in ranges:
+                    positions.update(range(lo, hi + 1))
+        return (self.elements[pos] for pos in sorted(positions))
@@ -0,0 +1,187 @@
+"""Match selectors natively on `lxml.etree` and `lxml.html` trees."""
+
+from __future__ import annotations
+
+from typing import Any, Iterator, NamedTuple
+
+from lxml import etree
+
+from . import css_types as ct
+from . import css_xpath as cxp
+from .css_etree import ElementTreeMatch
+
+__all__ = ("LxmlMatch",)
+
+
+class XPathQueries(NamedTuple):
+    """Compiled XPath queries for a translated selector list."""
+
+    select: etree.XPath
+    select_all: etree.XPath
+    match: etree.XPath
+    closest: etree.XPath
+    filter: etree.XPath
+
+
+def compile_queries(
+    selectors: ct.SelectorList,
+    namespaces: ct.Namespaces | None,
+    xml: bool,
+    html_namespace: bool,
+) -> XPathQueries | None:
+    """Compile the XPath queries for a selector list, if it can be translated."""
+
+    return selectors.derive(_compile_queries, namespaces, xml, html_namespace)
+
+
+def _compile_queries(
+    selectors: ct.SelectorList,
+    namespaces: ct.Namespaces | None,
+    xml: bool,
+    html_namespace: bool,
+) -> XPathQueries | None:
+    """Compile the XPath queries for a selector list."""
+
+    predicate = cxp.translate_selectors(
+        selectors,
+        namespaces,
+        xml=xml,
+        html_namespace=html_namespace,
+    ).predicate
+    if predicate is None:
+        return None
+
+    def compile_query(path: str) -> etree.XPath:
+        return etree.XPath(path, namespaces=cxp.NAMESPACES, smart_strings=False)
+
+    return XPathQueries(
+        compile_query(f"descendant::*[{predicate}]"),
+        compile_query(f"descendant-or-self::*[{predicate}]"),
+        compile_query(f"boolean(self::*[{predicate}])"),
+        compile_query(f"ancestor-or-self::*[{predicate}][1]"),
+        compile_query(f"*[{predicate}]"),
+    )
+
+
+class LxmlMatch(ElementTreeMatch):
+    """
+    Perform CSS matching on an `lxml.etree` or `lxml.html` tree.
+
+    Trees parsed with an HTML parser are matched as HTML, anything else as XML. Unlike
+    `xml.etree.ElementTree`, lxml knows the parent and siblings of every element, so
+    matching sees the whole tree an element belongs to.
+
+    Selectors that can be translated to XPath (see `css_xpath`) are run by lxml, and
+    only the rest are matched here.
+    """
+
+    element_type = etree._Element  # type: type
+    tree_type = etree._ElementTree  # type: type
+    pi_tag = etree.ProcessingInstruction  # type: Any
+
+    def __init__(
+        self,
+        selectors: ct.SelectorList,
+        scope: Any,
+        namespaces: ct.Namespaces | None,
+        flags: int,
+    ) -> None:
+        """Initialize."""
+
+        super().__init__(selectors, scope, namespaces, flags)
+        self.queries = compile_queries(
+            selectors,
+            namespaces,
+            self.is_xml,
+            self.has_html_namespace,
+        )
+
+    def get_document(self, scope: Any) -> Any:
+        """Get the tree above the scope's root element."""
+
+        return scope if self.is_doc(scope) else scope.getroottree()
+
+    @classmethod
+    def is_xml_tree(cls, el: Any) -> bool:
+        """Check if element (or document) is from a XML tree."""
+
+        tree = el if cls.is_doc(el) else el.getroottree()
+        return not isinstance(tree.parser, etree.HTMLParser)
+
+    @staticmethod
+    def get_prefix_name(el: Any) -> str | None:
+        """Get prefix."""
+
+        return getattr(el, "prefix", None)
+
+    @classmethod
+    def get_attrs(cls, el: Any) -> dict[str, Any]:
+        """Get the attributes of an element, as stored by the tree."""
+
+        return {} if cls.is_doc(el) else dict(el.attrib)
+
+    def get_node_parent(self, el: Any) -> Any:
+        """Get the parent of an element or comment, with the tree above the root."""
+
+        if self.is_doc(el):
+            return None
+        parent = el.getparent()
+        if parent is None and self.document is not None:
+            parent = self.document
+        return parent
+
+    def get_next_node(self, el: Any) -> Any:
+        """Get the next element or comment."""
+
+        return el.getnext()
+
+    def get_previous_node(self, el: Any) -> Any:
+        """Get the previous element or comment."""
+
+        return el.getprevious()
+
+    def iter_nodes(self, el: Any) -> Iterator[Any]:
+        """Iterate the elements and comments directly under an element or tree."""
+
+        if self.is_doc(el):
+            root = el.getroot()
+            yield from reversed(list(root.itersiblings(preceding=True)))
+            yield root
+            yield from root.itersiblings()
+        else:
+            yield from el
+
+    def select(self, limit: int = 0, index: Any = None) -> Iterator[Any]:
+        """Match all tags under the targeted tag."""
+
+        if self.queries is None or index is not None:
+            yield from super().select(limit, index)
+            return
+
+        if self.is_doc(self.tag):
+            results = self.queries.select_all(self.tag)
+        else:
+            results = self.queries.select(self.tag)
+        yield from results[:limit] if limit > 0 else results
+
+    def match(self, el: Any) -> bool:
+        """Match."""
+
+        if self.queries is None or not self.is_tag(el):
+            return super().match(el)
+        return self.queries.match(el)
+
+    def closest(self) -> Any:
+        """Match closest ancestor."""
+
+        if self.queries is None or not self.is_tag(self.tag):
+            return super().closest()
+        results = self.queries.closest(self.tag)
+        return results[0] if results else None
+
+    def filter(self) -> list[Any]:  # noqa A001
+        """Filter tag's children."""
+
+        if self.queries is None or not self.is_tag(self.tag):
+            return super().filter()
+        return self.queries.filter(self.tag)
@@ -5,26 +5,26 @@ from __future__ import annotations
 import re
 import unicodedata
 from datetime import datetime
-from typing import Any, Callable, Iterable, Iterator, Sequence, cast  # noqa: F401
+from typing import (  # noqa: F401
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Sequence,
+    cast,
+)
 
+from . import css_backend as cb
 from . import css_types as ct
 from . import util
 
-try:
-    import campbells  # type: ignore[import]
-
-    has_campbells = True
-except ImportError:
-    campbells = None
-    has_campbells = False
-
-try:
-    import bisque  # type: ignore[import]
+if TYPE_CHECKING:  # pragma: no cover
+    import bisque
+    import campbells
 
-    has_bisque = True
-except ImportError:
-    bisque = None
-    has_bisque = False
+    from .css_frozen import FrozenDocument
+    from .css_index import DocumentIndex
 
 
 # Empty tag pattern (whitespace okay)
@@ -70,6 +70,38 @@ FEB_MONTH = 28
 FEB_LEAP_MONTH = 29
 DAYS_IN_WEEK = 7
 
+# Every spelling of the `id` attribute name in HTML, where names are case insensitive
+ID_NAMES = ("id", "ID", "Id", "iD")
+
+# Whitespace that separates the words of an attribute value (for `~=`)
+WS_TO_SPACE = str.maketrans("\t\r\n\f", "    ")
+
+
+def match_attribute_value(op: str, expected: str, value: str) -> bool:
+    """Compare an attribute value using the operator of an attribute selector."""
+
+    if op == "=":
+        return value == expected
+    elif op == "^=":
+        return value.startswith(expected)
+    elif op == "$=":
+        return value.endswith(expected)
+    elif op == "*=":
+        return expected in value
+    elif op == "~=":
+        # An empty word or one containing whitespace never matches.
+        return (
+            bool(expected)
+            and expected in value
+            and expected in value.translate(WS_TO_SPACE).split(" ")
+        )
+    else:
+        # `|=`
+        return value == expected or (
+            value.startswith(expected)
+            and value[len(expected) : len(expected) + 1] == "-"
+        )
+
 
 class _FakeParent:
     """
@@ -91,8 +123,122 @@ class _FakeParent:
         return len(self.contents)
 
 
+class _Attributes:
+    """
+    Normalized attributes of an element.
+
+    Lowercased names are computed once per element, while values are normalized and
+    names split by namespace the first time they are needed, so every later lookup is
+    a dictionary access.
+    """
+
+    __slots__ = ("element", "attrs", "lower_names", "values", "namespaced", "classes")
+
+    def __init__(self, element: Any, attrs: dict[str, Any]) -> None:
+        """Initialize."""
+
+        self.element = element
+        self.attrs = attrs
+        # Walk the names in reverse so that the first of any duplicates wins.
+        # For ASCII names, `str.lower` gives the same result as `util.lower`, only faster.
+        self.lower_names = {
+            (k.lower() if k.isascii() else util.lower(k)): k
+            for k in reversed(self.attrs)
+        }  # type: dict[str, str]
+        self.values = {}  # type: dict[str, str | Sequence[str]]
+        # type: list[tuple[str, str | None, str | None]] | None
+        self.namespaced = None
+        self.classes = None  # type: Sequence[str] | None
+
+
+class _Descendants:
+    """
+    Walk the nodes under a Beautiful Soup element in document order.
+
+    After a node is yielded, `skip` passes over everything under it by jumping straight
+    to the last node of its subtree. The last node is found by following last children
+    down, and is stored in `ends` for every element on the way, so a session finds the
+    end of each subtree only once.
+    """
+
+    __slots__ = ("tags", "ends", "node", "first", "end")
+
+    def __init__(
+        self,
+        el: bisque.Tag | campbells.Tag,
+        tags: bool,
+        ends: dict[int, tuple[Any, Any]],
+    ) -> None:
+        """Initialize."""
+
+        self.tags = tags
+        self.ends = ends
+        # The document object has no `next_element`, so the walk starts at the first child.
+        self.first = el.contents[0] if el.contents else None
+        self.node = None if self.first is not None else el  # type: Any
+        self.end = self.get_end(el)  # type: Any
+
+    def __iter__(self) -> _Descendants:
+        """Iterate."""
+
+        return self
+
+    def __next__(self) -> Any:
+        """Get the next node, or the next tag if only tags are walked."""
+
+        node = self.node
+        end = self.end
+        while node is not end:
+            node = self.first if node is None else node.next_element
+            if not self.tags or _DocumentNav.is_tag(node):
+                self.node = node
+                return node
+        self.node = node
+        raise StopIteration
+
+    def get_end(self, el: Any) -> Any:
+        """Get the last node of an element's subtree, which is the element if it is empty."""
+
+        cached = self.ends.get(id(el))
+        if cached is not None and cached[0] is el:
+            return cached[1]
+
+        path = []
+        node = el
+        while _DocumentNav.is_tag(node) and node.contents:
+            path.append(node)
+            node = node.contents[-1]
+            cached = self.ends.get(id(node))
+            if cached is not None and cached[0] is node:
+                node = cached[1]
+                break
+        for parent in path:
+            self.ends[id(parent)] = (parent, node)
+        return node
+
+    def skip(self) -> None:
+        """Skip the subtree of the node yielded last."""
+
+        if self.node is not None:
+            self.node = self.get_end(self.node)
+
+
 class _DocumentNav:
-    """Navigate a Beautiful Soup document."""
+    """
+    Navigate a Beautiful Soup document.
+
+    Matching only reaches the tree through the navigation primitives below, so
+    another tree can be matched natively by a `CSSMatch` subclass that overrides them
+    (see `css_etree` and `css_lxml`, registered in `css_backend.ADAPTERS`):
+
+    - node kinds: `is_doc`, `is_tag`, `is_declaration`, `is_cdata`,
+      `is_processing_instruction`, `is_navigable_string`, `is_special_string`,
+      `is_content_string`, and `is_xml_tree`
+    - tree walks: `get_contents`, `get_children`, `walk_descendants`, `get_parent`,
+      `get_next`, and `get_previous`
+    - element data: `get_tag_name`, `get_prefix_name`, `get_uri`, `get_attrs`, and
+      `split_namespace`
+    """
 
     @classmethod
     def assert_valid_input(cls, tag: Any) -> None:
@@ -109,81 +255,47 @@ class _DocumentNav:
     @staticmethod
     def is_doc(obj: bisque.Tag | campbells.Tag) -> bool:
         """Is `CampbellsSoup` object."""
-        is_bisque = has_bisque and isinstance(obj, bisque.Bisque)
-        is_campbells = has_campbells and isinstance(obj, campbells.CampbellsSoup)
-        return is_bisque or is_campbells
+        return bool(cb.get_category(obj) & cb.DOC)
 
     @staticmethod
     def is_tag(obj: bisque.PageElement | campbells.PageElement) -> bool:
         """Is tag."""
-        is_bisque = has_bisque and isinstance(obj, bisque.Tag)
-        is_campbells = has_campbells and isinstance(obj, campbells.Tag)
-        return is_bisque or is_campbells
+        return bool(cb.get_category(obj) & cb.TAG)
 
     @staticmethod
     def is_declaration(
         obj: bisque.PageElement | campbells.PageElement,
     ) -> bool:  # pragma: no cover
         """Is declaration."""
-        is_bisque = has_bisque and isinstance(obj, bisque.Declaration)
-        is_campbells = has_campbells and isinstance(obj, campbells.Declaration)
-        return is_bisque or is_campbells
+        return bool(cb.get_category(obj) & cb.DECLARATION)
 
     @staticmethod
     def is_cdata(obj: bisque.PageElement | campbells.PageElement) -> bool:
         """Is CDATA."""
-        is_bisque = has_bisque and isinstance(obj, bisque.CData)
-        is_campbells = has_campbells and isinstance(obj, campbells.CData)
-        return is_bisque or is_campbells
+        return bool(cb.get_category(obj) & cb.CDATA)
 
     @staticmethod
     def is_processing_instruction(
         obj: bisque.PageElement | campbells.PageElement,
     ) -> bool:  # pragma: no cover
         """Is processing instruction."""
-        is_bisque = has_bisque and isinstance(obj, bisque.ProcessingInstruction)
-        is_campbells = has_campbells and isinstance(
-            obj,
-            campbells.ProcessingInstruction,
-        )
-        return is_bisque or is_campbells
+        return bool(cb.get_category(obj) & cb.PROCESSING_INSTRUCTION)
 
     @staticmethod
     def is_navigable_string(obj: bisque.PageElement | campbells.PageElement) -> bool:
         """Is navigable string."""
-        is_bisque = has_bisque and isinstance(obj, bisque.NavigableString)
-        is_campbells = has_campbells and isinstance(obj, campbells.NavigableString)
-        return is_bisque or is_campbells
+        return bool(cb.get_category(obj) & cb.NAVIGABLE_STRING)
 
     @staticmethod
     def is_special_string(obj: bisque.PageElement | campbells.PageElement) -> bool:
         """Is special string."""
-        is_bisque = has_bisque and isinstance(
-            obj,
-            (
-                bisque.Comment,
-                bisque.Declaration,
-                bisque.CData,
-                bisque.ProcessingInstruction,
-                bisque.Doctype,
-            ),
-        )
-        is_campbells = has_campbells and isinstance(
-            obj,
-            (
-                campbells.Comment,
-                campbells.Declaration,
-                campbells.CData,
-                campbells.ProcessingInstruction,
-                campbells.Doctype,
-            ),
-        )
-        return is_bisque or is_campbells
+        return bool(cb.get_category(obj) & cb.SPECIAL_STRING)
 
-    @classmethod
-    def is_content_string(cls, obj: bisque.PageElement | campbells.PageElement) -> bool:
+    @staticmethod
+    def is_content_string(obj: bisque.PageElement | campbells.PageElement) -> bool:
         """Check if node is content string."""
-        return cls.is_navigable_string(obj) and not cls.is_special_string(obj)
+        category = cb.get_category(obj)
+        return bool(category & cb.NAVIGABLE_STRING) and not category & cb.SPECIAL_STRING
 
     @staticmethod
     def create_fake_parent(el: bisque.Tag | campbells.Tag) -> _FakeParent:
@@ -201,7 +313,7 @@ class _DocumentNav:
         """Check if element is an `iframe`."""
 
         return bool(
-            ((el.name if self.is_xml_tree(el) else util.lower(el.name)) == "iframe")
+            self.get_tag(el) == "iframe"  # type: ignore[attr-defined]
             and self.is_html_tag(el),  # type: ignore[attr-defined]
         )
 
@@ -213,7 +325,7 @@ class _DocumentNav:
         and we check if it is the root element under an `iframe`.
         """
 
-        root = self.root and self.root is el  # type: ignore[attr-defined]
+        root = self.root is el  # type: ignore[attr-defined]
         if not root:
             parent = self.get_parent(el)
             root = (
@@ -256,40 +368,34 @@ class _DocumentNav:
                     if not tags or self.is_tag(node):
                         yield node
 
+    def walk_descendants(
+        self,
+        el: bisque.Tag | campbells.Tag,
+        tags: bool = True,
+    ) -> _Descendants:
+        """
+        Walk the descendants of an element in document order.
+
+        The walk is an iterator with a `skip` method that passes over the subtree of the
+        node yielded last, without visiting anything in it.
+        """
+
+        return _Descendants(el, tags, self.cached_ends)  # type: ignore[attr-defined]
+
     def get_descendants(
         self,
-        el: campbells.Tag,
+        el: bisque.Tag | campbells.Tag,
         tags: bool = True,
         no_iframe: bool = False,
     ) -> Iterator[bisque.PageElement] | Iterator[campbells.PageElement]:
         """Get descendants."""
 
         if not no_iframe or not self.is_iframe(el):
-            next_good = None
-            for child in el.descendants:
-                if next_good is not None:
-                    if child is not next_good:
-                        continue
-                    next_good = None
-
-                is_tag = self.is_tag(child)
-
-                if no_iframe and is_tag and self.is_iframe(child):
-                    if child.next_sibling is not None:
-                        next_good = child.next_sibling
-                    else:
-                        last_child = child
-                        while self.is_tag(last_child) and last_child.contents:
-                            last_child = last_child.contents[-1]
-                        next_good = last_child.next_element
-                    yield child
-                    if next_good is None:
-                        break
-                    # Coverage isn't seeing this even though it's executed
-                    continue  # pragma: no cover
-
-                if not tags or is_tag:
-                    yield child
+            walk = self.walk_descendants(el, tags)
+            for child in walk:
+                if no_iframe and self.is_tag(child) and self.is_iframe(child):
+                    walk.skip()
+                yield child
 
     def get_parent(
         self,
@@ -347,8 +453,8 @@ class _DocumentNav:
             sibling = sibling.previous_sibling
         return sibling
 
-    @staticmethod
-    def has_html_ns(el: bisque.Tag | campbells.Tag) -> bool:
+    @classmethod
+    def has_html_ns(cls, el: bisque.Tag | campbells.Tag) -> bool:
         """
         Check if element has an HTML namespace.
 
@@ -356,9 +462,15 @@ class _DocumentNav:
         like we do in the case of `is_html_tag`.
         """
 
-        ns = getattr(el, "namespace") if el else None
+        ns = cls.get_uri(el) if el is not None else None
         return bool(ns and ns == NS_XHTML)
 
+    @staticmethod
+    def get_attrs(el: bisque.Tag | campbells.Tag) -> dict[str, Any]:
+        """Get the attributes of an element, as stored by the tree."""
+
+        return cast("dict[str, Any]", el.attrs)
+
     @staticmethod
     def split_namespace(
         el: bisque.Tag | campbells.Tag,
@@ -385,7 +497,8 @@ class _DocumentNav:
             return value.decode("utf8")
 
         # Campbells supports sequences of attribute values, so make sure the children are strings.
-        if isinstance(value, Sequence):
+        # Lists (such as `class`) are by far the most common, so avoid the slower ABC check for them.
+        if isinstance(value, list) or isinstance(value, Sequence):
             new_value = []
             for v in value:
                 if not isinstance(v, (str, bytes)) and isinstance(v, Sequence):
@@ -612,11 +725,30 @@ class CSSMatch(_DocumentNav):
         self.namespaces = {} if namespaces is None else namespaces
         self.flags = flags
         self.iframe_restrict = False
+        self.cached_attributes = {}  # type: dict[int, _Attributes]
+        self.cached_ends = {}  # type: dict[int, tuple[Any, Any]]
+        self.cached_nth = (
+            {}
+            # type: dict[tuple[int, bool, ct.SelectorList], tuple[Any, dict[int, tuple[int, int]]]]
+        )
+        self.cached_future = (
+            {}
+            # type: dict[tuple[int, ct.SelectorList, bool], tuple[Any, bool]]
+        )
+        self.cached_past = (
+            {}
+            # type: dict[tuple[int, ct.SelectorList, bool], tuple[Any, bool]]
+        )
+        self.cached_text = (
+            {}
+            # type: dict[bool, tuple[str, dict[int, tuple[Any, int, int]]]]
+        )
+        self.text_requests = 0
 
         # Find the root element for the whole tree
         doc = scope
         parent = self.get_parent(doc)
-        while parent:
+        while parent is not None:
             doc = parent
             parent = self.get_parent(doc)
         root = None
@@ -635,6 +767,83 @@ class CSSMatch(_DocumentNav):
         self.is_xml = self.is_xml_tree(doc)
         self.is_html = not self.is_xml or self.has_html_namespace
 
+    def get_text_index(
+        self,
+        no_iframe: bool,
+    ) -> tuple[str, dict[int, tuple[Any, int, int]]]:
+        """
+        Get the text index of the whole document.
+
+        All content strings are concatenated in document order and each element is given
+        the start and end offsets of its text. When iframe content is excluded, the
+        content of each `iframe` is moved to the end of the text so that it is still
+        contiguous for the elements inside it, while being left out of the elements
+        around it.
+        """
+
+        index = self.cached_text.get(no_iframe)
+        if index is not None:
+            return index
+
+        top = self.tag
+        parent = self.get_parent(top)
+        while parent is not None:
+            top = parent
+            parent = self.get_parent(top)
+
+        chunks = []  # type: list[str]
+        offset = 0
+        spans = {}  # type: dict[int, tuple[Any, int, int]]
+        segments = [[top]]
+        while segments:
+            stack = [(node, -1) for node in reversed(segments.pop())]
+            while stack:
+                node, start = stack.pop()
+                if start >= 0:
+                    spans[id(node)] = (node, start, offset)
+                elif self.is_tag(node) or self.is_doc(node):
+                    contents = list(self.get_contents(node))
+                    if no_iframe and self.is_iframe(node):
+                        spans[id(node)] = (node, offset, offset)
+                        segments.append(contents)
+                        continue
+                    stack.append((node, offset))
+                    stack.extend([(child, -1) for child in reversed(contents)])
+                elif self.is_content_string(node):
+                    chunks.append(node)
+                    offset += len(node)
+
+        index = self.cached_text[no_iframe] = ("".join(chunks), spans)
+        return index
+
+    def get_text_span(
+        self,
+        el: bisque.Tag | campbells.Tag,
+        no_iframe: bool = False,
+    ) -> tuple[str, int, int]:
+        """
+        Get a text buffer and the offsets within it that hold the element's text.
+
+        The document's text index is only built once a session asks for text a second
+        time, so that matching a single element doesn't cost a walk of the whole document.
+        """
+
+        if no_iframe in self.cached_text or self.text_requests:
+            text, spans = self.get_text_index(no_iframe)
+            span = spans.get(id(el))
+            if span is not None and span[0] is el:
+                return text, span[1], span[2]
+
+        self.text_requests += 1
+        text = super().get_text(el, no_iframe)
+        return text, 0, len(text)
+
+    def get_text(self, el: bisque.Tag | campbells.Tag, no_iframe: bool = False) -> str:
+        """Get text."""
+
+        text, start, end = self.get_text_span(el, no_iframe)
+        return text[start:end]
+
     def supports_namespaces(self) -> bool:
         """Check if namespaces are supported in the HTML type."""
 
@@ -669,6 +878,87 @@ class CSSMatch(_DocumentNav):
         prefix = self.get_prefix_name(el)
         return util.lower(prefix) if prefix is not None and not self.is_xml else prefix
 
+    def get_attributes(self, el: bisque.Tag | campbells.Tag) -> _Attributes:
+        """Get the element's normalized attributes, creating them on first use."""
+
+        attributes = self.cached_attributes.get(id(el))
+        if attributes is None or attributes.element is not el:
+            attributes = _Attributes(el, self.get_attrs(el))
+            self.cached_attributes[id(el)] = attributes
+        return attributes
+
+    def get_attribute_value(
+        self,
+        attributes: _Attributes,
+        key: str | None,
+        default: str | Sequence[str] | None = None,
+    ) -> str | Sequence[str] | None:
+        """Get the normalized value of an attribute by its original name."""
+
+        if key is None:
+            return default
+        value = attributes.values.get(key)
+        if value is None:
+            try:
+                value = self.normalize_value(attributes.attrs[key])
+            except KeyError:
+                return default
+            attributes.values[key] = value
+        return value
+
+    def get_attribute_by_name(
+        self,
+        el: bisque.Tag | campbells.Tag,
+        name: str,
+        default: str | Sequence[str] | None = None,
+    ) -> str | Sequence[str] | None:
+        """Get attribute by name."""
+
+        attributes = self.get_attributes(el)
+        return self.get_attribute_value(
+            attributes,
+            name if self.is_xml else attributes.lower_names.get(name),
+            default,
+        )
+
+    def iter_attributes(
+        self,
+        el: bisque.Tag | campbells.Tag,
+    ) -> Iterator[tuple[str, str | Sequence[str] | None]]:
+        """Iterate attributes."""
+
+        attributes = self.get_attributes(el)
+        for k in attributes.attrs:
+            yield k, self.get_attribute_value(attributes, k)
+
+    def get_namespaced_attributes(
+        self,
+        el: bisque.Tag | campbells.Tag,
+    ) -> list[tuple[str, str | None, str | None]]:
+        """Get attribute names along with their namespace and name without the prefix."""
+
+        attributes = self.get_attributes(el)
+        if attributes.namespaced is None:
+            attributes.namespaced = [
+                (k, *self.split_namespace(el, k)) for k in attributes.attrs
+            ]
+        return attributes.namespaced
+
+    def get_classes(self, el: bisque.Tag | campbells.Tag) -> Sequence[str]:
+        """Get classes."""
+
+        attributes = self.get_attributes(el)
+        if attributes.classes is None:
+            classes = self.get_attribute_value(
+                attributes,
+                "class" if self.is_xml else attributes.lower_names.get("class"),
+                [],
+            )
+            if isinstance(classes, str):
+                classes = RE_NOT_WS.findall(classes)
+            attributes.classes = cast(Sequence[str], classes)
+        return attributes.classes
+
     def find_bidi(self, el: bisque.Tag | campbells.Tag) -> int | None:
         """Get directionality from element text."""
 
@@ -771,9 +1061,8 @@ class CSSMatch(_DocumentNav):
     ) -> str | Sequence[str] | None:
         """Match attribute name and return value if it exists."""
 
-        value = None
+        attributes = self.get_attributes(el)
         if self.supports_namespaces():
-            value = None
             # If we have not defined namespaces, we can't very well find them, so don't bother trying.
             if prefix:
                 ns = self.namespaces.get(prefix)
@@ -782,44 +1071,38 @@ class CSSMatch(_DocumentNav):
             else:
                 ns = None
 
-            for k, v in self.iter_attributes(el):
-                # Get attribute parts
-                namespace, name = self.split_namespace(el, k)
-
-                # Can't match a prefix attribute as we haven't specified one to match
-                # Try to match it normally as a whole `p:a` as selector may be trying `p\:a`.
-                if ns is None:
-                    if (self.is_xml and attr == k) or (
-                        not self.is_xml and util.lower(attr) == util.lower(k)
-                    ):
-                        value = v
-                        break
-                    # Coverage is not finding this even though it is executed.
-                    # Adding a print statement before this (and erasing coverage) causes coverage to find the line.
-                    # Ignore the false positive message.
-                    continue  # pragma: no cover
+            # Can't match a prefix attribute as we haven't specified one to match
+            # Try to match it normally as a whole `p:a` as selector may be trying `p\:a`.
+            if ns is None:
+                return self.get_attribute_value(
+                    attributes,
+                    (
+                        attr
+                        if self.is_xml
+                        else attributes.lower_names.get(util.lower(attr))
+                    ),
+                )
 
+            if not self.is_xml:
+                attr = util.lower(attr)
+            for k, namespace, name in self.get_namespaced_attributes(el):
                 # We can't match our desired prefix attribute as the attribute doesn't have a prefix
                 if namespace is None or ns != namespace and prefix != "*":
                     continue
 
                 # The attribute doesn't match.
-                if (
-                    (util.lower(attr) != util.lower(name))
-                    if not self.is_xml
-                    else (attr != name)
+                if attr != (
+                    util.lower(name) if not self.is_xml and name is not None else name
                 ):
                     continue
 
-                value = v
-                break
-        else:
-            for k, v in self.iter_attributes(el):
-                if util.lower(attr) != util.lower(k):
-                    continue
-                value = v
-                break
-        return value
+                return self.get_attribute_value(attributes, k)
+            return None
+
+        return self.get_attribute_value(
+            attributes,
+            attributes.lower_names.get(util.lower(attr)),
+        )
 
     def match_namespace(
         self,
@@ -858,18 +1141,23 @@ class CSSMatch(_DocumentNav):
         if attributes:
             for a in attributes:
                 temp = self.match_attribute_name(el, a.attribute, a.prefix)
-                pattern = (
-                    a.xml_type_pattern
-                    if self.is_xml and a.xml_type_pattern
-                    else a.pattern
-                )
                 if temp is None:
                     match = False
                     break
-                value = temp if isinstance(temp, str) else " ".join(temp)
-                if pattern is None:
+                if a.op is None:
                     continue
-                elif pattern.match(value) is None:
+                value = temp if isinstance(temp, str) else " ".join(temp)
+                expected = a.value
+                if a.xml_value is not None and self.is_xml:
+                    expected = a.xml_value
+                elif a.ignore_case:
+                    if not (value.isascii() and expected.isascii()):
+                        if a.pattern is None or a.pattern.match(value) is None:
+                            match = False
+                            break
+                        continue
+                    value = value.lower()
+                if not match_attribute_value(a.op, expected, value):
                     match = False
                     break
         return match
@@ -904,6 +1192,38 @@ class CSSMatch(_DocumentNav):
                 match = False
         return match
 
+    def match_ancestor(
+        self,
+        el: bisque.Tag | campbells.Tag,
+        relation: ct.SelectorList,
+    ) -> bool:
+        """
+        Match the element or one of its ancestors.
+
+        Every element climbed past shares the outcome of the climb, so it is memoized
+        for all of them, and later climbs stop at the first element already resolved.
+        """
+
+        cached_past = self.cached_past
+        restrict = self.iframe_restrict
+        found = False
+        visited = []
+        parent = el
+        while parent is not None:
+            cached = cached_past.get((id(parent), relation, restrict))
+            if cached is not None and cached[0] is parent:
+                found = cached[1]
+                break
+            visited.append(parent)
+            if self.match_selectors(parent, relation):
+                found = True
+                break
+            parent = self.get_parent(parent, no_iframe=restrict)
+
+        for node in visited:
+            cached_past[(id(node), relation, restrict)] = (node, found)
+        return found
+
     def match_past_relations(
         self,
         el: bisque.Tag | campbells.Tag,
@@ -918,21 +1238,26 @@ class CSSMatch(_DocumentNav):
 
         if relation[0].rel_type == REL_PARENT:
             parent = self.get_parent(el, no_iframe=self.iframe_restrict)
-            while not found and parent:
-                found = self.match_selectors(parent, relation)
-                parent = self.get_parent(parent, no_iframe=self.iframe_restrict)
+            if parent is not None:
+                found = self.match_ancestor(parent, relation)
         elif relation[0].rel_type == REL_CLOSE_PARENT:
             parent = self.get_parent(el, no_iframe=self.iframe_restrict)
-            if parent:
-                found = self.match_selectors(parent, relation)
+            if parent is not None:
+                key = (id(parent), relation, self.iframe_restrict)
+                cached = self.cached_past.get(key)
+                if cached is not None and cached[0] is parent:
+                    found = cached[1]
+                else:
+                    found = self.match_selectors(parent, relation)
+                    self.cached_past[key] = (parent, found)
         elif relation[0].rel_type == REL_SIBLING:
             sibling = self.get_previous(el)
-            while not found and sibling:
+            while not found and sibling is not None:
                 found = self.match_selectors(sibling, relation)
                 sibling = self.get_previous(sibling)
         elif relation[0].rel_type == REL_CLOSE_SIBLING:
             sibling = self.get_previous(el)
-            if sibling and self.is_tag(sibling):
+            if sibling is not None and self.is_tag(sibling):
                 found = self.match_selectors(sibling, relation)
         return found
 
@@ -944,18 +1269,113 @@ class CSSMatch(_DocumentNav):
     ) -> bool:
         """Match future child."""
 
-        match = False
         if recursive:
-            # type: Callable[..., Iterator[bisque.Tag]] | Callable[..., Iterator[campbells.Tag]]
-            children = self.get_descendants
-        else:
-            children = self.get_children
-        for child in children(parent, no_iframe=self.iframe_restrict):
+            return self.match_future_descendant(parent, relation)
+
+        match = False
+        for child in self.get_children(parent, no_iframe=self.iframe_restrict):
             match = self.match_selectors(child, relation)
             if match:
                 break
         return match
 
+    def get_cached_future(
+        self,
+        el: bisque.Tag | campbells.Tag,
+        relation: ct.SelectorList,
+    ) -> bool | None:
+        """Get the memoized result of a future relation, if there is one."""
+
+        cached = self.cached_future.get((id(el), relation, self.iframe_restrict))
+        if cached is not None and cached[0] is el:
+            return cached[1]
+        return None
+
+    def match_future_descendant(
+        self,
+        parent: bisque.Tag | campbells.Tag,
+        relation: ct.SelectorList,
+    ) -> bool:
+        """
+        Match future descendant.
+
+        Rather than searching below each element separately, the whole subtree is
+        resolved bottom-up in one post-order pass: an element has a matching descendant
+        if one of its children matches or has one itself. Every element visited is
+        memoized, so nested elements (and later ancestors) are answered from the cache.
+        """
+
+        found = self.get_cached_future(parent, relation)
+        if found is not None:
+            return found
+
+        restrict = self.iframe_restrict
+        stack = [(parent, False)]
+        while stack:
+            el, resolved = stack.pop()
+            if not resolved:
+                if (
+                    el is not parent
+                    and self.get_cached_future(el, relation) is not None
+                ):
+                    continue
+                stack.append((el, True))
+                stack.extend(
+                    [
+                        (child, False)
+                        for child in self.get_children(el, no_iframe=restrict)
+                    ],
+                )
+                continue
+
+            found = False
+            for child in self.get_children(el, no_iframe=restrict):
+                if self.get_cached_future(child, relation) or self.match_selectors(
+                    child,
+                    relation,
+                ):
+                    found = True
+                    break
+            self.cached_future[(id(el), relation, restrict)] = (el, found)
+        return found
+
+    def match_future_sibling(
+        self,
+        el: bisque.Tag | campbells.Tag,
+        relation: ct.SelectorList,
+    ) -> bool:
+        """
+        Match future sibling.
+
+        Every sibling passed over shares the outcome of the scan, so it is memoized
+        for all of them, and a later scan stops at the first sibling already resolved.
+        """
+
+        found = self.get_cached_future(el, relation)
+        if found is not None:
+            return found
+
+        found = False
+        visited = [el]
+        sibling = self.get_next(el)
+        while sibling is not None:
+            if self.match_selectors(sibling, relation):
+                found = True
+                break
+            cached = self.get_cached_future(sibling, relation)
+            if cached is not None:
+                found = cached
+                break
+            visited.append(sibling)
+            sibling = self.get_next(sibling)
+
+        for node in visited:
+            self.cached_future[(id(node), relation, self.iframe_restrict)] = (
+                node,
+                found,
+            )
+        return found
+
     def match_future_relations(
         self,
         el: bisque.Tag | campbells.Tag,
@@ -973,13 +1393,10 @@ class CSSMatch(_DocumentNav):
         elif relation[0].rel_type == REL_HAS_CLOSE_PARENT:
             found = self.match_future_child(el, relation)
         elif relation[0].rel_type == REL_HAS_SIBLING:
-            sibling = self.get_next(el)
-            while not found and sibling:
-                found = self.match_selectors(sibling, relation)
-                sibling = self.get_next(sibling)
+            found = self.match_future_sibling(el, relation)
         elif relation[0].rel_type == REL_HAS_CLOSE_SIBLING:
             sibling = self.get_next(el)
-            if sibling and self.is_tag(sibling):
+            if sibling is not None and self.is_tag(sibling):
                 found = self.match_selectors(sibling, relation)
         return found
 
@@ -1071,6 +1488,44 @@ class CSSMatch(_DocumentNav):
             self.get_tag_ns(child) == self.get_tag_ns(el)
         )
 
+    def get_nth_positions(
+        self,
+        parent: bisque.Tag | campbells.Tag,
+        nth: ct.SelectorNth,
+    ) -> dict[int, tuple[Any, int, int]]:
+        """
+        Get the `nth` positions of the parent's children.
+
+        Positions are counted once per parent for each `of S` selector list (or per
+        tag type for `of-type`) and map each counted child to its 1-based position
+        and the total it was counted among. The child is kept with its position, as
+        trees that create element objects on demand can reuse the `id` of one that
+        is no longer referenced.
+        """
+
+        key = (id(parent), nth.of_type, nth.selectors)
+        cached = self.cached_nth.get(key)
+        if cached is not None and cached[0] is parent:
+            return cached[1]
+
+        groups = {}  # type: dict[Any, list[Any]]
+        for child in self.get_children(parent):
+            if nth.of_type:
+                group = (self.get_tag(child), self.get_tag_ns(child))
+            elif not nth.selectors or self.match_selectors(child, nth.selectors):
+                group = None
+            else:
+                continue
+            groups.setdefault(group, []).append(child)
+
+        positions = {}  # type: dict[int, tuple[Any, int, int]]
+        for children in groups.values():
+            total = len(children)
+            for pos, child in enumerate(children, 1):
+                positions[id(child)] = (child, pos, total)
+        self.cached_nth[key] = (parent, positions)
+        return positions
+
     def match_nth(
         self,
         el: bisque.Tag | campbells.Tag,
@@ -1078,108 +1533,32 @@ class CSSMatch(_DocumentNav):
     ) -> bool:
         """Match `nth` elements."""
 
-        matched = True
-
         for n in nth:
-            matched = False
             if n.selectors and not self.match_selectors(el, n.selectors):
-                break
+                return False
             parent = self.get_parent(el)
             if parent is None:
-                parent = self.create_fake_parent(el)
-            last = n.last
-            last_index = len(parent) - 1
-            index = last_index if last else 0
-            relative_index = 0
-            a = n.a
-            b = n.b
-            var = n.n
-            count = 0
-            count_incr = 1
-            factor = -1 if last else 1
-            idx = last_idx = a * count + b if var else a
-
-            # We can only adjust bounds within a variable index
-            if var:
-                # Abort if our nth index is out of bounds and only getting further out of bounds as we increment.
-                # Otherwise, increment to try to get in bounds.
-                adjust = None
-                while idx < 1 or idx > last_index:
-                    if idx < 0:
-                        diff_low = 0 - idx
-                        if adjust is not None and adjust == 1:
-                            break
-                        adjust = -1
-                        count += count_incr
-                        idx = last_idx = a * count + b if var else a
-                        diff = 0 - idx
-                        if diff >= diff_low:
-                            break
-                    else:
-                        diff_high = idx - last_index
-                        if adjust is not None and adjust == -1:
-                            break
-                        adjust = 1
-                        count += count_incr
-                        idx = last_idx = a * count + b if var else a
-                        diff = idx - last_index
-                        if diff >= diff_high:
-                            break
-                        diff_high = diff
-
-                # If a < 0, our count is working backwards, so floor the index by increasing the count.
-                # Find the count that yields the lowest, in bound value and use that.
-                # Lastly reverse count increment so that we'll increase our index.
-                lowest = count
-                if a < 0:
-                    while idx >= 1:
-                        lowest = count
-                        count += count_incr
-                        idx = last_idx = a * count + b if var else a
-                    count_incr = -1
-                count = lowest
-                idx = last_idx = a * count + b if var else a
-
-            # Evaluate elements while our calculated nth index is still in range
-            while 1 <= idx <= last_index + 1:
-                child = None
-                # Evaluate while our child index is still in range.
-                for child in self.get_children(
-                    parent,
-                    start=index,
-                    reverse=factor < 0,
-                    tags=False,
-                ):
-                    index += factor
-                    if not self.is_tag(child):
-                        continue
-                    # Handle `of S` in `nth-child`
-                    if n.selectors and not self.match_selectors(child, n.selectors):
-                        continue
-                    # Handle `of-type`
-                    if n.of_type and not self.match_nth_tag_type(el, child):
-                        continue
-                    relative_index += 1
-                    if relative_index == idx:
-                        if child is el:
-                            matched = True
-                        else:
-                            break
-                    if child is el:
-                        break
-                if child is el:
-                    break
-                last_idx = idx
-                count += count_incr
-                if count < 0:
-                    # Count is counting down and has now ventured into invalid territory.
-                    break
-                idx = a * count + b if var else a
-                if last_idx == idx:
-                    break
+                # An element without a parent is the only child of its fake parent.
+                pos = 1
+            else:
+                position = self.get_nth_positions(parent, n).get(id(el))
+                if position is None or position[0] is not el:  # pragma: no cover
+                    return False
+                _, pos, total = position
+                if n.last:
+                    pos = total - pos + 1
+
+            if not n.n:
+                matched = pos == n.a
+            elif n.a == 0:
+                matched = pos == n.b
+            else:
+                # `pos = a * count + b` must hold for some count >= 0.
+                count, remainder = divmod(pos - n.b, n.a)
+                matched = not remainder and count >= 0
             if not matched:
-                break
-        return matched
+                return False
+        return True
 
     def match_empty(self, el: bisque.Tag | campbells.Tag) -> bool:
         """Check if element is empty (if requested)."""
@@ -1215,26 +1594,30 @@ class CSSMatch(_DocumentNav):
         """Match element if it contains text."""
 
         match = True
-        content = None  # type: str | Sequence[str] | None
+        own_content = None  # type: list[str] | None
+        span = None  # type: tuple[str, int, int] | None
         for contain_list in contains:
-            if content is None:
-                if contain_list.own:
-                    content = self.get_own_text(el, no_iframe=self.is_html)
+            pattern = contain_list.pattern
+            if contain_list.own:
+                if own_content is None:
+                    own_content = self.get_own_text(el, no_iframe=self.is_html)
+                if pattern is not None:
+                    found = any(pattern.search(c) for c in own_content)
                 else:
-                    content = self.get_text(el, no_iframe=self.is_html)
-            found = False
-            for text in contain_list.text:
-                if contain_list.own:
-                    for c in content:
-                        if text in c:
-                            found = True
-                            break
-                    if found:
-                        break
+                    found = any(
+                        text in c for text in contain_list.text for c in own_content
+                    )
+            else:
+                if span is None:
+                    span = self.get_text_span(el, no_iframe=self.is_html)
+                content, start, end = span
+                if pattern is not None:
+                    found = pattern.search(content, start, end) is not None
                 else:
-                    if text in content:
-                        found = True
-                        break
+                    found = any(
+                        content.find(text, start, end) != -1
+                        for text in contain_list.text
+                    )
             if not found:
                 match = False
         return match
@@ -1247,7 +1630,7 @@ class CSSMatch(_DocumentNav):
         # Find this input's form
         form = None
         parent = self.get_parent(el, no_iframe=True)
-        while parent and form is None:
+        while parent is not None and form is None:
             if self.get_tag(parent) == "form" and self.is_html_tag(parent):
                 form = parent
             else:
@@ -1399,7 +1782,8 @@ class CSSMatch(_DocumentNav):
 
         # If we couldn't find a language, and the document is HTML, look to meta to determine language.
         if found_lang is None and (
-            not self.is_xml or (has_html_namespace and root.name == "html")
+            not self.is_xml
+            or (has_html_namespace and self.get_tag_name(root) == "html")
         ):
             # Find head
             found = False
@@ -1415,7 +1799,7 @@ class CSSMatch(_DocumentNav):
 
             # Search meta tags
             if found:
-                for child in parent:
+                for child in self.get_children(parent, tags=False):
                     if (
                         self.is_tag(child)
                         and self.get_tag(child) == "meta"
@@ -1617,111 +2001,34 @@ class CSSMatch(_DocumentNav):
     ) -> bool:
         """Check if element matches one of the selectors."""
 
-        match = False
-        is_not = selectors.is_not
-        is_html = selectors.is_html
-
-        # Internal selector lists that use the HTML flag, will automatically get the `html` namespace.
-        if is_html:
-            namespaces = self.namespaces
-            iframe_restrict = self.iframe_restrict
-            self.namespaces = {"html": NS_XHTML}
-            self.iframe_restrict = True
-
-        if not is_html or self.is_html:
-            for selector in selectors:
-                match = is_not
-                # We have a un-matchable situation (like `:focus` as you can focus an element in this environment)
-                if isinstance(selector, ct.SelectorNull):
-                    continue
-                # Verify tag matches
-                if not self.match_tag(el, selector.tag):
-                    continue
-                # Verify tag is defined
-                if selector.flags & ct.SEL_DEFINED and not self.match_defined(el):
-                    continue
-                # Verify element is root
-                if selector.flags & ct.SEL_ROOT and not self.match_root(el):
-                    continue
-                # Verify element is scope
-                if selector.flags & ct.SEL_SCOPE and not self.match_scope(el):
-                    continue
-                # Verify element has placeholder shown
-                if (
-                    selector.flags & ct.SEL_PLACEHOLDER_SHOWN
-                    and not self.match_placeholder_shown(el)
-                ):
-                    continue
-                # Verify `nth` matches
-                if not self.match_nth(el, selector.nth):
-                    continue
-                if selector.flags & ct.SEL_EMPTY and not self.match_empty(el):
-                    continue
-                # Verify id matches
-                if selector.ids and not self.match_id(el, selector.ids):
-                    continue
-                # Verify classes match
-                if selector.classes and not self.match_classes(el, selector.classes):
-                    continue
-                # Verify attribute(s) match
-                if not self.match_attributes(el, selector.attributes):
-                    continue
-                # Verify ranges
-                if selector.flags & RANGES and not self.match_range(
-                    el,
-                    selector.flags & RANGES,
-                ):
-                    continue
-                # Verify language patterns
-                if selector.lang and not self.match_lang(el, selector.lang):
-                    continue
-                # Verify pseudo selector patterns
-                if selector.selectors and not self.match_subselectors(
-                    el,
-                    selector.selectors,
-                ):
-                    continue
-                # Verify relationship selectors
-                if selector.relation and not self.match_relations(
-                    el,
-                    selector.relation,
-                ):
-                    continue
-                # Validate that the current default selector match corresponds to the first submit button in the form
-                if selector.flags & ct.SEL_DEFAULT and not self.match_default(el):
-                    continue
-                # Validate that the unset radio button is among radio buttons with the same name in a form that are
-                # also not set.
-                if (
-                    selector.flags & ct.SEL_INDETERMINATE
-                    and not self.match_indeterminate(el)
-                ):
-                    continue
-                # Validate element directionality
-                if selector.flags & DIR_FLAGS and not self.match_dir(
-                    el,
-                    selector.flags & DIR_FLAGS,
-                ):
-                    continue
-                # Validate that the tag contains the specified text.
-                if selector.contains and not self.match_contains(el, selector.contains):
-                    continue
-                match = not is_not
-                break
-
-        # Restore actual namespaces being used for external selector lists
-        if is_html:
-            self.namespaces = namespaces
-            self.iframe_restrict = iframe_restrict
+        return compile_selectors(selectors)(self, el)
 
-        return match
+    def select(
+        self,
+        limit: int = 0,
+        index: DocumentIndex | None = None,
+    ) -> Iterator[bisque.Tag] | Iterator[campbells.Tag]:
+        """
+        Match all tags under the targeted tag.
 
-    def select(self, limit: int = 0) -> Iterator[bisque.Tag] | Iterator[campbells.Tag]:
-        """Match all tags under the targeted tag."""
+        If a document index is given, only the candidates it provides are verified.
+        """
 
         lim = None if limit < 1 else limit
 
-        for child in self.get_descendants(self.tag):
+        candidates = (
+            index.get_candidates(self.selectors, self.tag)
+            if index is not None
+            else None
+        )
+        if candidates is None:
+            anchors = get_anchors(self.selectors)
+            if anchors is not None and not self.is_anchored(self.tag, anchors):
+                candidates = self.walk_anchored(anchors)
+            else:
+                candidates = self.walk_descendants(self.tag)
+
+        for child in candidates:
             if self.match(child):
                 yield child
                 if lim is not None:
@@ -1729,6 +2036,59 @@ class CSSMatch(_DocumentNav):
                     if lim < 1:
                         break
 
+    def is_anchored(
+        self,
+        el: bisque.Tag | campbells.Tag,
+        anchors: frozenset[str],
+    ) -> bool:
+        """Check if the element or one of its ancestors has one of the anchor ids."""
+
+        while el is not None:
+            if not self.is_doc(el) and self.has_anchor_id(el, anchors):
+                return True
+            el = self.get_parent(el)
+        return False
+
+    def has_anchor_id(
+        self,
+        el: bisque.Tag | campbells.Tag,
+        anchors: frozenset[str],
+    ) -> bool:
+        """
+        Check if the element could have one of the anchor ids.
+
+        The stored attributes are read directly, as normalizing all of them is far more
+        costly than looking for an id. HTML names are case insensitive, so every spelling
+        of `id` is tried, which can only turn up more anchors than `match_id` would see.
+        """
+
+        attrs = self.get_attrs(el)
+        for name in ID_NAMES if not self.is_xml else ID_NAMES[:1]:
+            value = attrs.get(name)
+            if value is not None:
+                ident = self.normalize_value(value)
+                if isinstance(ident, str) and ident in anchors:
+                    return True
+        return False
+
+    def walk_anchored(
+        self,
+        anchors: frozenset[str],
+    ) -> Iterator[bisque.Tag] | Iterator[campbells.Tag]:
+        """
+        Walk the descendants of the elements under the scope that have an anchor id.
+
+        The scope is scanned in document order, and the subtree of each anchor found is
+        walked and then skipped by the scan, so every element is visited once even if
+        ids are duplicated, and the scan stops as soon as the caller does.
+        """
+
+        walk = self.walk_descendants(self.tag)
+        for el in walk:
+            if self.has_anchor_id(el, anchors):
+                yield from self.walk_descendants(el)
+                walk.skip()
+
     def closest(self) -> bisque.Tag | campbells.Tag | None:
         """Match closest ancestor."""
 
@@ -1760,6 +2120,214 @@ class CSSMatch(_DocumentNav):
         )
 
 
+def compile_tag(tag: ct.SelectorTag) -> Callable[[CSSMatch, Any], bool] | None:
+    """
+    Compile a tag selector into a predicate.
+
+    The lowercased name used for HTML documents is computed once here instead of on
+    every element. `*|*` matches any element, so no predicate is needed at all.
+    """
+
+    name = tag.name
+    lower_name = util.lower(name)
+
+    if name == "*":
+        if tag.prefix == "*":
+            return None
+
+        def match_tag(m: CSSMatch, el: Any) -> bool:
+            return m.match_namespace(el, tag)
+
+    elif tag.prefix == "*":
+
+        def match_tag(m: CSSMatch, el: Any) -> bool:
+            return m.get_tag(el) == (name if m.is_xml else lower_name)
+
+    else:
+
+        def match_tag(m: CSSMatch, el: Any) -> bool:
+            return m.get_tag(el) == (
+                name if m.is_xml else lower_name
+            ) and m.match_namespace(el, tag)
+
+    return match_tag
+
+
+def compile_selector(
+    selector: ct.Selector,
+) -> tuple[Callable[[CSSMatch, Any], bool], ...]:
+    """
+    Compile a selector into a chain of predicates.
+
+    Only the checks the selector actually uses are emitted, in the same order
+    `CSSMatch` has always evaluated them.
+    """
+
+    checks = []  # type: list[Callable[[CSSMatch, Any], bool]]
+    flags = selector.flags
+
+    if selector.tag is not None:
+        match_tag = compile_tag(selector.tag)
+        if match_tag is not None:
+            checks.append(match_tag)
+    if flags & ct.SEL_DEFINED:
+        checks.append(lambda m, el: m.match_defined(el))
+    if flags & ct.SEL_ROOT:
+        checks.append(lambda m, el: m.match_root(el))
+    if flags & ct.SEL_SCOPE:
+        checks.append(lambda m, el: m.match_scope(el))
+    if flags & ct.SEL_PLACEHOLDER_SHOWN:
+        checks.append(lambda m, el: m.match_placeholder_shown(el))
+    if selector.nth:
+        nth = selector.nth
+        checks.append(lambda m, el: m.match_nth(el, nth))
+    if flags & ct.SEL_EMPTY:
+        checks.append(lambda m, el: m.match_empty(el))
+    if selector.ids:
+        ids = selector.ids
+        checks.append(lambda m, el: m.match_id(el, ids))
+    if selector.classes:
+        classes = selector.classes
+        checks.append(lambda m, el: m.match_classes(el, classes))
+    if selector.attributes:
+        attributes = selector.attributes
+        checks.append(lambda m, el: m.match_attributes(el, attributes))
+    if flags & RANGES:
+        ranges = flags & RANGES
+        checks.append(lambda m, el: m.match_range(el, ranges))
+    if selector.lang:
+        lang = selector.lang
+        checks.append(lambda m, el: m.match_lang(el, lang))
+    if selector.selectors:
+        subselectors = selector.selectors
+        checks.append(lambda m, el: m.match_subselectors(el, subselectors))
+    if selector.relation:
+        relation = selector.relation
+        checks.append(lambda m, el: m.match_relations(el, relation))
+    if flags & ct.SEL_DEFAULT:
+        checks.append(lambda m, el: m.match_default(el))
+    if flags & ct.SEL_INDETERMINATE:
+        checks.append(lambda m, el: m.match_indeterminate(el))
+    if flags & DIR_FLAGS:
+        directionality = flags & DIR_FLAGS
+        checks.append(lambda m, el: m.match_dir(el, directionality))
+    if selector.contains:
+        contains = selector.contains
+        checks.append(lambda m, el: m.match_contains(el, contains))
+    return tuple(checks)
+
+
+def compile_selectors(
+    selectors: ct.SelectorList,
+) -> Callable[[CSSMatch, Any], bool]:
+    """
+    Compile a selector list into a single matching function.
+
+    The function takes the `CSSMatch` session and the element and behaves exactly as
+    interpreting the selector list would. It is compiled once and kept with the list.
+    """
+
+    return selectors.derive(_compile_selectors)
+
+
+def _compile_selectors(
+    selectors: ct.SelectorList,
+) -> Callable[[CSSMatch, Any], bool]:
+    """
+    Compile a selector list.
+
+    `SelectorNull` entries can never match, so they are dropped from the chain up front.
+    """
+
+    is_not = selectors.is_not
+    is_html = selectors.is_html
+    chains = tuple(
+        compile_selector(selector)
+        for selector in selectors
+        if not isinstance(selector, ct.SelectorNull)
+    )
+    # With no selectors at all nothing matches, otherwise a failed list yields `is_not`.
+    no_match = is_not if len(selectors) else False
+
+    def match_chains(m: CSSMatch, el: Any) -> bool:
+        for checks in chains:
+            for check in checks:
+                if not check(m, el):
+                    break
+            else:
+                return not is_not
+        return no_match
+
+    if not is_html:
+        return match_chains
+
+    def match_html(m: CSSMatch, el: Any) -> bool:
+        if not m.is_html:
+            return False
+
+        # Internal selector lists that use the HTML flag, will automatically get the `html` namespace.
+        namespaces = m.namespaces
+        iframe_restrict = m.iframe_restrict
+        m.namespaces = {"html": NS_XHTML}
+        m.iframe_restrict = True
+        try:
+            return match_chains(m, el)
+        finally:
+            # Restore actual namespaces being used for external selector lists
+            m.namespaces = namespaces
+            m.iframe_restrict = iframe_restrict
+
+    return match_html
+
+
+def get_anchor(selector: ct.Selector) -> str | None:
+    """
+    Get an id that the subject of a selector must be a descendant of an element with.
+
+    A compound to the left of a descendant or child combinator is an ancestor of the
+    compound to its right, and so of the subject, as sibling combinators in between
+    keep the same parent. An id such a compound requires anchors the subject under an
+    element with that id. The nearest one is used, as it leaves the smallest subtree.
+    """
+
+    while selector.relation:
+        selector = cast(ct.Selector, selector.relation[0])
+        if selector.ids and selector.rel_type in (REL_PARENT, REL_CLOSE_PARENT):
+            return selector.ids[0]
+    return None
+
+
+def get_anchors(selectors: ct.SelectorList) -> frozenset[str] | None:
+    """Get the ids anchoring a selector list, if every selector in it has one."""
+
+    return selectors.derive(_get_anchors)
+
+
+def _get_anchors(selectors: ct.SelectorList) -> frozenset[str] | None:
+    """
+    Find the ids anchoring a selector list.
+
+    `SelectorNull` entries can never match, so they need no anchor.
+    """
+
+    anchors = set()
+    for selector in selectors:
+        if isinstance(selector, ct.SelectorNull):
+            continue
+        anchor = get_anchor(selector)
+        if anchor is None:
+            return None
+        anchors.add(anchor)
+    return frozenset(anchors) if anchors else None
+
+
+def get_session_class(node: Any) -> type[CSSMatch]:
+    """Get the matching session class for a node, which is `CSSMatch` unless its tree needs an adapter."""
+
+    adapter = cb.get_adapter(type(node))
+    return CSSMatch if adapter is None else cast("type[CSSMatch]", adapter)
+
+
 class SoupSieve(ct.Immutable):
     """Compiled Soup Sieve selector matching object."""
 
@@ -1789,15 +2357,54 @@ class SoupSieve(ct.Immutable):
             flags=flags,
         )
 
-    def match(self, tag: bisque.Tag | campbells.Tag) -> bool:
+    @property
+    def cost(self) -> int:
+        """Estimated cost of matching an element (see `css_cost.selector_cost`)."""
+
+        from .css_cost import selector_cost
+
+        return self.selectors.derive(selector_cost)
+
+    @property
+    def cost_class(self) -> str:
+        """Class of the estimated cost: `low`, `medium`, `high`, or `extreme`."""
+
+        from .css_cost import cost_class
+
+        return cost_class(self.cost)
+
+    def _session(self, tag: Any) -> CSSMatch:
+        """
+        Start a matching session on a tag.
+
+        A `FrozenDocument` can be given in place of the tag it was taken from, and the
+        elements (or trees) of other supported trees can be given directly.
+        """
+
+        from .css_frozen import FrozenDocument
+
+        if isinstance(tag, FrozenDocument):
+            return tag.session(self.selectors, self.namespaces, self.flags)
+        return get_session_class(tag)(
+            self.selectors,
+            tag,
+            self.namespaces,
+            self.flags,
+        )
+
+    def match(self, tag: bisque.Tag | campbells.Tag | FrozenDocument) -> bool:
         """Match."""
 
-        return CSSMatch(self.selectors, tag, self.namespaces, self.flags).match(tag)
+        session = self._session(tag)
+        return session.match(session.tag)
 
-    def closest(self, tag: bisque.Tag | campbells.Tag) -> bisque.Tag | campbells.Tag:
+    def closest(
+        self,
+        tag: bisque.Tag | campbells.Tag | FrozenDocument,
+    ) -> bisque.Tag | campbells.Tag:
         """Match closest ancestor."""
 
-        return CSSMatch(self.selectors, tag, self.namespaces, self.flags).closest()
+        return self._session(tag).closest()
 
     def filter(
         self,
@@ -1814,45 +2421,55 @@ class SoupSieve(ct.Immutable):
         so for those, we use a new `CSSMatch` for each item in the iterable.
         """
 
-        if CSSMatch.is_tag(iterable):
-            return CSSMatch(
-                self.selectors,
-                iterable,
-                self.namespaces,
-                self.flags,
-            ).filter()
+        from .css_frozen import FrozenDocument
+
+        session_class = get_session_class(iterable)
+        if (
+            session_class.is_tag(iterable)
+            or session_class.is_doc(iterable)
+            or isinstance(iterable, FrozenDocument)
+        ):
+            return self._session(iterable).filter()
         else:
             return [
                 node
                 for node in iterable
-                if not CSSMatch.is_navigable_string(node) and self.match(node)
+                if not get_session_class(node).is_navigable_string(node)
+                and self.match(node)
             ]
 
-    def select_one(self, tag: bisque.Tag | campbells.Tag) -> bisque.Tag | campbells.Tag:
+    def select_one(
+        self,
+        tag: bisque.Tag | campbells.Tag | FrozenDocument,
+        *,
+        index: DocumentIndex | None = None,
+    ) -> bisque.Tag | campbells.Tag:
         """Select a single tag."""
 
-        tags = self.select(tag, limit=1)
+        tags = self.select(tag, limit=1, index=index)
         return tags[0] if tags else None
 
     def select(
         self,
-        tag: bisque.Tag | campbells.Tag,
+        tag: bisque.Tag | campbells.Tag | FrozenDocument,
         limit: int = 0,
+        *,
+        index: DocumentIndex | None = None,
     ) -> list[bisque.Tag] | list[campbells.Tag]:
         """Select the specified tags."""
 
-        return list(self.iselect(tag, limit))
+        return list(self.iselect(tag, limit, index=index))
 
     def iselect(
         self,
-        tag: bisque.Tag | campbells.Tag,
+        tag: bisque.Tag | campbells.Tag | FrozenDocument,
         limit: int = 0,
+        *,
+        index: DocumentIndex | None = None,
     ) -> Iterator[bisque.Tag] | Iterator[campbells.Tag]:
         """Iterate the specified tags."""
 
-        yield from CSSMatch(self.selectors, tag, self.namespaces, self.flags).select(
-            limit,
-        )
+        yield from self._session(tag).select(limit, index)
 
     def __repr__(self) -> str:  # pragma: no cover
         """Representation."""
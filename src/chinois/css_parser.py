@@ -5,7 +5,7 @@ from __future__ import annotations
 import re
 import warnings
 from functools import lru_cache
-from typing import Any, Iterator, Match, cast
+from typing import Any, Iterable, Iterator, Match, Pattern, cast
 
 from . import css_match as cm
 from . import css_types as ct
@@ -207,6 +207,21 @@ PAT_PSEUDO_CONTAINS = r"{name}(?P<values>{value}(?:{ws}*,{ws}*{value})*){ws}*\)"
     value=VALUE,
 )
 
+# Characters each token can start with (`tag` takes any character not listed here)
+WS_CHARS = " \t\r\n\f"
+TOKEN_STARTS = {
+    "pseudo_close": WS_CHARS + "/)",
+    "pseudo_class_special": ":",
+    "pseudo_class_custom": ":",
+    "pseudo_class": ":",
+    "pseudo_element": ":",
+    "at_rule": "@",
+    "id": "#",
+    "class": ".",
+    "attribute": "[",
+    "combine": WS_CHARS + "/,+>~",
+}
+
 # Regular expressions
 # CSS escape pattern
 RE_CSS_ESC = re.compile(
@@ -257,33 +272,63 @@ FLG_OUT_OF_RANGE = 0x100
 FLG_PLACEHOLDER_SHOWN = 0x200
 FLG_FORGIVE = 0x400
 
-# Maximum cached patterns to store
-_MAXCACHE = 500
 
-
-@lru_cache(maxsize=_MAXCACHE)
-def _cached_css_compile(
+def _css_compile(
     pattern: str,
     namespaces: ct.Namespaces | None,
     custom: ct.CustomSelectors | None,
     flags: int,
+    tokens: list[tuple[str, Match[str]]] | None = None,
 ) -> cm.SoupSieve:
-    """Cached CSS compile."""
-
-    custom_selectors = process_custom(custom)
-    return cm.SoupSieve(
-        pattern,
-        CSSParser(pattern, custom=custom_selectors, flags=flags).process_selectors(),
-        namespaces,
-        custom,
-        flags,
+    """
+    CSS compile (see `css_cache` for the cached version).
+
+    The tokens of the pattern can be passed in if they are already known (see
+    `tokenize`).
+    """
+
+    shared = resolve_custom(custom, flags)
+    custom_selectors = dict(shared)
+    parser = CSSParser(pattern, custom=custom_selectors, flags=flags)
+    selectors = (
+        parser.process_selectors()
+        if tokens is None
+        else parser.parse_selectors(iter(tokens), 0, 0)
     )
+    # Keep the custom selectors compiled along the way for other patterns using them.
+    for name, value in custom_selectors.items():
+        if isinstance(value, ct.SelectorList) and name in shared:
+            shared[name] = value
+    return cm.SoupSieve(pattern, selectors, namespaces, custom, flags)
 
 
-def _purge_cache() -> None:
-    """Purge the cache."""
+def tokenize(pattern: str, flags: int = 0) -> list[tuple[str, Match[str]]]:
+    """Split a pattern into its selector tokens."""
+
+    parser = CSSParser(pattern, flags=flags)
+    return list(parser.selector_iter(parser.pattern))
+
+
+def canonical_pattern(tokens: list[tuple[str, Match[str]]]) -> str:
+    """
+    Get a canonical form of a pattern from its tokens.
+
+    Patterns that only differ in whitespace and comments around their tokens share the
+    same canonical form, and compile to equal selectors. Case is left alone, as tag
+    names are case sensitive in XML documents.
+    """
 
-    _cached_css_compile.cache_clear()
+    parts = []
+    for name, m in tokens:
+        if name == "combine":
+            parts.append(m.group("relation").strip() or " ")
+        elif name == "pseudo_close":
+            parts.append(")")
+        elif name == "pseudo_class" and m.group("open"):
+            parts.append(m.group("name") + "(")
+        else:
+            parts.append(m.group(0))
+    return "".join(parts)
 
 
 def process_custom(
@@ -307,6 +352,21 @@ def process_custom(
     return custom_selectors
 
 
+@lru_cache(maxsize=64)
+def resolve_custom(
+    custom: ct.CustomSelectors | None,
+    flags: int,
+) -> dict[str, str | ct.SelectorList]:
+    """
+    Process custom selectors once for all the patterns using them.
+
+    Custom selectors are compiled as patterns use them, and stored back in the returned
+    dictionary, so callers must pass the parser a copy.
+    """
+
+    return process_custom(custom)
+
+
 def css_unescape(content: str, string: bool = False) -> str:
     """
     Unescape CSS value.
@@ -368,6 +428,50 @@ def escape(ident: str) -> str:
     return "".join(string)
 
 
+def _trie_pattern(node: dict[str, Any]) -> str:
+    """Convert a trie of strings to a regular expression pattern."""
+
+    # Finding any string is enough, so the remainder of longer strings sharing the
+    # prefix of a shorter one doesn't matter.
+    if "" in node:
+        return ""
+
+    alternatives = []
+    for char in sorted(node):
+        # Collapse runs that don't branch into a single literal.
+        chars = [char]
+        child = node[char]
+        while len(child) == 1 and "" not in child:
+            ((char, child),) = child.items()
+            chars.append(char)
+        alternatives.append(re.escape("".join(chars)) + _trie_pattern(child))
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return "(?:{})".format("|".join(alternatives))
+
+
+def contains_pattern(values: Iterable[str]) -> Pattern[str] | None:
+    """
+    Compile the strings of a `:-soup-contains` into one pattern that finds any of them.
+
+    The strings are merged into a trie first, so that the pattern branches on each
+    character once instead of retrying every string at each position of the text.
+    `None` is returned when there are too few strings for this to be worthwhile.
+    """
+
+    values = set(values)
+    if len(values) < 2:
+        return None
+
+    trie = {}  # type: dict[str, Any]
+    for value in values:
+        node = trie
+        for char in value:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return re.compile(_trie_pattern(trie))
+
+
 class SelectorPattern:
     """Selector pattern."""
 
@@ -404,6 +508,7 @@ class SpecialPseudoPattern(SelectorPattern):
             for pseudo in p[1]:
                 self.patterns[pseudo] = pattern
 
+        self.name = "pseudo_class_special"
         self.matched_name = None  # type: SelectorPattern | None
         self.re_pseudo_name = re.compile(PAT_PSEUDO_CLASS_SPECIAL, re.I | re.X | re.U)
 
@@ -428,6 +533,23 @@ class SpecialPseudoPattern(SelectorPattern):
         return pseudo
 
 
+def token_map(
+    tokens: tuple[SelectorPattern, ...],
+) -> dict[str, tuple[SelectorPattern, ...]]:
+    """
+    Map each character that can start a token to the tokens that can start with it.
+
+    Tokens keep their order, so trying just the mapped tokens finds the same token as
+    trying all of them. Characters that aren't mapped can only start a tag.
+    """
+
+    mapping = {}  # type: dict[str, list[SelectorPattern]]
+    for token in tokens:
+        for char in TOKEN_STARTS.get(token.name, ""):
+            mapping.setdefault(char, []).append(token)
+    return {char: tuple(mapped) for char, mapped in mapping.items()}
+
+
 class _Selector:
     """
     Intermediate selector class.
@@ -468,20 +590,24 @@ class _Selector:
         """Freeze self."""
 
         if self.no_match:
-            return ct.SelectorNull()
+            return ct.intern(ct.SelectorNull())
         else:
-            return ct.Selector(
-                self.tag,
-                tuple(self.ids),
-                tuple(self.classes),
-                tuple(self.attributes),
-                tuple(self.nth),
-                tuple(self.selectors),
-                self._freeze_relations(self.relations),
-                self.rel_type,
-                tuple(self.contains),
-                tuple(self.lang),
-                self.flags,
+            # Selector lists are interned as they are parsed, the rest is done here.
+            intern = ct.intern
+            return intern(
+                ct.Selector(
+                    intern(self.tag) if self.tag is not None else None,
+                    tuple(self.ids),
+                    tuple(self.classes),
+                    tuple([intern(a) for a in self.attributes]),
+                    tuple([intern(n) for n in self.nth]),
+                    tuple(self.selectors),
+                    intern(self._freeze_relations(self.relations)),
+                    self.rel_type,
+                    tuple([intern(c) for c in self.contains]),
+                    tuple([intern(lang) for lang in self.lang]),
+                    self.flags,
+                ),
             )
 
     def __str__(self) -> str:  # pragma: no cover
@@ -547,6 +673,8 @@ class CSSParser:
         SelectorPattern("attribute", PAT_ATTR),
         SelectorPattern("combine", PAT_COMBINE),
     )
+    css_token_map = token_map(css_tokens)
+    css_tag_tokens = tuple([token for token in css_tokens if token.name == "tag"])
 
     def __init__(
         self,
@@ -574,64 +702,70 @@ class CSSParser:
         case = util.lower(m.group("case")) if m.group("case") else None
         ns = css_unescape(m.group("attr_ns")[:-1]) if m.group("attr_ns") else ""
         attr = css_unescape(m.group("attr_name"))
-        is_type = False
-        pattern2 = None
         value = ""
-
-        if case:
-            flags = (re.I if case == "i" else 0) | re.DOTALL
-        elif util.lower(attr) == "type":
-            flags = re.I | re.DOTALL
-            is_type = True
-        else:
-            flags = re.DOTALL
+        xml_value = None
+        pattern = None
 
         if op:
             if m.group("value").startswith(('"', "'")):
                 value = css_unescape(m.group("value")[1:-1], True)
             else:
                 value = css_unescape(m.group("value"))
-
-        if not op:
-            # Attribute name
-            pattern = None
-        elif op.startswith("^"):
-            # Value start with
-            pattern = re.compile(r"^%s.*" % re.escape(value), flags)
-        elif op.startswith("$"):
-            # Value ends with
-            pattern = re.compile(r".*?%s$" % re.escape(value), flags)
-        elif op.startswith("*"):
-            # Value contains
-            pattern = re.compile(r".*?%s.*" % re.escape(value), flags)
-        elif op.startswith("~"):
-            # Value contains word within space separated list
-            # `~=` should match nothing if it is empty or contains whitespace,
-            # so if either of these cases is present, use `[^\s\S]` which cannot be matched.
-            value = r"[^\s\S]" if not value or RE_WS.search(value) else re.escape(value)
-            pattern = re.compile(
-                r".*?(?:(?<=^)|(?<=[ \t\r\n\f]))%s(?=(?:[ \t\r\n\f]|$)).*" % value,
-                flags,
-            )
-        elif op.startswith("|"):
-            # Value starts with word in dash separated list
-            pattern = re.compile(r"^%s(?:-.*)?$" % re.escape(value), flags)
-        else:
-            # Value matches
-            pattern = re.compile(r"^%s$" % re.escape(value), flags)
-            if op.startswith("!"):
+            if op == "!=":
                 # Equivalent to `:not([attr=value])`
+                op = "="
                 inverse = True
-        if is_type and pattern:
-            pattern2 = re.compile(pattern.pattern)
+
+        if case:
+            ignore_case = case == "i"
+        else:
+            # `type` is case insensitive in HTML, but not in XML.
+            ignore_case = util.lower(attr) == "type"
+            if ignore_case:
+                xml_value = value
+
+        if op and ignore_case:
+            # Values are compared directly when they are ASCII. Otherwise, fall back to
+            # a pattern, so case is ignored the same way for all of Unicode.
+            if value.isascii():
+                value = value.lower()
+            flags = re.I | re.DOTALL
+            if op == "^=":
+                pattern = re.compile(r"^%s.*" % re.escape(value), flags)
+            elif op == "$=":
+                pattern = re.compile(r".*?%s\Z" % re.escape(value), flags)
+            elif op == "*=":
+                pattern = re.compile(r".*?%s.*" % re.escape(value), flags)
+            elif op == "~=":
+                # `~=` should match nothing if it is empty or contains whitespace,
+                # so if either of these cases is present, use `[^\s\S]` which cannot be matched.
+                word = (
+                    r"[^\s\S]" if not value or RE_WS.search(value) else re.escape(value)
+                )
+                pattern = re.compile(
+                    r".*?(?:(?<=^)|(?<=[ \t\r\n\f]))%s(?=(?:[ \t\r\n\f]|$)).*" % word,
+                    flags,
+                )
+            elif op == "|=":
+                pattern = re.compile(r"^%s(?:-.*)?\Z" % re.escape(value), flags)
+            else:
+                pattern = re.compile(r"^%s\Z" % re.escape(value), flags)
 
         # Append the attribute selector
-        sel_attr = ct.SelectorAttribute(attr, ns, pattern, pattern2)
+        sel_attr = ct.SelectorAttribute(
+            attr,
+            ns,
+            op,
+            value,
+            ignore_case,
+            xml_value,
+            pattern,
+        )
         if inverse:
             # If we are using `!=`, we need to nest the pattern under a `:not()`.
             sub_sel = _Selector()
             sub_sel.attributes.append(sel_attr)
-            not_list = ct.SelectorList([sub_sel.freeze()], True, False)
+            not_list = ct.intern(ct.SelectorList([sub_sel.freeze()], True, False))
             sel.selectors.append(not_list)
         else:
             sel.attributes.append(sel_attr)
@@ -724,31 +858,31 @@ class CSSParser:
             elif pseudo == ":empty":
                 sel.flags |= ct.SEL_EMPTY
             elif pseudo in (":link", ":any-link"):
-                sel.selectors.append(CSS_LINK)
+                sel.selectors.append(builtin_selector("CSS_LINK"))
             elif pseudo == ":checked":
-                sel.selectors.append(CSS_CHECKED)
+                sel.selectors.append(builtin_selector("CSS_CHECKED"))
             elif pseudo == ":default":
-                sel.selectors.append(CSS_DEFAULT)
+                sel.selectors.append(builtin_selector("CSS_DEFAULT"))
             elif pseudo == ":indeterminate":
-                sel.selectors.append(CSS_INDETERMINATE)
+                sel.selectors.append(builtin_selector("CSS_INDETERMINATE"))
             elif pseudo == ":disabled":
-                sel.selectors.append(CSS_DISABLED)
+                sel.selectors.append(builtin_selector("CSS_DISABLED"))
             elif pseudo == ":enabled":
-                sel.selectors.append(CSS_ENABLED)
+                sel.selectors.append(builtin_selector("CSS_ENABLED"))
             elif pseudo == ":required":
-                sel.selectors.append(CSS_REQUIRED)
+                sel.selectors.append(builtin_selector("CSS_REQUIRED"))
             elif pseudo == ":optional":
-                sel.selectors.append(CSS_OPTIONAL)
+                sel.selectors.append(builtin_selector("CSS_OPTIONAL"))
             elif pseudo == ":read-only":
-                sel.selectors.append(CSS_READ_ONLY)
+                sel.selectors.append(builtin_selector("CSS_READ_ONLY"))
             elif pseudo == ":read-write":
-                sel.selectors.append(CSS_READ_WRITE)
+                sel.selectors.append(builtin_selector("CSS_READ_WRITE"))
             elif pseudo == ":in-range":
-                sel.selectors.append(CSS_IN_RANGE)
+                sel.selectors.append(builtin_selector("CSS_IN_RANGE"))
             elif pseudo == ":out-of-range":
-                sel.selectors.append(CSS_OUT_OF_RANGE)
+                sel.selectors.append(builtin_selector("CSS_OUT_OF_RANGE"))
             elif pseudo == ":placeholder-shown":
-                sel.selectors.append(CSS_PLACEHOLDER_SHOWN)
+                sel.selectors.append(builtin_selector("CSS_PLACEHOLDER_SHOWN"))
             elif pseudo == ":first-child":
                 sel.nth.append(
                     ct.SelectorNth(1, False, 0, False, False, ct.SelectorList()),
@@ -856,7 +990,7 @@ class CSSParser:
                 )
             else:
                 # Use default `*|*` for `of S`.
-                nth_sel = CSS_NTH_OF_S_DEFAULT
+                nth_sel = builtin_selector("CSS_NTH_OF_S_DEFAULT")
             if pseudo_sel == ":nth-child":
                 sel.nth.append(ct.SelectorNth(s1, var, s2, False, False, nth_sel))
             elif pseudo_sel == ":nth-last-child":
@@ -1027,7 +1161,9 @@ class CSSParser:
             else:
                 value = css_unescape(value)
             patterns.append(value)
-        sel.contains.append(ct.SelectorContains(patterns, contains_own))
+        sel.contains.append(
+            ct.SelectorContains(patterns, contains_own, contains_pattern(patterns)),
+        )
         has_selector = True
         return has_selector
 
@@ -1281,7 +1417,9 @@ class CSSParser:
             selectors[-1].flags = ct.SEL_PLACEHOLDER_SHOWN
 
         # Return selector list
-        return ct.SelectorList([s.freeze() for s in selectors], is_not, is_html)
+        return ct.intern(
+            ct.SelectorList([s.freeze() for s in selectors], is_not, is_html),
+        )
 
     def selector_iter(self, pattern: str) -> Iterator[tuple[str, Match[str]]]:
         """Iterate selector tokens."""
@@ -1296,7 +1434,8 @@ class CSSParser:
             print(f"## PARSING: {pattern!r}")
         while index <= end:
             m = None
-            for v in self.css_tokens:
+            tokens = self.css_token_map.get(pattern[index], self.css_tag_tokens)
+            for v in tokens:
                 m = v.match(pattern, index, self.flags)
                 if m:
                     name = v.get_name()
@@ -1336,22 +1475,24 @@ class CSSParser:
         return self.parse_selectors(self.selector_iter(self.pattern), index, flags)
 
 
-# Precompile CSS selector lists for pseudo-classes (additional logic may be required beyond the pattern)
-# A few patterns are order dependent as they use patterns previous compiled.
-
-# CSS pattern for `:link` and `:any-link`
-CSS_LINK = CSSParser("html|*:is(a, area)[href]").process_selectors(
-    flags=FLG_PSEUDO | FLG_HTML,
-)
-# CSS pattern for `:checked`
-CSS_CHECKED = CSSParser(
-    """
+# CSS selector lists for pseudo-classes (additional logic may be required beyond the
+# pattern). They are compiled on first use by `builtin_selector`.
+BUILTIN_SELECTORS = {
+    # CSS pattern for `:link` and `:any-link`
+    "CSS_LINK": (
+        "html|*:is(a, area)[href]",
+        FLG_PSEUDO | FLG_HTML,
+    ),
+    # CSS pattern for `:checked`
+    "CSS_CHECKED": (
+        """
     html|*:is(input[type=checkbox], input[type=radio])[checked], html|option[selected]
     """,
-).process_selectors(flags=FLG_PSEUDO | FLG_HTML)
-# CSS pattern for `:default` (must compile CSS_CHECKED first)
-CSS_DEFAULT = CSSParser(
-    """
+        FLG_PSEUDO | FLG_HTML,
+    ),
+    # CSS pattern for `:default`
+    "CSS_DEFAULT": (
+        """
     :checked,
 
     /*
@@ -1360,10 +1501,11 @@ CSS_DEFAULT = CSSParser(
     */
     html|form html|*:is(button, input)[type="submit"]
     """,
-).process_selectors(flags=FLG_PSEUDO | FLG_HTML | FLG_DEFAULT)
-# CSS pattern for `:indeterminate`
-CSS_INDETERMINATE = CSSParser(
-    """
+        FLG_PSEUDO | FLG_HTML | FLG_DEFAULT,
+    ),
+    # CSS pattern for `:indeterminate`
+    "CSS_INDETERMINATE": (
+        """
     html|input[type="checkbox"][indeterminate],
     html|input[type="radio"]:is(:not([name]), [name=""]):not([checked]),
     html|progress:not([value]),
@@ -1374,34 +1516,39 @@ CSS_INDETERMINATE = CSSParser(
     */
     html|input[type="radio"][name]:not([name='']):not([checked])
     """,
-).process_selectors(flags=FLG_PSEUDO | FLG_HTML | FLG_INDETERMINATE)
-# CSS pattern for `:disabled`
-CSS_DISABLED = CSSParser(
-    """
+        FLG_PSEUDO | FLG_HTML | FLG_INDETERMINATE,
+    ),
+    # CSS pattern for `:disabled`
+    "CSS_DISABLED": (
+        """
     html|*:is(input:not([type=hidden]), button, select, textarea, fieldset, optgroup, option, fieldset)[disabled],
     html|optgroup[disabled] > html|option,
     html|fieldset[disabled] > html|*:is(input:not([type=hidden]), button, select, textarea, fieldset),
     html|fieldset[disabled] >
         html|*:not(legend:nth-of-type(1)) html|*:is(input:not([type=hidden]), button, select, textarea, fieldset)
     """,
-).process_selectors(flags=FLG_PSEUDO | FLG_HTML)
-# CSS pattern for `:enabled`
-CSS_ENABLED = CSSParser(
-    """
+        FLG_PSEUDO | FLG_HTML,
+    ),
+    # CSS pattern for `:enabled`
+    "CSS_ENABLED": (
+        """
     html|*:is(input:not([type=hidden]), button, select, textarea, fieldset, optgroup, option, fieldset):not(:disabled)
     """,
-).process_selectors(flags=FLG_PSEUDO | FLG_HTML)
-# CSS pattern for `:required`
-CSS_REQUIRED = CSSParser(
-    "html|*:is(input, textarea, select)[required]",
-).process_selectors(flags=FLG_PSEUDO | FLG_HTML)
-# CSS pattern for `:optional`
-CSS_OPTIONAL = CSSParser(
-    "html|*:is(input, textarea, select):not([required])",
-).process_selectors(flags=FLG_PSEUDO | FLG_HTML)
-# CSS pattern for `:placeholder-shown`
-CSS_PLACEHOLDER_SHOWN = CSSParser(
-    """
+        FLG_PSEUDO | FLG_HTML,
+    ),
+    # CSS pattern for `:required`
+    "CSS_REQUIRED": (
+        "html|*:is(input, textarea, select)[required]",
+        FLG_PSEUDO | FLG_HTML,
+    ),
+    # CSS pattern for `:optional`
+    "CSS_OPTIONAL": (
+        "html|*:is(input, textarea, select):not([required])",
+        FLG_PSEUDO | FLG_HTML,
+    ),
+    # CSS pattern for `:placeholder-shown`
+    "CSS_PLACEHOLDER_SHOWN": (
+        """
     html|input:is(
         :not([type]),
         [type=""],
@@ -1415,12 +1562,16 @@ CSS_PLACEHOLDER_SHOWN = CSSParser(
     )[placeholder]:not([placeholder='']):is(:not([value]), [value=""]),
     html|textarea[placeholder]:not([placeholder=''])
     """,
-).process_selectors(flags=FLG_PSEUDO | FLG_HTML | FLG_PLACEHOLDER_SHOWN)
-# CSS pattern default for `:nth-child` "of S" feature
-CSS_NTH_OF_S_DEFAULT = CSSParser("*|*").process_selectors(flags=FLG_PSEUDO)
-# CSS pattern for `:read-write` (CSS_DISABLED must be compiled first)
-CSS_READ_WRITE = CSSParser(
-    """
+        FLG_PSEUDO | FLG_HTML | FLG_PLACEHOLDER_SHOWN,
+    ),
+    # CSS pattern default for `:nth-child` "of S" feature
+    "CSS_NTH_OF_S_DEFAULT": (
+        "*|*",
+        FLG_PSEUDO,
+    ),
+    # CSS pattern for `:read-write`
+    "CSS_READ_WRITE": (
+        """
     html|*:is(
         textarea,
         input:is(
@@ -1442,16 +1593,18 @@ CSS_READ_WRITE = CSSParser(
     ):not([readonly], :disabled),
     html|*:is([contenteditable=""], [contenteditable="true" i])
     """,
-).process_selectors(flags=FLG_PSEUDO | FLG_HTML)
-# CSS pattern for `:read-only`
-CSS_READ_ONLY = CSSParser(
-    """
+        FLG_PSEUDO | FLG_HTML,
+    ),
+    # CSS pattern for `:read-only`
+    "CSS_READ_ONLY": (
+        """
     html|*:not(:read-write)
     """,
-).process_selectors(flags=FLG_PSEUDO | FLG_HTML)
-# CSS pattern for `:in-range`
-CSS_IN_RANGE = CSSParser(
-    """
+        FLG_PSEUDO | FLG_HTML,
+    ),
+    # CSS pattern for `:in-range`
+    "CSS_IN_RANGE": (
+        """
     html|input:is(
         [type="date"],
         [type="month"],
@@ -1465,10 +1618,11 @@ CSS_IN_RANGE = CSSParser(
         [max]
     )
     """,
-).process_selectors(flags=FLG_PSEUDO | FLG_IN_RANGE | FLG_HTML)
-# CSS pattern for `:out-of-range`
-CSS_OUT_OF_RANGE = CSSParser(
-    """
+        FLG_PSEUDO | FLG_IN_RANGE | FLG_HTML,
+    ),
+    # CSS pattern for `:out-of-range`
+    "CSS_OUT_OF_RANGE": (
+        """
     html|input:is(
         [type="date"],
         [type="month"],
@@ -1482,4 +1636,28 @@ CSS_OUT_OF_RANGE = CSSParser(
         [max]
     )
     """,
-).process_selectors(flags=FLG_PSEUDO | FLG_OUT_OF_RANGE | FLG_HTML)
+        FLG_PSEUDO | FLG_OUT_OF_RANGE | FLG_HTML,
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def builtin_selector(name: str) -> ct.SelectorList:
+    """
+    Compile one of the built-in selector lists.
+
+    Few documents need these, so compiling them is deferred until a pattern uses the
+    pseudo-class. Lists may refer to each other (`:default` uses `:checked`, for
+    instance), which simply compiles the referenced list first.
+    """
+
+    pattern, flags = BUILTIN_SELECTORS[name]
+    return CSSParser(pattern).process_selectors(flags=flags)
+
+
+def __getattr__(name: str) -> ct.SelectorList:
+    """Compile the built-in selector lists when accessed as module attributes."""
+
+    if name in BUILTIN_SELECTORS:
+        return builtin_selector(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
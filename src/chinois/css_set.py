@@ -0,0 +1,186 @@
+"""Evaluate many selectors against a document in a single traversal."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Iterable, Mapping
+
+from . import css_match as cm
+from . import css_types as ct
+from . import util
+from .css_frozen import FrozenDocument, FrozenMatch
+from .css_index import selector_keys
+
+if TYPE_CHECKING:  # pragma: no cover
+    import bisque
+    import campbells
+
+__all__ = ("SelectorSet",)
+
+
+class SelectorSet:
+    """
+    A set of selectors that are matched together.
+
+    Like the rule hashes browsers use for style sheets, each selector is filed under the
+    most specific key of its rightmost compound: an id, else a class, else a tag name.
+    Selectors without any of these go in a universal bucket. While walking a document,
+    only the selectors filed under an element's id, classes, or tag name (along with the
+    universal ones) are tested against it.
+
+    Selectors are named by their pattern, unless given as a mapping of names. A
+    selector given twice is matched once; different selectors with the same name
+    raise a `ValueError`.
+    """
+
+    def __init__(
+        self,
+        patterns: Iterable[str | cm.SoupSieve] | Mapping[str, str | cm.SoupSieve],
+        namespaces: dict[str, str] | None = None,
+        flags: int = 0,
+        *,
+        custom: dict[str, str] | None = None,
+    ) -> None:
+        """Initialize."""
+
+        from . import compile as compile_pattern
+
+        if isinstance(patterns, Mapping):
+            items = list(patterns.items())
+        else:
+            items = [
+                (p.pattern if isinstance(p, cm.SoupSieve) else p, p) for p in patterns
+            ]
+
+        self.names = []  # type: list[str]
+        self.selectors = []  # type: list[cm.SoupSieve]
+        named = {}  # type: dict[str, cm.SoupSieve]
+        for name, pattern in items:
+            if isinstance(pattern, cm.SoupSieve):
+                selector = compile_pattern(pattern)
+            else:
+                selector = compile_pattern(pattern, namespaces, flags, custom=custom)
+            if name in named:
+                if named[name] != selector:
+                    raise ValueError(
+                        f"More than one selector is named '{name}', "
+                        "use a mapping to name them",
+                    )
+                continue
+            named[name] = selector
+            self.names.append(name)
+            self.selectors.append(selector)
+
+        self.ids = {}  # type: dict[str, list[int]]
+        self.classes = {}  # type: dict[str, list[int]]
+        self.tags = {}  # type: dict[str, list[int]]
+        self.universal = []  # type: list[int]
+        for i, selector in enumerate(self.selectors):
+            for sel in selector.selectors:
+                if isinstance(sel, ct.SelectorNull):
+                    continue
+                # Keys come most specific first: ids, then classes, then the tag name.
+                keys = selector_keys(sel)
+                if not keys:
+                    bucket = self.universal
+                else:
+                    kind, key = keys[0]
+                    if kind == "id":
+                        bucket = self.ids.setdefault(key, [])
+                    elif kind == "class":
+                        bucket = self.classes.setdefault(key, [])
+                    else:
+                        bucket = self.tags.setdefault(key, [])
+                if not bucket or bucket[-1] != i:
+                    bucket.append(i)
+
+    def __len__(self) -> int:
+        """Length."""
+
+        return len(self.selectors)
+
+    @staticmethod
+    def _session(tag: Any, namespaces: ct.Namespaces | None, flags: int) -> cm.CSSMatch:
+        """Start a matching session on a tag, a `FrozenDocument`, or another supported tree."""
+
+        if isinstance(tag, FrozenDocument):
+            return tag.session(ct.SelectorList(), namespaces, flags)
+        return cm.get_session_class(tag)(ct.SelectorList(), tag, namespaces, flags)
+
+    def _sessions(self, tag: Any) -> list[cm.CSSMatch]:
+        """
+        Get one matching session per distinct namespace and flag combination.
+
+        Sessions are shared between selectors so their per-document caches are too.
+        """
+
+        sessions = {}  # type: dict[tuple[Any, int], cm.CSSMatch]
+        result = []
+        for selector in self.selectors:
+            key = (selector.namespaces, selector.flags)
+            if key not in sessions:
+                sessions[key] = self._session(tag, selector.namespaces, selector.flags)
+            result.append(sessions[key])
+        return result
+
+    def _candidates(self, session: cm.CSSMatch, el: Any) -> set[int]:
+        """Get the selectors that could match the element."""
+
+        candidates = set(self.universal)
+        name = session.get_tag_name(el)
+        if name is not None:
+            candidates.update(self.tags.get(util.lower(name), ()))
+        ident = session.get_attribute_by_name(el, "id")
+        if isinstance(ident, str):
+            candidates.update(self.ids.get(ident, ()))
+        for c in session.get_classes(el):
+            candidates.update(self.classes.get(c, ()))
+        return candidates
+
+    def select(
+        self,
+        tag: bisque.Tag | campbells.Tag | FrozenDocument,
+    ) -> dict[str, list[bisque.Tag]] | dict[str, list[campbells.Tag]]:
+        """
+        Select the tags matched by each selector.
+
+        Like `SoupSieve.select`, this accepts a `FrozenDocument` in place of the tag it
+        was taken from, and the elements (or trees) of other supported trees.
+        Returns a mapping of each selector's name to its matches in document order.
+        """
+
+        results = {name: [] for name in self.names}  # type: dict[str, list[Any]]
+        if not self.selectors:
+            # Starting a session still rejects unsupported input.
+            self._session(tag, None, 0)
+            return results
+
+        sessions = self._sessions(tag)
+        walker = sessions[0]
+        # A frozen document matches positions, which are mapped back to its tags.
+        elements = walker.doc.elements if isinstance(walker, FrozenMatch) else None
+        for el in walker.walk_descendants(walker.tag):
+            for i in self._candidates(walker, el):
+                selector = self.selectors[i]
+                if sessions[i].match_selectors(el, selector.selectors):
+                    results[self.names[i]].append(
+                        el if elements is None else elements[el],
+                    )
+        return results
+
+    def match(self, tag: bisque.Tag | campbells.Tag | FrozenDocument) -> list[str]:
+        """Get the names of the selectors that match the tag."""
+
+        if not self.selectors:
+            self._session(tag, None, 0)
+            return []
+
+        sessions = self._sessions(tag)
+        el = sessions[0].tag
+        if sessions[0].is_doc(el):
+            return []
+        candidates = self._candidates(sessions[0], el)
+        return [
+            self.names[i]
+            for i in sorted(candidates)
+            if sessions[i].match_selectors(el, self.selectors[i].selectors)
+        ]
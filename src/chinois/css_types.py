@@ -3,9 +3,17 @@
 from __future__ import annotations
 
 import copyreg
-from typing import Any, Hashable, Iterable, Iterator, Mapping, Pattern
-
-from .pretty import pretty
+import weakref
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    Iterable,
+    Iterator,
+    Mapping,
+    Pattern,
+    TypeVar,
+)
 
 __all__ = (
     "Selector",
@@ -37,7 +45,9 @@ SEL_PLACEHOLDER_SHOWN = 0x400
 class Immutable:
     """Immutable."""
 
-    __slots__: tuple[str, ...] = ("_hash",)
+    # Subclasses list their own fields (ending with `_hash`); `__weakref__` is only
+    # needed once, here, so nodes can be interned (see `intern`).
+    __slots__: tuple[str, ...] = ("__weakref__", "_hash")
 
     _hash: int
 
@@ -60,12 +70,16 @@ class Immutable:
     def __eq__(self, other: Any) -> bool:
         """Equal."""
 
-        return isinstance(other, self.__base__()) and all(
-            [
-                getattr(other, key) == getattr(self, key)
-                for key in self.__slots__
-                if key != "_hash"
-            ],
+        return (
+            other is self
+            or isinstance(other, self.__base__())
+            and all(
+                [
+                    getattr(other, key) == getattr(self, key)
+                    for key in self.__slots__
+                    if key != "_hash"
+                ],
+            )
         )
 
     def __ne__(self, other: Any) -> bool:
@@ -104,6 +118,8 @@ class Immutable:
     def pretty(self) -> None:  # pragma: no cover
         """Pretty print."""
 
+        from .pretty import pretty
+
         print(pretty(self))
 
 
@@ -154,6 +170,11 @@ class ImmutableDict(Mapping[Any, Any]):
 
         return self._hash
 
+    def __reduce__(self) -> tuple[type[ImmutableDict], tuple[dict[Any, Any]]]:
+        """Pickle by value so the hash is recomputed (string hashes vary by process)."""
+
+        return self.__class__, (self._d,)
+
     def __repr__(self) -> str:  # pragma: no cover
         """Representation."""
 
@@ -274,6 +295,8 @@ class Selector(Immutable):
 class SelectorNull(Immutable):
     """Null Selector."""
 
+    __slots__ = ("_hash",)
+
     def __init__(self) -> None:
         """Initialize."""
 
@@ -295,44 +318,76 @@ class SelectorTag(Immutable):
 
 
 class SelectorAttribute(Immutable):
-    """Selector attribute rule."""
+    """
+    Selector attribute rule.
 
-    __slots__ = ("attribute", "prefix", "pattern", "xml_type_pattern", "_hash")
+    `op` is the comparison (`=`, `^=`, `$=`, `*=`, `~=`, or `|=`), or `None` if the
+    attribute only has to be present. When the comparison ignores case, `value` is
+    lowercased and `pattern` is an equivalent regular expression for values outside of
+    ASCII. The `type` attribute ignores case in HTML only, so it also keeps the original
+    value in `xml_value` for XML documents.
+    """
+
+    __slots__ = (
+        "attribute",
+        "prefix",
+        "op",
+        "value",
+        "ignore_case",
+        "xml_value",
+        "pattern",
+        "_hash",
+    )
 
     attribute: str
     prefix: str
+    op: str | None
+    value: str
+    ignore_case: bool
+    xml_value: str | None
     pattern: Pattern[str] | None
-    xml_type_pattern: Pattern[str] | None
 
     def __init__(
         self,
         attribute: str,
         prefix: str,
+        op: str | None,
+        value: str,
+        ignore_case: bool,
+        xml_value: str | None,
         pattern: Pattern[str] | None,
-        xml_type_pattern: Pattern[str] | None,
     ) -> None:
         """Initialize."""
 
         super().__init__(
             attribute=attribute,
             prefix=prefix,
+            op=op,
+            value=value,
+            ignore_case=ignore_case,
+            xml_value=xml_value,
             pattern=pattern,
-            xml_type_pattern=xml_type_pattern,
         )
 
 
 class SelectorContains(Immutable):
     """Selector contains rule."""
 
-    __slots__ = ("text", "own", "_hash")
+    __slots__ = ("text", "own", "pattern", "_hash")
 
     text: tuple[str, ...]
     own: bool
+    pattern: Pattern[str] | None
 
-    def __init__(self, text: Iterable[str], own: bool) -> None:
+    def __init__(
+        self,
+        text: Iterable[str],
+        own: bool,
+        pattern: Pattern[str] | None = None,
+    ) -> None:
         """Initialize."""
 
-        super().__init__(text=tuple(text), own=own)
+        super().__init__(text=tuple(text), own=own, pattern=pattern)
 
 
 class SelectorNth(Immutable):
@@ -392,7 +447,39 @@ class SelectorLang(Immutable):
         return self.languages[index]
 
 
-class SelectorList(Immutable):
+T = TypeVar("T")
+
+
+class Derived(Immutable):
+    """
+    Immutable that keeps values derived from it.
+
+    The values live as long as the node, so whatever holds on to the node (such as the
+    selector cache) bounds them too. They are not fields of the node.
+    """
+
+    __slots__ = ("_derived",)
+
+    _derived: dict[Hashable, Any]
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize."""
+
+        super().__init__(**kwargs)
+        object.__setattr__(self, "_derived", {})
+
+    def derive(self, func: Callable[..., T], *args: Hashable) -> T:
+        """Get `func(self, *args)`, calling it only the first time."""
+
+        key = (func, *args) if args else func  # type: Hashable
+        try:
+            return self._derived[key]  # type: ignore[no-any-return]
+        except KeyError:
+            value = self._derived[key] = func(self, *args)
+            return value
+
+
+class SelectorList(Derived):
     """Selector list."""
 
     __slots__ = ("selectors", "is_not", "is_html", "_hash")
@@ -431,8 +518,44 @@ class SelectorList(Immutable):
         return self.selectors[index]
 
 
+ImmutableT = TypeVar("ImmutableT", bound=Immutable)
+
+# Interned nodes, keyed by hash. Entries go away with their nodes.
+INTERNED = (
+    weakref.WeakValueDictionary()
+)  # type: weakref.WeakValueDictionary[int, Immutable]
+
+
+def intern(node: ImmutableT) -> ImmutableT:
+    """
+    Get the interned copy of a node.
+
+    Equal nodes are stored once, no matter how many compiled selectors use them. Nodes
+    should be interned bottom up, so that the fields of a node are interned already
+    and comparing them is mostly a matter of identity.
+    """
+
+    found = INTERNED.get(node._hash)
+    if found is None:
+        INTERNED[node._hash] = node
+        return node
+    # Nodes whose hashes merely collide are left alone.
+    if type(found) is not type(node):
+        return node
+    for key in node.__slots__[:-1]:
+        a = getattr(found, key)
+        b = getattr(node, key)
+        if a is not b and a != b:
+            return node
+    return found  # type: ignore[return-value]
+
+
+def _unpickle(cls: type[Immutable], args: tuple[Any, ...]) -> Immutable:
+    return intern(cls(*args))
+
+
 def _pickle(p: Any) -> Any:
-    return p.__base__(), tuple([getattr(p, s) for s in p.__slots__[:-1]])
+    return _unpickle, (p.__base__(), tuple([getattr(p, s) for s in p.__slots__[:-1]]))
 
 
 def pickle_register(obj: Any) -> None:
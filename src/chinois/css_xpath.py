@@ -0,0 +1,451 @@
+"""Translate compiled selectors to XPath 1.0."""
+
+from __future__ import annotations
+
+import re
+from typing import NamedTuple
+
+from . import css_cost as cx
+from . import css_match as cm
+from . import css_types as ct
+from . import util
+
+__all__ = ("NAMESPACES", "Translation", "translate_selectors")
+
+EXSLT_STRINGS = "http://exslt.org/strings"
+
+# Namespaces the translated expressions use
+NAMESPACES = {"str": EXSLT_STRINGS}
+
+# XPath can't spell control characters, such as the form feed that CSS counts as
+# whitespace, so they are decoded from a URI escape with EXSLT.
+FORM_FEED = "str:decode-uri('%0C')"
+# Characters `str.strip` removes: those XPath can spell, then those it can't
+PY_SPACE = (
+    "concat(' \t\n\r\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006"
+    "\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000', "
+    "str:decode-uri('%0B%0C%1C%1D%1E%1F'))"
+)
+
+UPPER = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+LOWER = "abcdefghijklmnopqrstuvwxyz"
+# Case-insensitive regular expressions also match these to ASCII letters.
+FOLD_FROM = UPPER + "\u0130\u0131\u212a\u017f"
+FOLD_TO = LOWER + "iiks"
+
+RE_WS = re.compile("[ \t\r\n\f]")
+RE_NCNAME = re.compile(r"[A-Za-z_][-.\w]*", re.ASCII)
+# Characters XPath literals can hold, and control characters that can be decoded
+RE_XML_CHARS = re.compile("[\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]+")
+RE_CONTROL = re.compile("[\x01-\x08\x0b\x0c\x0e-\x1f]+")
+
+# Relations that lead to an element before the current one
+AXES = {
+    cm.REL_PARENT: "ancestor::*",
+    cm.REL_CLOSE_PARENT: "parent::*",
+    cm.REL_SIBLING: "preceding-sibling::*",
+    cm.REL_CLOSE_SIBLING: "preceding-sibling::*[1]",
+}
+
+# Selector flags for state that can't be read from the tree with XPath alone
+UNSUPPORTED_FLAGS = (
+    (ct.SEL_DEFINED, ":defined"),
+    (ct.SEL_SCOPE, ":scope"),
+    (ct.SEL_PLACEHOLDER_SHOWN, ":placeholder-shown"),
+    (ct.SEL_DEFAULT, ":default"),
+    (ct.SEL_INDETERMINATE, ":indeterminate"),
+    (ct.SEL_IN_RANGE, ":in-range"),
+    (ct.SEL_OUT_OF_RANGE, ":out-of-range"),
+    (cm.DIR_FLAGS, ":dir()"),
+)
+
+
+class Translation(NamedTuple):
+    """
+    The XPath equivalent of a selector list, or what keeps it from having one.
+
+    `predicate` tests the context element, and is `None` when any construct in
+    `unsupported` was found. The expressions use the EXSLT strings extension, so they
+    must be evaluated with `NAMESPACES`.
+    """
+
+    predicate: str | None
+    unsupported: tuple[str, ...]
+
+    @property
+    def xpath(self) -> str | None:
+        """Select the matching elements at or below the context element."""
+
+        if self.predicate is None:
+            return None
+        return f"descendant-or-self::*[{self.predicate}]"
+
+
+def literal(value: str) -> str:
+    """Quote a string for XPath, which has no escapes."""
+
+    if RE_XML_CHARS.fullmatch(value) or not value:
+        if "'" not in value:
+            return f"'{value}'"
+        if '"' not in value:
+            return f'"{value}"'
+
+    parts = []
+    for m in re.finditer("'+|[^']+", value):
+        text = m.group(0)
+        if text[0] == "'":
+            parts.append(f'"{text}"')
+            continue
+        for chunk in re.split(f"({RE_CONTROL.pattern})", text):
+            if not chunk:
+                continue
+            if RE_CONTROL.fullmatch(chunk):
+                escaped = "".join([f"%{ord(c):02X}" for c in chunk])
+                parts.append(f"str:decode-uri('{escaped}')")
+            elif RE_XML_CHARS.fullmatch(chunk):
+                parts.append(f"'{chunk}'")
+            else:
+                raise ValueError(f"Cannot express {chunk!r} in XPath")
+    return parts[0] if len(parts) == 1 else f"concat({', '.join(parts)})"
+
+
+def group(expr: str) -> str:
+    """Parenthesize an expression that has an `or`, so it can be joined with `and`."""
+
+    return f"({expr})" if " or " in expr else expr
+
+
+def tokens(value: str) -> str:
+    """Pad a value with spaces after collapsing its CSS whitespace to single spaces."""
+
+    return f"concat(' ', normalize-space(translate({value}, {FORM_FEED}, ' ')), ' ')"
+
+
+class _Translator:
+    """Translate a selector list for one kind of document."""
+
+    def __init__(
+        self,
+        namespaces: ct.Namespaces | None,
+        xml: bool,
+        html_namespace: bool,
+    ) -> None:
+        """Initialize."""
+
+        self.namespaces = {} if namespaces is None else namespaces
+        self.is_xml = xml
+        self.is_html = not xml or html_namespace
+        self.supports_namespaces = xml or html_namespace
+        self.unsupported = []  # type: list[str]
+
+    def fail(self, construct: str) -> str:
+        """Record a construct that can't be translated."""
+
+        if construct not in self.unsupported:
+            self.unsupported.append(construct)
+        return "false()"
+
+    def selector_list(self, selectors: ct.SelectorList) -> str:
+        """Translate a selector list, which matches if any of its selectors do."""
+
+        if selectors.is_html:
+            return self.fail("HTML pseudo-classes such as `:checked` and `:link`")
+
+        tests = [
+            self.selector(sel)
+            for sel in selectors
+            if not isinstance(sel, ct.SelectorNull)
+        ]
+        if "true()" in tests:
+            expr = "true()"
+        elif len(tests) == 1:
+            expr = tests[0]
+        else:
+            expr = " or ".join([f"({test})" for test in tests]) or "false()"
+        if selectors.is_not:
+            if not len(selectors) or expr == "true()":
+                return "false()"
+            return f"not({expr})"
+        return expr
+
+    def selector(self, sel: ct.Selector) -> str:
+        """Translate a compound selector, with the relations leading to it."""
+
+        tests = []  # type: list[str]
+        flags = sel.flags
+        for flag, construct in UNSUPPORTED_FLAGS:
+            if flags & flag:
+                self.fail(construct)
+        if sel.lang:
+            self.fail(":lang()")
+        if sel.contains:
+            self.fail(":-soup-contains()")
+
+        if sel.tag is not None:
+            tests.extend(self.tag(sel.tag))
+        if flags & ct.SEL_ROOT:
+            tests.append(self.root())
+        for nth in sel.nth:
+            tests.append(self.nth(nth, sel.tag))
+        if flags & ct.SEL_EMPTY:
+            tests.append(
+                f"not(*) and not(text()[normalize-space(translate(., {FORM_FEED}, ' '))])",
+            )
+        for ident in sel.ids:
+            tests.append(f"{self.attribute('id')} = {literal(ident)}")
+        for name in sel.classes:
+            if RE_WS.search(name):
+                tests.append("false()")
+            else:
+                # Looking for the name first spares splitting most class lists.
+                attr = self.attribute("class")
+                tests.append(
+                    f"contains({attr}, {literal(name)}) and "
+                    f"contains({tokens(attr)}, {literal(f' {name} ')})",
+                )
+        for attr in sel.attributes:
+            tests.append(self.attribute_selector(attr))
+        for selectors in sel.selectors:
+            tests.append(group(self.selector_list(selectors)))
+        if sel.relation:
+            tests.append(self.relation(sel.relation))
+        return " and ".join([test for test in tests if test != "true()"]) or "true()"
+
+    def tag_name(self, name: str) -> str:
+        """Test the element's name, as `CSSMatch.get_tag` gives it."""
+
+        if self.is_xml:
+            return f"local-name() = {literal(name)}"
+        # Parsers store HTML names in lower case, so the exact test usually decides
+        # before the name has to be folded.
+        name = util.lower(name)
+        folded = (
+            f"string-length(local-name()) = {len(name)} and "
+            f"translate(local-name(), '{UPPER}', '{LOWER}') = {literal(name)}"
+        )
+        if RE_NCNAME.fullmatch(name):
+            return f"(self::{name} or {folded})"
+        return f"({folded})"
+
+    def namespace(self, prefix: str | None) -> str | None:
+        """
+        Test the element's namespace, as `CSSMatch.match_namespace` does.
+
+        `None` means any namespace will do. Without namespace support, every element
+        is taken to be in the XHTML namespace.
+        """
+
+        if prefix == "*":
+            return None
+        if prefix is None:
+            namespace = self.namespaces.get("")
+            if namespace is None:
+                return None
+        elif prefix == "":
+            namespace = ""
+        else:
+            namespace = self.namespaces.get(prefix)
+            if namespace is None:
+                return "false()"
+        if not self.supports_namespaces:
+            return "true()" if namespace == cm.NS_XHTML else "false()"
+        return f"namespace-uri() = {literal(namespace)}"
+
+    def tag(self, tag: ct.SelectorTag) -> list[str]:
+        """Translate a type selector."""
+
+        tests = []
+        if tag.name != "*":
+            tests.append(self.tag_name(tag.name))
+        namespace = self.namespace(tag.prefix)
+        if namespace is not None:
+            tests.append(namespace)
+        return tests
+
+    def root(self) -> str:
+        """
+        Translate `:root`.
+
+        Mirrors `CSSMatch.match_root`: the element is at the top of the tree (or, in
+        HTML, directly under an `iframe`), with no other element or text beside it.
+        """
+
+        top = "not(parent::*)"
+        if self.is_html:
+            iframe = [self.tag_name("iframe")]
+            if self.supports_namespaces:
+                iframe.append(f"namespace-uri() = {literal(cm.NS_XHTML)}")
+            top = f"({top} or parent::*[{' and '.join(iframe)}])"
+        return (
+            f"{top} and not(../*[2]) and not(../text()[translate(., {PY_SPACE}, '')])"
+        )
+
+    def nth(self, nth: ct.SelectorNth, tag: ct.SelectorTag | None) -> str:
+        """
+        Translate a `:nth-*` selector by counting siblings.
+
+        Unlike `CSSMatch`, which counts the children of a parent once, each element
+        counts its own siblings, so an exact position is tested with positional
+        predicates where possible.
+        """
+
+        tests = []
+        if nth.of_type:
+            # The type must be known up front, as XPath 1.0 can't compare siblings to
+            # the context element.
+            if tag is None or tag.name == "*":
+                return self.fail(":nth-of-type() without a type selector")
+            same_type = [self.tag_name(tag.name)]
+            if self.supports_namespaces:
+                namespace = self.namespace(tag.prefix)
+                if namespace is None:
+                    return self.fail(":nth-of-type() with an element of any namespace")
+                same_type.append(namespace)
+            siblings = f"*[{' and '.join(same_type)}]"
+        else:
+            selectors = self.selector_list(nth.selectors) if nth.selectors else "true()"
+            siblings = "*"
+            if selectors != "true()":
+                tests.append(group(selectors))
+                siblings = f"*[{selectors}]"
+        axis = "following-sibling::" if nth.last else "preceding-sibling::"
+
+        # The element has `count` counted siblings before it (or after it, for the
+        # `last` variants), so its position is `count + 1`.
+        if not nth.n or nth.a == 0:
+            pos = nth.a if not nth.n else nth.b
+            if pos < 1:
+                return "false()"
+            before = f"not({axis}{siblings}[{pos}])"
+            if pos > 1:
+                before = f"{axis}{siblings}[{pos - 1}] and {before}"
+            tests.append(before)
+        else:
+            # `count + 1 = a * k + b` for some `k >= 0`
+            count = f"count({axis}{siblings})"
+            offset = nth.b - 1
+            if nth.a > 0 and offset > 0:
+                tests.append(f"{count} >= {offset}")
+            elif nth.a < 0:
+                if offset < 0:
+                    return "false()"
+                tests.append(f"{count} <= {offset}")
+            if abs(nth.a) != 1:
+                shifted = count
+                if offset:
+                    shifted = f"({count} {'-' if offset > 0 else '+'} {abs(offset)})"
+                tests.append(f"{shifted} mod {abs(nth.a)} = 0")
+        return " and ".join(tests) if tests else "true()"
+
+    def attribute(self, name: str) -> str:
+        """Select an attribute by name, as `CSSMatch.get_attribute_by_name` finds it."""
+
+        if self.is_xml:
+            if RE_NCNAME.fullmatch(name):
+                return f"@{name}"
+            return f"@*[namespace-uri() = '' and local-name() = {literal(name)}]"
+        # Names are compared without case in HTML, and the first match wins.
+        name = util.lower(name)
+        return (
+            f"@*[name() = {literal(name)} or string-length(name()) = {len(name)} and "
+            f"translate(name(), '{UPPER}', '{LOWER}') = {literal(name)}][1]"
+        )
+
+    def attribute_selector(self, attr: ct.SelectorAttribute) -> str:
+        """Translate an attribute selector, as `CSSMatch.match_attributes` does."""
+
+        if attr.prefix and self.supports_namespaces:
+            return self.fail("namespaced attribute selectors")
+
+        node = self.attribute(attr.attribute)
+        if attr.op is None:
+            return node
+
+        expected = attr.value
+        value = "."
+        if attr.xml_value is not None and self.is_xml:
+            expected = attr.xml_value
+        elif attr.ignore_case:
+            if not expected.isascii():
+                return self.fail("case-insensitive attribute values outside of ASCII")
+            value = f"translate(., '{FOLD_FROM}', '{FOLD_TO}')"
+
+        op = attr.op
+        if op == "=":
+            test = f"{value} = {literal(expected)}"
+        elif op == "^=":
+            test = f"starts-with({value}, {literal(expected)})"
+        elif op == "$=":
+            # The last characters of the value, as many as there are in `expected`
+            start = f"string-length({value}) + 1"
+            if expected:
+                start = f"string-length({value}) - {len(expected) - 1}"
+            test = f"substring({value}, {start}) = {literal(expected)}"
+        elif op == "*=":
+            test = f"contains({value}, {literal(expected)})"
+        elif op == "~=":
+            # An empty word or one containing whitespace never matches.
+            if not expected or RE_WS.search(expected):
+                return "false()"
+            test = f"contains({tokens(value)}, {literal(f' {expected} ')})"
+        else:
+            # `|=`
+            test = f"starts-with(concat({value}, '-'), {literal(expected + '-')})"
+        return f"{node}[{test}]"
+
+    def relation(self, relation: ct.SelectorList) -> str:
+        """Translate the relation leading to a compound selector."""
+
+        related = relation[0]
+        if isinstance(related, ct.SelectorNull) or related.rel_type is None:
+            return "false()"
+        if related.rel_type.startswith(":"):
+            return self.fail(":has()")
+        if related.rel_type in (cm.REL_PARENT, cm.REL_CLOSE_PARENT) and any(
+            [isinstance(sel, ct.Selector) and cx.is_universal(sel) for sel in relation],
+        ):
+            # `CSSMatch` also tests the document above the root element, which a
+            # compound without a type, ID, class, or attribute can match.
+            return self.fail(
+                "a descendant or child combinator after a universal selector",
+            )
+        return f"{AXES[related.rel_type]}[{self.selector_list(relation)}]"
+
+
+def _translate(
+    selectors: ct.SelectorList,
+    namespaces: ct.Namespaces | None,
+    xml: bool,
+    html_namespace: bool,
+) -> Translation:
+    """Translate a selector list."""
+
+    translator = _Translator(namespaces, xml, html_namespace)
+    try:
+        predicate = translator.selector_list(selectors)  # type: str | None
+    except ValueError as e:
+        translator.fail(str(e))
+    if translator.unsupported:
+        predicate = None
+    return Translation(predicate, tuple(translator.unsupported))
+
+
+def translate_selectors(
+    selectors: ct.SelectorList,
+    namespaces: ct.Namespaces | dict[str, str] | None = None,
+    *,
+    xml: bool = False,
+    html_namespace: bool = False,
+) -> Translation:
+    """
+    Translate a selector list to an XPath 1.0 predicate, if it can be.
+
+    The predicate matches exactly the elements `CSSMatch` would, in an HTML document or
+    an `xml` one (`html_namespace` if its root is in the XHTML namespace). Selectors
+    that depend on more than the tree, such as `:scope`, `:dir()`, `:lang()`, form
+    state, or text content, and `:has()`, are reported as unsupported instead.
+    """
+
+    if namespaces is not None and not isinstance(namespaces, ct.Namespaces):
+        namespaces = ct.Namespaces(namespaces)
+    return selectors.derive(_translate, namespaces, xml, html_namespace)
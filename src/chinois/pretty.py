@@ -28,9 +28,11 @@ SelectorList(
                 SelectorAttribute(
                     attribute='name',
                     prefix='',
-                    pattern=re.compile(
-                        '^value$'),
-                    xml_type_pattern=None),
+                    op='=',
+                    value='value',
+                    ignore_case=False,
+                    xml_value=None,
+                    pattern=None),
                 ),
             nth=(),
             selectors=(),
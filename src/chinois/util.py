@@ -48,6 +48,31 @@ class SelectorSyntaxError(Exception):
 
         super().__init__(msg)
 
+    def __reduce__(self) -> tuple[Any, ...]:
+        """Keep the position of the error when pickled."""
+
+        return self.__class__, self.args, self.__dict__
+
+
+class SelectorCostError(ValueError):
+    """A selector is estimated to cost more than allowed."""
+
+    def __init__(self, pattern: str, cost: int, max_cost: int) -> None:
+        """Initialize."""
+
+        self.pattern = pattern
+        self.cost = cost
+        self.max_cost = max_cost
+        super().__init__(
+            f"The selector {pattern!r} has an estimated cost of {cost}, "
+            f"above the limit of {max_cost}",
+        )
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        """Pickle with the constructor arguments."""
+
+        return self.__class__, (self.pattern, self.cost, self.max_cost)
+
 
 def deprecated(
     message: str,
@@ -0,0 +1,210 @@
+"""Test matching directly on lxml and `ElementTree` trees."""
+
+import sys
+import xml.etree.ElementTree as ET
+
+import chinois as ch
+
+from . import util
+
+MARKUP = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta http-equiv="content-language" content="en">
+</head>
+<body>
+<div id="main" class="content wide" dir="rtl">
+  <p id="1" class="sku">one</p>
+  <p id="2" class="sku sku" data-Price="2.00">two</p>
+  <span id="price" class="Price">3</span>
+  <div id="3" class="content">
+    <p id="4" class="sku other" lang="fr">four</p>
+    <p id="5"></p>
+  </div>
+  <ul id="list"><li id="6">a</li><li id="7">b</li><li id="8">c</li><li id="9">d</li></ul>
+  <form id="form">
+    <input id="10" type="radio" name="a">
+    <input id="11" type="submit">
+    <input id="12" type="number" min="1" max="5" value="9">
+  </form>
+</div>
+<DIV id="13" class="other"><!-- comment --> </DIV>
+</body>
+</html>
+"""
+
+PATTERNS = (
+    "p",
+    ".sku",
+    "#price",
+    "div > p.sku",
+    "div p",
+    "p + span",
+    "p ~ div",
+    "div:has(> p.other)",
+    ":has(+ span)",
+    "p:nth-child(2n+1)",
+    "li:nth-last-child(-n+2)",
+    "p:nth-last-of-type(1)",
+    ":nth-child(2 of .sku)",
+    "li:first-of-type, li:last-child",
+    ":root",
+    ":empty",
+    "p:lang(fr)",
+    ":lang(en)",
+    ":dir(rtl)",
+    ":default",
+    ":out-of-range",
+    "[data-price]",
+    "[class~=other]",
+    "p:-soup-contains(four)",
+    "div:-soup-contains-own(comment)",
+    ":not(p, div, li)",
+    "*",
+)
+
+XML = """
+<root xmlns:a="http://a.com" xmlns:b="http://b.com">
+  <a:Item id="1">text</a:Item>
+  <b:Item id="2" a:Name="x"/>
+  <Item id="3"><![CDATA[data]]></Item>
+  <Other id="4"/>
+  <?pi content?>
+  <Item id="5"><!-- comment --></Item>
+</root>
+"""
+
+NAMESPACES = {"a": "http://a.com", "b": "http://b.com"}
+
+
+class TestLxml(util.TestCase):
+    """Test matching on lxml trees."""
+
+    @util.requires_lxml
+    def test_html_matches_campbells(self):
+        """Test that an lxml HTML tree matches the same elements as a soup of it."""
+
+        from lxml import html
+
+        tree = html.document_fromstring(MARKUP).getroottree()
+        soup = self.soup(MARKUP, "lxml")
+        for pattern in PATTERNS:
+            self.assertEqual(
+                util.ids(ch.select(pattern, tree)),
+                util.ids(ch.select(pattern, soup)),
+                pattern,
+            )
+
+    @util.requires_lxml
+    def test_html_is_case_insensitive(self):
+        """Test that lxml HTML trees are matched as HTML."""
+
+        from lxml import html
+
+        root = html.document_fromstring(MARKUP)
+        self.assertEqual(util.ids(ch.select("DIV.other", root)), ["13"])
+        self.assertEqual(util.ids(ch.select('[ID="PRICE" i]', root)), ["price"])
+
+    @util.requires_lxml
+    def test_element_sees_document(self):
+        """Test that matching from an lxml element sees the tree around it."""
+
+        from lxml import html
+
+        root = html.document_fromstring(MARKUP)
+        inner = root.get_element_by_id("3")
+        self.assertEqual(util.ids(ch.select("#main > div > p", inner)), ["4", "5"])
+        self.assertEqual(util.ids(ch.select(":scope > :empty", inner)), ["5"])
+        self.assertTrue(ch.match("div.content p.other", inner[0]))
+        self.assertIs(ch.closest("div.wide", inner[0]), root.get_element_by_id("main"))
+        self.assertEqual(util.ids(ch.filter("p:not(:empty)", inner)), ["4"])
+
+    @util.requires_lxml
+    def test_xml(self):
+        """Test matching an lxml XML tree with namespaces."""
+
+        from lxml import etree
+
+        tree = etree.ElementTree(etree.fromstring(XML.strip()))
+        soup = self.soup(XML, "xml")
+        for pattern in (
+            "Item",
+            "a|Item",
+            "*|Item",
+            "|Item",
+            "[a|Name]",
+            "item",
+            ":root > :empty",
+            "Item:-soup-contains(data)",
+            "Other + Item",
+        ):
+            self.assertEqual(
+                util.ids(ch.select(pattern, tree, NAMESPACES)),
+                util.ids(ch.select(pattern, soup, NAMESPACES)),
+                pattern,
+            )
+
+
+class TestElementTree(util.TestCase):
+    """Test matching on `ElementTree` trees."""
+
+    def test_xml(self):
+        """Test matching an element tree with namespaces."""
+
+        tree = ET.ElementTree(ET.fromstring(XML))
+        for pattern, expected in (
+            ("Item", ["1", "2", "3", "5"]),
+            ("a|Item", ["1"]),
+            ("*|Item", ["1", "2", "3", "5"]),
+            ("|Item", ["3", "5"]),
+            ("[a|Name]", ["2"]),
+            ("item", []),
+            (":root", [None]),
+            ("*|root:root", [None]),
+            (":root > :empty", ["2", "4", "5"]),
+            ("Item:-soup-contains(data)", ["3"]),
+            ("Other + Item", ["5"]),
+            ("*|*:nth-child(2n)", ["2", "4"]),
+        ):
+            self.assertEqual(
+                util.ids(ch.select(pattern, tree, NAMESPACES)),
+                expected,
+                pattern,
+            )
+
+    def test_element_is_scope(self):
+        """Test that an element tree is only matched under the element given."""
+
+        root = ET.fromstring(XML)
+        self.assertEqual(
+            util.ids(ch.select("*|Item", root, NAMESPACES)),
+            ["1", "2", "3", "5"],
+        )
+        self.assertEqual(
+            util.ids(ch.select(":scope > *|Item:first-child", root)),
+            ["1"],
+        )
+        self.assertTrue(ch.match(":root", root))
+        self.assertEqual(
+            util.ids(ch.filter("Other, Item", root)),
+            ["1", "2", "3", "4", "5"],
+        )
+        # Nothing above the element given is known, so it is its own root.
+        self.assertIs(ch.closest(":root", root[0]), root[0])
+
+    def test_invalid_input(self):
+        """Test that only elements and trees are accepted."""
+
+        comment = ET.Comment("comment")
+        with self.assertRaises(TypeError):
+            ch.select("*", comment)
+
+    def test_adapters_load_lazily(self):
+        """Test that an adapter is only imported for the trees it handles."""
+
+        sys.modules.pop("chinois.css_etree", None)
+        ch.select("p", self.soup("<p></p>", "html.parser"))
+        self.assertNotIn("chinois.css_etree", sys.modules)
+        ch.select("p", ET.fromstring("<div><p/></div>"))
+        self.assertIn("chinois.css_etree", sys.modules)
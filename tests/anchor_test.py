@@ -0,0 +1,121 @@
+"""Test selecting under an id anchor."""
+
+import xml.etree.ElementTree as ET
+
+import chinois as ch
+from chinois import css_match as cm
+
+from . import util
+
+MARKUP = """
+<div id="main">
+  <p id="1" class="item">one <a id="2" href="#">a</a></p>
+  <ul id="list">
+    <li id="3"><a id="4" href="#">b</a></li>
+    <li id="5" class="item"><span id="main"><a id="6" href="#">c</a></span></li>
+  </ul>
+</div>
+<p id="7" class="item">outside <a id="8" href="#">d</a></p>
+<section id="main"><a id="9" href="#">e</a><span id="10"></span></section>
+<div ID="upper"><a id="11" href="#">f</a></div>
+"""
+
+PATTERNS = (
+    "#main a",
+    "#main .item a",
+    "#list > li",
+    "#main > p ~ ul li",
+    "#main + p a",
+    "div#main a",
+    "#main a, #list .item",
+    "#upper a",
+    "#main *",
+    "#none a",
+    "#main :not(a)",
+)
+
+
+class TestAnchor(util.TestCase):
+    """Test selecting under an id anchor."""
+
+    def assert_same_results(self, tag, scopes, **kwargs):
+        """Assert that anchored selection finds what walking every element does."""
+
+        for pattern in PATTERNS:
+            sel = ch.compile(pattern)
+            for scope in scopes:
+                session = cm.get_session_class(tag)(
+                    sel.selectors,
+                    scope,
+                    sel.namespaces,
+                    sel.flags,
+                )
+                expected = [
+                    el
+                    for el in session.walk_descendants(session.tag)
+                    if session.match(el)
+                ]
+                self.assertEqual(
+                    sel.select(scope, **kwargs),
+                    expected,
+                    (pattern, scope),
+                )
+
+    def test_anchors(self):
+        """Test which selectors are anchored under an id."""
+
+        def anchors(pattern):
+            return cm.get_anchors(ch.compile(pattern).selectors)
+
+        self.assertEqual(anchors("#main .item a"), frozenset(["main"]))
+        self.assertEqual(anchors("#main #list > li"), frozenset(["list"]))
+        self.assertEqual(anchors("#main p ~ span"), frozenset(["main"]))
+        self.assertEqual(anchors("#a li, #b > p"), frozenset(["a", "b"]))
+        self.assertIsNone(anchors("#main ~ p"))
+        self.assertIsNone(anchors("#main + p a"))
+        self.assertIsNone(anchors("#main"))
+        self.assertIsNone(anchors("#main a, p"))
+        self.assertIsNone(anchors(":is(#main) a"))
+
+    def test_select(self):
+        """Test that anchored selection handles duplicate, nested, and enclosing ids."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        self.assertEqual(util.ids(ch.select("#main a", soup)), ["2", "4", "6", "9"])
+        self.assertEqual(util.ids(ch.select("#main a", soup, limit=1)), ["2"])
+        self.assertEqual(util.ids(ch.select("#upper a", soup)), ["11"])
+        # Attribute names are case insensitive in HTML, even when set by hand.
+        el = soup.find(id="10")
+        del el["id"]
+        el["ID"] = "set"
+        el.append(soup.new_tag("b", id="12"))
+        self.assertEqual(util.ids(ch.select("#set b", soup)), ["12"])
+        scopes = [soup, soup.find(id="list"), soup.find(id="3"), soup.find(id="7")]
+        self.assert_same_results(soup, scopes)
+
+    def test_index(self):
+        """Test that a document index narrows candidates to the anchors."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        index = ch.DocumentIndex(soup)
+        scopes = [soup, soup.find(id="list"), soup.find(id="3"), soup.find(id="7")]
+        self.assert_same_results(soup, scopes, index=index)
+        sel = ch.compile("#main *")
+        self.assertEqual(
+            util.ids(index.get_candidates(sel.selectors, soup)),
+            ["1", "2", "list", "3", "4", "5", "main", "6", "9", "10"],
+        )
+
+    def test_frozen(self):
+        """Test anchored selection on a frozen document."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        doc = ch.FrozenDocument(soup)
+        for pattern in PATTERNS:
+            self.assertEqual(ch.select(pattern, doc), ch.select(pattern, soup), pattern)
+
+    def test_element_tree(self):
+        """Test anchored selection on an element tree."""
+
+        root = ET.fromstring(f"<root>{MARKUP}</root>")
+        self.assert_same_results(root, [root, root.find(".//*[@id='list']")])
@@ -1,8 +1,10 @@
 """Test Soup Sieve API."""
 
 import copy
+import gc
 import pickle
 import random
+import weakref
 
 import pytest
 
@@ -465,15 +467,15 @@ class TestSoupSieve(util.TestCase):
         """Test cache."""
 
         ch.purge()
-        self.assertEqual(ch.cp._cached_css_compile.cache_info().currsize, 0)
+        self.assertEqual(ch.cache.cache_info().currsize, 0)
         for x in range(1000):
             value = f'[value="{str(random.randint(1, 10000))}"]'
             p = ch.compile(value)
             self.assertTrue(p.pattern == value)
-            self.assertTrue(ch.cp._cached_css_compile.cache_info().currsize > 0)
-        self.assertTrue(ch.cp._cached_css_compile.cache_info().currsize == 500)
+            self.assertTrue(ch.cache.cache_info().currsize > 0)
+        self.assertTrue(ch.cache.cache_info().currsize == 500)
         ch.purge()
-        self.assertEqual(ch.cp._cached_css_compile.cache_info().currsize, 0)
+        self.assertEqual(ch.cache.cache_info().currsize, 0)
 
     def test_recompile(self):
         """If you feed through the same object, it should pass through unless you change parameters."""
@@ -638,3 +640,165 @@ class TestSyntaxErrorReporting(util.TestCase):
         self.assertEqual(e.line, None)
         self.assertEqual(e.col, None)
         self.assertEqual(str(e), "Syntax Message")
+
+
+class TestTokenizer(util.TestCase):
+    """Test the selector tokenizer."""
+
+    def test_token_map_matches_full_scan(self):
+        """Test that narrowing tokens by their first character finds the same tokens."""
+
+        class FullScanParser(ch.cp.CSSParser):
+            css_token_map = {}
+            css_tag_tokens = ch.cp.CSSParser.css_tokens
+
+        def tokens(parser_type, pattern):
+            parser = parser_type(pattern)
+            try:
+                return [
+                    (name, m.group(0))
+                    for name, m in parser.selector_iter(parser.pattern)
+                ]
+            except ch.SelectorSyntaxError as e:
+                return str(e)
+
+        for pattern in (
+            "div.a#b > p ~ span + a, li",
+            "ns|tag, |tag, *|*, *, -x, \\31 a, \u00e9",
+            "a /* comment */ b\r\nc\fd\te",
+            ":is(a, b):not(:--custom)::before:nth-child(2n + 1 of .a)",
+            "p:-soup-contains('a', \"b\"):lang(en):dir(ltr):nth-of-type(odd)",
+            "[href^='x' i][data-a|=b]",
+            "@page",
+            "a!b",
+            "[a",
+            ":",
+        ):
+            self.assertEqual(
+                tokens(ch.cp.CSSParser, pattern),
+                tokens(FullScanParser, pattern),
+            )
+
+
+class TestCompiledSelectors(util.TestCase):
+    """Test the compiled matcher chains."""
+
+    def test_compiled_chain_only_has_needed_checks(self):
+        """Test that a compiled selector only carries the checks it needs."""
+
+        selectors = ch.compile("div.item").selectors
+        self.assertEqual(len(ch.cm.compile_selector(selectors[0])), 2)
+
+        selectors = ch.compile("*|*").selectors
+        self.assertEqual(ch.cm.compile_selector(selectors[0]), ())
+
+    def test_compiled_chain_is_shared(self):
+        """Test that equal selector lists share the same compiled matcher."""
+
+        p1 = ch.compile("div > p.item")
+        ch.purge()
+        p2 = ch.compile("div > p.item")
+        self.assertTrue(p1 is not p2)
+        self.assertTrue(
+            ch.cm.compile_selectors(p1.selectors)
+            is ch.cm.compile_selectors(p2.selectors),
+        )
+
+    def test_compiled_chain_is_purged(self):
+        """Test that compiled matchers go away with the selectors they were built for."""
+
+        soup = self.soup("<div><p id='1'>text</p></div>", "html.parser")
+        refs = []
+        for i in range(50):
+            sel = ch.compile(f"#main{i} div > p, p:is(.a{i})")
+            self.assertFalse(sel.match(soup.p))
+            self.assertEqual(sel.select(soup), [])
+            refs.append(weakref.ref(sel.selectors))
+            refs.append(weakref.ref(ch.cm.compile_selectors(sel.selectors)))
+        del sel
+        ch.purge()
+        gc.collect()
+        self.assertEqual([ref for ref in refs if ref() is not None], [])
+
+    def test_selector_nodes_are_interned(self):
+        """Test that equal selector nodes are only stored once."""
+
+        p1 = ch.compile("div.a > p[data-testid=card]:is(.x, .y)")
+        p2 = ch.compile("span.b ~ p[data-testid=card]:is(.x, .y)")
+        sel1 = p1.selectors[0]
+        sel2 = p2.selectors[0]
+        self.assertTrue(sel1 is not sel2)
+        self.assertTrue(sel1.attributes[0] is sel2.attributes[0])
+        self.assertTrue(sel1.selectors[0] is sel2.selectors[0])
+        self.assertTrue(sel1.tag is sel2.tag)
+
+        # Equal but separately built nodes are interned to the same node.
+        self.assertTrue(ch.ct.intern(ch.ct.SelectorTag("p", None)) is sel1.tag)
+        self.assertTrue(pickle.loads(pickle.dumps(sel1)) is sel1)
+
+        # Built-in selector lists are shared too.
+        self.assertTrue(
+            ch.compile(":checked").selectors[0].selectors[0]
+            is ch.compile("input:checked").selectors[0].selectors[0],
+        )
+
+    def test_compiled_tag_case(self):
+        """Test that precomputed tag names still honor HTML and XML case rules."""
+
+        markup = "<root><Item id='1'/><item id='2'/></root>"
+
+        soup = self.soup(markup, "html.parser")
+        self.assertEqual(
+            [el["id"] for el in ch.select("ITEM", soup)],
+            ["1", "2"],
+        )
+
+        for parser in util.available_parsers("xml"):
+            soup = self.soup(markup, parser)
+            self.assertEqual([el["id"] for el in ch.select("Item", soup)], ["1"])
+
+
+class TestMatchSession(util.TestCase):
+    """Test the per-document caches held by a match session."""
+
+    def session(self, pattern, tag):
+        """Create a match session."""
+
+        sv = ch.compile(pattern)
+        return ch.cm.CSSMatch(sv.selectors, tag, sv.namespaces, sv.flags)
+
+    def test_attribute_cache(self):
+        """Test that attributes are normalized once per element."""
+
+        markup = """<input ID="a" Type="checkbox" Name="option-1" class="x  y">"""
+
+        soup = self.soup(markup, "html.parser")
+        el = soup.input
+        session = self.session("input", soup)
+
+        attributes = session.get_attributes(el)
+        self.assertTrue(session.get_attributes(el) is attributes)
+        self.assertEqual(session.get_attribute_by_name(el, "type"), "checkbox")
+        self.assertEqual(session.get_classes(el), ["x", "y"])
+        self.assertEqual(session.match_attribute_name(el, "NAME", None), "option-1")
+        self.assertTrue(
+            ch.match("input[type=checkbox][name^=opt]#a.x.y", el),
+        )
+
+    def test_node_categories(self):
+        """Test that node types are categorized once and checked by flag."""
+
+        markup = """<!DOCTYPE html><p>text<!-- comment --><![CDATA[data]]></p>"""
+
+        soup = self.soup(markup, "html.parser")
+        nav = ch.cm._DocumentNav
+        p = soup.p
+        text, comment = p.contents[:2]
+
+        self.assertTrue(nav.is_doc(soup) and nav.is_tag(soup))
+        self.assertTrue(nav.is_tag(p) and not nav.is_doc(p))
+        self.assertTrue(nav.is_content_string(text))
+        self.assertTrue(nav.is_special_string(comment))
+        self.assertFalse(nav.is_content_string(comment))
+        self.assertFalse(nav.is_tag("p") or nav.is_navigable_string("p"))
+        self.assertIn(type(p), ch.cb.CATEGORIES)
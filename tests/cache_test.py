@@ -0,0 +1,334 @@
+"""Test the compile cache."""
+
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+
+import chinois as ch
+from chinois import css_cache as cc
+
+from . import util
+
+
+class TestSelectorCache(util.TestCase):
+    """Test the compile cache."""
+
+    def test_stats(self):
+        """Test hit, miss, and compile time counters."""
+
+        cache = cc.SelectorCache()
+        p1 = cache.compile("div > p")
+        p2 = cache.compile("div > p")
+        cache.compile("div > p", {"a": "http://a.com/"})
+
+        self.assertTrue(p1 is p2)
+        info = cache.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 2, 2))
+        self.assertTrue(info.compile_time > 0)
+
+        cache.clear()
+        self.assertEqual(cache.cache_info()[:3], (0, 0, 0))
+        self.assertEqual(len(cache), 0)
+
+    def test_errors_are_not_cached(self):
+        """Test that patterns failing to compile are not cached."""
+
+        cache = cc.SelectorCache()
+        for _ in range(2):
+            with self.assertRaises(ch.SelectorSyntaxError):
+                cache.compile("div >")
+        self.assertEqual(cache.cache_info().misses, 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_resize(self):
+        """Test changing the size limit, including unbounded."""
+
+        cache = cc.SelectorCache(maxsize=3)
+        for i in range(5):
+            cache.compile(f".c{i}")
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.cache_info().evictions, 2)
+        self.assertFalse(cc.make_key(".c0", None, None, 0) in cache)
+
+        # Recently used entries are kept
+        cache.compile(".c2")
+        cache.maxsize = 1
+        self.assertTrue(cc.make_key(".c2", None, None, 0) in cache)
+        self.assertEqual(len(cache), 1)
+
+        cache.maxsize = None
+        for i in range(600):
+            cache.compile(f".c{i}")
+        self.assertEqual(len(cache), 600)
+
+        cache.maxsize = 0
+        cache.compile(".c1")
+        self.assertEqual(len(cache), 0)
+
+        with self.assertRaises(ValueError):
+            cache.maxsize = -1
+
+    def test_memory_limit(self):
+        """Test bounding the cache by the estimated memory of its selectors."""
+
+        cache = cc.SelectorCache(maxsize=None)
+        sample = cache.compile("div.sample > p:is(.a, .b)")
+        self.assertEqual(cache.cache_info().memory, None)
+
+        cache.maxmemory = cc.estimate_size(sample) * 3
+        for i in range(10):
+            cache.compile(f"div.c{i} > p:is(.a, .b)")
+        info = cache.cache_info()
+        self.assertTrue(0 < info.memory <= info.maxmemory)
+        self.assertTrue(info.evictions > 0)
+
+        cache.maxmemory = 0
+        self.assertEqual(len(cache), 0)
+
+    def test_pin(self):
+        """Test that pinned selectors are not evicted."""
+
+        cache = cc.SelectorCache(maxsize=2)
+        pinned = cache.pin("div.hot")
+        for i in range(10):
+            cache.compile(f".c{i}")
+        self.assertTrue(cache.compile("div.hot") is pinned)
+        self.assertEqual(cache.cache_info().pinned, 1)
+        self.assertEqual(len(cache), 2)
+
+        cache.unpin("div.hot")
+        cache.compile(".x")
+        cache.compile(".y")
+        self.assertFalse(cc.make_key("div.hot", None, None, 0) in cache)
+
+    def test_compiled_once_across_threads(self):
+        """Test that threads asking for the same pattern share one compile."""
+
+        calls = []
+
+        def compiler(*args):
+            calls.append(args)
+            time.sleep(0.05)
+            return cc.cp._css_compile(*args)
+
+        cache = cc.SelectorCache(compiler)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.compile("a b")))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_global_cache(self):
+        """Test that the module level helpers go through the global cache."""
+
+        ch.purge()
+        ch.select("div", self.soup("<div></div>", "html.parser"))
+        ch.compile("div")
+        info = ch.cache.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 1))
+
+    def test_save_and_load(self):
+        """Test saving the cache to a file and loading it in another process."""
+
+        cache = cc.SelectorCache()
+        cache.compile("div > p")
+        cache.compile("a|item", {"a": "http://a.com/"})
+        cache.pin(":--custom", custom={":--custom": "b.x"})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "selectors.cache")
+            self.assertEqual(cache.save(path), 3)
+
+            # String hashes differ between processes, so check in a fresh one.
+            script = textwrap.dedent(
+                f"""
+                from chinois import css_cache as cc
+                cache = cc.SelectorCache()
+                assert cache.load({path!r}) == 3
+                cache.compile("div > p")
+                cache.compile("a|item", {{"a": "http://a.com/"}})
+                cache.compile(":--custom", custom={{":--custom": "b.x"}})
+                info = cache.cache_info()
+                assert (info.hits, info.misses, info.pinned) == (3, 0, 1), info
+                """,
+            )
+            env = dict(os.environ, PYTHONHASHSEED="12345")
+            subprocess.run([sys.executable, "-c", script], check=True, env=env)
+
+    def test_load_shares_equivalent_patterns(self):
+        """Test that loaded entries are found by equivalent spellings of their patterns."""
+
+        cache = cc.SelectorCache()
+        cache.compile("div > p")
+        cache.compile("a|item", {"a": "http://a.com/"})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "selectors.cache")
+            cache.save(path)
+            loaded = cc.SelectorCache()
+            self.assertEqual(loaded.load(path), 2)
+
+        first = loaded.compile("div>p")
+        self.assertIs(first, loaded.compile("div > p"))
+        self.assertEqual(first.pattern, "div > p")
+        self.assertIs(
+            loaded.compile("a|item /* x */", {"a": "http://a.com/"}),
+            loaded.compile("a|item", {"a": "http://a.com/"}),
+        )
+        info = loaded.cache_info()
+        self.assertEqual((info.hits, info.misses), (4, 0))
+
+    def test_load_rejects_other_versions(self):
+        """Test that files saved by another version are rejected."""
+
+        cache = cc.SelectorCache()
+        cache.compile("div")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "selectors.cache")
+            cache.save(path)
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+            data["version"] = "0.0.0"
+            with open(path, "wb") as f:
+                pickle.dump(data, f)
+
+            cache.clear()
+            self.assertEqual(cache.load(path), 0)
+            self.assertEqual(len(cache), 0)
+
+    def test_manifest(self):
+        """Test preloading the patterns of a manifest."""
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "manifest.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("#main\n\ndiv > p\n  .item  \n#main\n")
+
+            cache = cc.SelectorCache()
+            self.assertEqual(cache.load_manifest(path, pin=True), 3)
+            self.assertEqual(cache.cache_info().pinned, 3)
+            self.assertTrue(cc.make_key(".item", None, None, 0) in cache)
+
+    def test_equivalent_patterns(self):
+        """Test that patterns differing only in whitespace and comments are shared."""
+
+        cache = cc.SelectorCache()
+        sv = cache.compile("div > p")
+        for pattern in ("div>p", "  div >  p ", "div/* x */> p", "div\n>\tp"):
+            self.assertTrue(cache.compile(pattern) is sv)
+        info = cache.cache_info()
+        self.assertEqual((info.hits, info.misses), (4, 1))
+
+        # Different combinators, case, namespaces, or flags don't share.
+        self.assertFalse(cache.compile("div p") is sv)
+        self.assertFalse(cache.compile("DIV > P") is sv)
+        self.assertFalse(cache.compile("div > p", {"a": "http://a.com/"}) is sv)
+
+        # Invalid patterns are not matched to valid ones.
+        for pattern in ("div >> p", "div /* x */ > p"):
+            with self.assertRaises(ch.SelectorSyntaxError):
+                cache.compile(pattern)
+
+    def test_equivalent_patterns_evicted(self):
+        """Test that canonical keys are forgotten along with their entries."""
+
+        cache = cc.SelectorCache(maxsize=2)
+        sv = cache.compile("a > b")
+        cache.compile(".x")
+        cache.compile(".y")
+
+        self.assertFalse(cache.compile("a>b") is sv)
+        self.assertEqual(len(cache._canonical), len(cache))
+
+    def test_canonical_pattern(self):
+        """Test that patterns with the same canonical form compile to equal selectors."""
+
+        variants = (
+            ("div > p, a ~ b + c", "div>p,a~b+c", "div/**/>/**/ p ,a~ b+ c"),
+            (":is(a, b) c", ":is( a ,b ) c", ":is(/* x */a,b /* y */)  c"),
+            (
+                "p:nth-child(2n+1 of .a):not(.b)",
+                "p:nth-child(2n+1 of .a ):not( .b )",
+            ),
+            ("div:has(> p)", "div:has( >p)"),
+            ("[href^='x' i] a", "[href^='x' i]\n a"),
+        )
+
+        for patterns in variants:
+            canonical = {cc.cp.canonical_pattern(cc.cp.tokenize(p)) for p in patterns}
+            self.assertEqual(len(canonical), 1, patterns)
+            compiled = {
+                cc.cp._css_compile(p, None, None, 0).selectors for p in patterns
+            }
+            self.assertEqual(len(compiled), 1, patterns)
+
+    def test_compile_many(self):
+        """Test compiling many patterns at once."""
+
+        cache = cc.SelectorCache()
+        custom = {":--field": "input, select"}
+        patterns = ["div", "form :--field", "div >> p", "div", ":--field.big"]
+        results = cache.compile_many(patterns, custom=custom)
+
+        self.assertEqual(len(results), 5)
+        self.assertTrue(results[0] is results[3])
+        self.assertTrue(isinstance(results[2], ch.SelectorSyntaxError))
+        self.assertEqual(results[2].col, 6)
+        self.assertEqual(
+            [r.pattern for r in results if isinstance(r, ch.SoupSieve)],
+            ["div", "form :--field", "div", ":--field.big"],
+        )
+        self.assertTrue(results[1] is cache.compile("form :--field", custom=custom))
+        self.assertEqual(cache.cache_info().misses, 4)
+
+        # The custom selector was compiled once, and shared by both patterns.
+        self.assertTrue(
+            results[1].selectors[0].selectors[0]
+            is results[4].selectors[0].selectors[0],
+        )
+
+        soup = self.soup(
+            "<form><input class='big'><select></select></form>",
+            "html.parser",
+        )
+        self.assertEqual(len(ch.compile_many(["input, select"])[0].select(soup)), 2)
+
+    def test_compile_many_in_processes(self):
+        """Test compiling many patterns across processes."""
+
+        cache = cc.SelectorCache()
+        patterns = [f"div.item-{i} > p" for i in range(10)] + [
+            "div >> p",
+            "div.item-0 > p",
+        ]
+        results = cache.compile_many(patterns, {"a": "http://a.com/"}, workers=2)
+
+        self.assertEqual(len(results), 12)
+        self.assertTrue(results[0] is results[-1])
+        self.assertTrue(
+            results[3] is cache.compile("div.item-3 > p", {"a": "http://a.com/"}),
+        )
+        self.assertEqual(results[3].namespaces, {"a": "http://a.com/"})
+        self.assertTrue(isinstance(results[10], ch.SelectorSyntaxError))
+        self.assertEqual((results[10].line, results[10].col), (1, 6))
+        self.assertEqual(cache.cache_info().misses, 11)
+        self.assertEqual(len(cache), 10)
+        # Selectors compiled in the workers are shared by equivalent patterns.
+        self.assertTrue(
+            results[4] is cache.compile("div.item-4>p", {"a": "http://a.com/"}),
+        )
+        self.assertEqual(cache.cache_info().misses, 11)
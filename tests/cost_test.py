@@ -0,0 +1,124 @@
+"""Test selector cost estimates and lint checks."""
+
+import pickle
+
+import chinois as ch
+from chinois import css_cost as cx
+
+from . import util
+
+
+class TestCost(util.TestCase):
+    """Test selector cost estimates."""
+
+    def test_cost_order(self):
+        """Test that costlier constructs are estimated to cost more."""
+
+        ordered = [
+            "div.item",
+            "div > p",
+            "* > p",
+            "* *",
+            "div:has(> p)",
+            "div:has(p)",
+            "* * *",
+            "*:not(:has(*)) ~ *",
+            "li:nth-child(2n of :has(a b))",
+        ]
+        costs = [ch.compile(p).cost for p in ordered]
+        self.assertEqual(costs, sorted(costs))
+        self.assertEqual(ch.compile("div.item").cost, 1)
+        self.assertEqual(ch.compile("li:nth-child(2)").cost, 1)
+
+    def test_cost_class(self):
+        """Test cost classes."""
+
+        self.assertEqual(ch.compile("div p").cost_class, "low")
+        self.assertEqual(ch.compile("* *").cost_class, "medium")
+        self.assertEqual(ch.compile("* * *").cost_class, "high")
+        self.assertEqual(ch.compile("*:not(:has(*)) ~ *").cost_class, "extreme")
+        self.assertEqual(cx.cost_class(10), "medium")
+
+        # The cost is worked out once and kept with the selectors.
+        sel = ch.compile("div:has(> p)")
+        self.assertEqual(sel.cost_class, "medium")
+        self.assertEqual(sel.selectors._derived[cx.selector_cost], sel.cost)
+
+    def test_max_cost(self):
+        """Test rejecting selectors above a cost budget."""
+
+        markup = "<div><p>text</p></div>"
+        soup = self.soup(markup, "html.parser")
+
+        self.assertEqual(ch.compile("div p", max_cost=10).pattern, "div p")
+        with self.assertRaises(ch.SelectorCostError) as cm:
+            ch.compile("div:has(a:has(b))", max_cost=1000)
+        self.assertEqual(cm.exception.max_cost, 1000)
+        self.assertTrue(cm.exception.cost > 1000)
+        self.assertTrue(isinstance(cm.exception, ValueError))
+
+        error = pickle.loads(pickle.dumps(cm.exception))
+        self.assertEqual(str(error), str(cm.exception))
+
+        # Compiled selectors and the convenience functions are checked too.
+        with self.assertRaises(ch.SelectorCostError):
+            ch.compile(ch.compile("* * *"), max_cost=100)
+        with self.assertRaises(ch.SelectorCostError):
+            ch.select("* * *", soup, max_cost=100)
+        self.assertEqual(len(ch.select("div p", soup, max_cost=100)), 1)
+
+
+class TestLint(util.TestCase):
+    """Test lint checks."""
+
+    def assert_lint(self, pattern, codes):
+        """Assert the lint codes reported for a pattern."""
+
+        self.assertEqual(
+            sorted([lint.code for lint in ch.lint(pattern)]),
+            sorted(codes),
+        )
+
+    def test_clean(self):
+        """Test selectors with nothing to report."""
+
+        for pattern in (
+            "div.item > p",
+            "ul li:nth-child(2n+1 of .visible)",
+            "div:has(> p)",
+            "p:-soup-contains(text)",
+            "input:checked",
+        ):
+            self.assert_lint(pattern, [])
+
+    def test_checks(self):
+        """Test each check."""
+
+        self.assert_lint("div:has(a:has(b))", ["nested-has"])
+        self.assert_lint("div:has(*)", ["has-any-descendant"])
+        self.assert_lint("div:not(:has(> p))", ["not-has"])
+        self.assert_lint("li:nth-child(2 of div p)", ["nth-of-complex"])
+        self.assert_lint(":-soup-contains(text)", ["contains-unqualified"])
+        self.assert_lint("* ~ *", ["universal-chain"])
+        self.assert_lint(
+            "*:not(:has(*)) ~ *",
+            ["universal-chain", "not-has", "has-any-descendant"],
+        )
+
+    def test_suggested_rewrites(self):
+        """Test that the suggested rewrites match the same elements for less."""
+
+        markup = """
+        <div id="1"><a><b></b></a></div>
+        <div id="2"><a></a><b></b></div>
+        <div id="3">text</div>
+        """
+        soup = self.soup(markup, "html.parser")
+
+        for slow, fast in (
+            ("div:has(a:has(b))", "div:has(a b)"),
+            ("div:has(*)", "div:has(> *)"),
+        ):
+            self.assertEqual(ch.select(slow, soup), ch.select(fast, soup))
+            self.assertTrue(ch.compile(fast).cost < ch.compile(slow).cost)
+            self.assert_lint(fast, [])
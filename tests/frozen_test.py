@@ -0,0 +1,155 @@
+"""Test frozen document snapshots."""
+
+import chinois as ch
+
+from . import util
+
+MARKUP = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta http-equiv="content-language" content="en">
+</head>
+<body>
+<div id="main" class="content wide" dir="rtl">
+  <p id="1" class="sku">one</p>
+  <p id="2" class="sku sku" data-Price="2.00">two</p>
+  <span id="price" class="Price">3</span>
+  <div id="3" class="content">
+    <p id="4" class="sku other" lang="fr">four</p>
+    <p id="5"></p>
+  </div>
+  <form id="form">
+    <input id="6" type="radio" name="a">
+    <input id="7" type="submit">
+    <input id="8" type="number" min="1" max="5" value="9">
+  </form>
+  <iframe id="9"><div id="10"><p id="11">inside</p></div></iframe>
+</div>
+<DIV id="12" class="other"><!-- comment --> </DIV>
+</body>
+</html>
+"""
+
+PATTERNS = (
+    "p",
+    ".sku",
+    "#price",
+    "div > p.sku",
+    "div p",
+    "p + span",
+    "p ~ div",
+    "div:has(> p.other)",
+    ":has(+ span)",
+    "p:nth-child(2n+1)",
+    "p:nth-last-of-type(1)",
+    ":nth-child(2 of .sku)",
+    ":root",
+    ":empty",
+    "p:lang(fr)",
+    ":lang(en)",
+    ":dir(rtl)",
+    ":default",
+    ":indeterminate",
+    ":out-of-range",
+    "[data-price]",
+    "[class~=other]",
+    "p:-soup-contains(four)",
+    "div:-soup-contains(inside)",
+    ":not(p, div)",
+    "*",
+)
+
+
+class TestFrozenDocument(util.TestCase):
+    """Test frozen document snapshots."""
+
+    def test_select_matches_tree(self):
+        """Test that selecting from a snapshot gives the same tags as the tree."""
+
+        for parser in util.available_parsers("html.parser", "lxml", "html5lib"):
+            soup = self.soup(MARKUP, parser)
+            frozen = ch.FrozenDocument(soup)
+            for pattern in PATTERNS:
+                expected = ch.select(pattern, soup)
+                results = ch.select(pattern, frozen)
+                self.assertEqual(
+                    [id(el) for el in results],
+                    [id(el) for el in expected],
+                    pattern,
+                )
+
+    def test_xml(self):
+        """Test a snapshot of an XML document with namespaces."""
+
+        markup = """
+        <?xml version="1.0" encoding="UTF-8"?>
+        <root xmlns:a="http://a.com" xmlns:b="http://b.com">
+          <a:Item id="1"/>
+          <b:Item id="2" a:Name="x"/>
+          <Item id="3"/>
+        </root>
+        """
+        namespaces = {"a": "http://a.com", "b": "http://b.com"}
+
+        for parser in util.available_parsers("xml"):
+            soup = self.soup(markup, parser)
+            frozen = ch.FrozenDocument(soup)
+            for pattern in ("Item", "a|Item", "*|Item", "[a|Name]", "item"):
+                self.assertEqual(
+                    ch.select(pattern, frozen, namespaces),
+                    ch.select(pattern, soup, namespaces),
+                )
+
+    def test_scope(self):
+        """Test that a snapshot of a tag is scoped to it, but sees its whole document."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        inner = soup.find(id="3")
+        frozen = ch.FrozenDocument(inner)
+
+        self.assertEqual(len(frozen), len(ch.FrozenDocument(soup)))
+        self.assertIn(soup.body, frozen)
+        self.assertEqual(frozen.get_position(soup), 1)
+        self.assertEqual(
+            frozen.get_position(self.soup("<p></p>", "html.parser").p),
+            None,
+        )
+
+        self.assertEqual([el["id"] for el in ch.select(".sku", frozen)], ["4"])
+        self.assertEqual(
+            [el["id"] for el in ch.select("#main > div > p", frozen)],
+            ["4", "5"],
+        )
+        self.assertEqual(ch.select_one(":scope > :empty", frozen)["id"], "5")
+
+    def test_match_closest_filter(self):
+        """Test matching, finding the closest ancestor, and filtering on a snapshot."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        inner = soup.find(id="4")
+        frozen = ch.FrozenDocument(inner)
+
+        self.assertTrue(ch.match("div.content p.other", frozen))
+        self.assertFalse(ch.match("div.content > span", frozen))
+        self.assertIs(ch.closest("div.wide", frozen), soup.find(id="main"))
+        self.assertIs(ch.closest("form", frozen), None)
+
+        frozen = ch.FrozenDocument(soup.find(id="main"))
+        self.assertEqual(
+            [el["id"] for el in ch.filter(".sku, span", frozen)],
+            ["1", "2", "price"],
+        )
+
+    def test_limit_and_index(self):
+        """Test limits, and that a document index can't be combined with a snapshot."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        frozen = ch.FrozenDocument(soup)
+
+        self.assertEqual(
+            [el["id"] for el in ch.select("p", frozen, limit=2)],
+            ["1", "2"],
+        )
+        with self.assertRaises(ValueError):
+            ch.select("p", frozen, index=ch.DocumentIndex(soup))
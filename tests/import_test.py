@@ -0,0 +1,94 @@
+"""Test the cost of importing the package."""
+
+import subprocess
+import sys
+import textwrap
+import unittest
+
+import chinois as ch
+from chinois import css_parser as cp
+
+# Generous ceiling (in microseconds) on the time spent in our own modules while
+# importing, to catch gross regressions such as compiling selectors at import.
+IMPORT_BUDGET = 500000
+
+
+def import_times(script):
+    """Run a script under `-X importtime`, returning its output and per module times."""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, _, name = line[len("import time:") :].split("|")
+        if self_time.strip().isdigit():
+            times[name.strip()] = int(self_time)
+    return result.stdout, times
+
+
+class TestImport(unittest.TestCase):
+    """Test the cost of importing the package."""
+
+    def test_builtin_selectors_are_lazy(self):
+        """Test that importing does not compile the built-in selector lists."""
+
+        script = textwrap.dedent(
+            """
+            import chinois
+            from chinois import css_parser
+
+            print(css_parser.builtin_selector.cache_info().currsize)
+            chinois.compile(":checked")
+            print(css_parser.builtin_selector.cache_info().currsize)
+            """,
+        )
+        stdout, times = import_times(script)
+
+        self.assertEqual(stdout.split(), ["0", "1"])
+        self.assertIn("chinois.css_parser", times)
+        own = sum(t for name, t in times.items() if name.split(".")[0] == "chinois")
+        self.assertLess(own, IMPORT_BUDGET)
+
+    def test_builtin_selectors(self):
+        """Test the built-in selector lists, both directly and as module attributes."""
+
+        for name in cp.BUILTIN_SELECTORS:
+            selectors = cp.builtin_selector(name)
+            self.assertTrue(len(selectors))
+            self.assertIs(getattr(cp, name), selectors)
+
+        self.assertIs(
+            ch.compile(":default").selectors[0].selectors[0],
+            cp.CSS_DEFAULT,
+        )
+        with self.assertRaises(AttributeError):
+            cp.CSS_UNKNOWN  # noqa: B018
+
+    def test_backends_are_lazy(self):
+        """Test that backends and debugging helpers are only imported when used."""
+
+        script = textwrap.dedent(
+            """
+            import sys
+
+            import chinois
+
+            lazy = ("bisque", "campbells", "chinois.pretty", "pydantic")
+            print(*sorted(m for m in lazy if m in sys.modules))
+
+            import campbells
+
+            soup = campbells.CampbellsSoup("<p class='a'>text</p>", "html.parser")
+            assert chinois.select("p.a", soup) == [soup.p]
+            print(*sorted(m for m in lazy if m in sys.modules))
+            """,
+        )
+        stdout, _ = import_times(script)
+
+        self.assertEqual(stdout.splitlines(), ["", "campbells"])
@@ -0,0 +1,147 @@
+"""Test the document index."""
+
+import xml.etree.ElementTree as ET
+
+import chinois as ch
+
+from . import util
+
+MARKUP = """
+<html>
+<head></head>
+<body>
+<div id="main" class="content wide">
+  <p id="1" class="sku">one</p>
+  <p id="2" class="sku sku">two</p>
+  <span id="price" class="Price">3</span>
+  <div id="3" class="content">
+    <p id="4" class="sku other">four</p>
+  </div>
+</div>
+<DIV id="5" class="other"></DIV>
+<span id="price">duplicate</span>
+</body>
+</html>
+"""
+
+
+class TestDocumentIndex(util.TestCase):
+    """Test the document index."""
+
+    def test_buckets(self):
+        """Test that buckets are in document order and deduplicated."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        index = ch.DocumentIndex(soup)
+
+        self.assertEqual([el["id"] for el in index.by_class("sku")], ["1", "2", "4"])
+        self.assertEqual([el["id"] for el in index.by_tag("DIV")], ["main", "3", "5"])
+        self.assertEqual(len(index.by_id("price")), 2)
+        self.assertEqual(index.by_class("price"), [])
+
+    def test_select_matches_full_walk(self):
+        """Test that selecting with an index gives the same results as without."""
+
+        for parser in util.available_parsers("html.parser", "lxml", "html5lib"):
+            soup = self.soup(MARKUP, parser)
+            index = ch.DocumentIndex(soup)
+            for pattern in (
+                "#price",
+                ".sku",
+                "div",
+                "p.sku.other",
+                "div > .sku",
+                ".missing",
+                "#main .sku, span",
+                "*",
+                ".Price",
+                ":is(p)",
+                "p:focus, .other",
+            ):
+                self.assertEqual(
+                    ch.select(pattern, soup, index=index),
+                    ch.select(pattern, soup),
+                )
+
+    def test_select_scope(self):
+        """Test that candidates are limited to the descendants of the scope."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        index = ch.DocumentIndex(soup)
+        inner = soup.find(id="3")
+
+        self.assertEqual(
+            [el["id"] for el in ch.select(".sku", inner, index=index)],
+            ["4"],
+        )
+        self.assertEqual(ch.select(".content", inner, index=index), [])
+
+    def test_select_one_and_limit(self):
+        """Test `select_one` and limits with an index."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        index = ch.DocumentIndex(soup)
+
+        self.assertEqual(ch.select_one("#price", soup, index=index).text, "3")
+        self.assertEqual(
+            [el["id"] for el in ch.select(".sku", soup, limit=2, index=index)],
+            ["1", "2"],
+        )
+
+    def test_unindexed_scope(self):
+        """Test that a scope outside of the index falls back to a full walk."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        index = ch.DocumentIndex(soup.find(id="3"))
+
+        self.assertEqual(
+            [el["id"] for el in ch.select(".sku", soup, index=index)],
+            ["1", "2", "4"],
+        )
+
+    def test_element_tree(self):
+        """Test indexing an element tree."""
+
+        root = ET.fromstring(
+            '<root><Item id="1" class="a b"/><item id="2"/><x><Item id="x3"/></x></root>',
+        )
+        index = ch.DocumentIndex(root)
+        self.assertEqual([el.get("id") for el in index.by_class("b")], ["1"])
+        for pattern in ("Item", "item", ".a", "#x3", "x > *", "root Item"):
+            self.assertEqual(
+                ch.select(pattern, root, index=index),
+                ch.select(pattern, root),
+                pattern,
+            )
+
+    @util.requires_lxml
+    def test_lxml(self):
+        """Test indexing an lxml tree."""
+
+        from lxml import html
+
+        tree = html.document_fromstring(MARKUP).getroottree()
+        index = ch.DocumentIndex(tree)
+        self.assertEqual(
+            [el.get("id") for el in index.by_tag("DIV")],
+            ["main", "3", "5"],
+        )
+        for pattern in ("#price", ".sku", "div", "div > .sku", "#main .sku, span"):
+            self.assertEqual(
+                ch.select(pattern, tree, index=index),
+                ch.select(pattern, tree),
+                pattern,
+            )
+
+    def test_xml_case(self):
+        """Test that XML documents still match case sensitively."""
+
+        markup = """<root><Item id="1"/><item id="2"/></root>"""
+
+        for parser in util.available_parsers("xml"):
+            soup = self.soup(markup, parser)
+            index = ch.DocumentIndex(soup)
+            self.assertEqual(
+                [el["id"] for el in ch.select("Item", soup, index=index)],
+                ["1"],
+            )
@@ -0,0 +1,175 @@
+"""Test selector sets."""
+
+import xml.etree.ElementTree as ET
+
+import chinois as ch
+
+from . import util
+
+MARKUP = """
+<html>
+<head></head>
+<body>
+<div id="main" class="content">
+  <p id="1" class="sku">one</p>
+  <p id="2" class="sku price">two</p>
+  <span id="price">3</span>
+  <div id="3" class="content">
+    <p id="4" class="other">four</p>
+    <input id="5" type="checkbox" checked>
+  </div>
+</div>
+</body>
+</html>
+"""
+
+
+class TestSelectorSet(util.TestCase):
+    """Test selector sets."""
+
+    PATTERNS = [
+        "#price",
+        ".sku",
+        "p.price",
+        "div > p",
+        "div p:nth-child(2)",
+        ":checked",
+        "*",
+        "span, .other",
+        "#main .content p",
+        ":not(p)",
+        "p:focus",
+        "p:is(#nope)",
+    ]
+
+    def test_select_matches_individual_selects(self):
+        """Test that a set gives the same results as selecting one at a time."""
+
+        for parser in util.available_parsers("html.parser", "lxml", "html5lib"):
+            soup = self.soup(MARKUP, parser)
+            results = ch.SelectorSet(self.PATTERNS).select(soup)
+            self.assertEqual(list(results), self.PATTERNS)
+            for pattern in self.PATTERNS:
+                self.assertEqual(results[pattern], ch.select(pattern, soup))
+
+    def test_named_patterns(self):
+        """Test patterns given with names."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        selectors = ch.SelectorSet(
+            {"price": "#price", "skus": ch.compile(".sku"), "none": "article"},
+        )
+        results = selectors.select(soup.body)
+
+        self.assertEqual([el["id"] for el in results["price"]], ["price"])
+        self.assertEqual([el["id"] for el in results["skus"]], ["1", "2"])
+        self.assertEqual(results["none"], [])
+
+    def test_namespaces(self):
+        """Test selectors with different namespace settings in one set."""
+
+        markup = """
+        <root xmlns:a="http://a.com/">
+            <a:item id="1"/>
+            <item id="2"/>
+        </root>
+        """
+
+        for parser in util.available_parsers("xml"):
+            soup = self.soup(markup, parser)
+            results = ch.SelectorSet(
+                {
+                    "a": ch.compile("a|item", {"a": "http://a.com/"}),
+                    "none": ch.compile("|item", {}),
+                },
+            ).select(soup)
+            self.assertEqual([el["id"] for el in results["a"]], ["1"])
+            self.assertEqual([el["id"] for el in results["none"]], ["2"])
+
+    def test_duplicate_names(self):
+        """Test that repeated selectors are kept once, and clashing names are rejected."""
+
+        ns1 = {"x": "http://a.com/"}
+        ns2 = {"x": "http://b.com/"}
+        selectors = ch.SelectorSet([".sku", ".sku", ch.compile(".sku"), "p"])
+        self.assertEqual(selectors.names, [".sku", "p"])
+        self.assertEqual(len(selectors), 2)
+        with self.assertRaises(ValueError):
+            ch.SelectorSet([ch.compile("x|p", ns1), ch.compile("x|p", ns2)])
+        with self.assertRaises(ValueError):
+            ch.SelectorSet([".sku", ch.compile(".sku", custom={":--x": "p"})])
+
+        selectors = ch.SelectorSet(
+            {"a": ch.compile("x|p", ns1), "b": ch.compile("x|p", ns2)},
+        )
+        self.assertEqual(len(selectors), 2)
+
+    def test_match(self):
+        """Test matching a single element against the set."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        selectors = ch.SelectorSet(self.PATTERNS)
+        el = soup.find(id="2")
+
+        self.assertEqual(
+            selectors.match(el),
+            [p for p in self.PATTERNS if ch.match(p, el)],
+        )
+        self.assertEqual(selectors.match(soup), [])
+
+    def test_frozen_document(self):
+        """Test selecting from and matching against a frozen document."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        selectors = ch.SelectorSet(self.PATTERNS)
+        doc = ch.FrozenDocument(soup)
+        self.assertEqual(selectors.select(doc), selectors.select(soup))
+        el = soup.find(id="2")
+        self.assertEqual(
+            selectors.match(ch.FrozenDocument(el)),
+            selectors.match(el),
+        )
+
+    def test_element_tree(self):
+        """Test selecting from and matching against an element tree."""
+
+        root = ET.fromstring(
+            '<root><p id="1" class="sku">one</p><div id="2"><p id="x3"/></div></root>',
+        )
+        selectors = ch.SelectorSet(["p", ".sku", "div > p", ":root > *", "#x3"])
+        results = selectors.select(root)
+        for pattern in selectors.names:
+            self.assertEqual(results[pattern], ch.select(pattern, root), pattern)
+        # An element given on its own doesn't know its parent, as with `ch.match`.
+        el = root[1][0]
+        self.assertEqual(selectors.match(el), ["p", "#x3"])
+        self.assertEqual(
+            selectors.match(el),
+            [p for p in selectors.names if ch.match(p, el)],
+        )
+
+    @util.requires_lxml
+    def test_lxml(self):
+        """Test selecting from and matching against an lxml tree."""
+
+        from lxml import html
+
+        root = html.document_fromstring(MARKUP)
+        selectors = ch.SelectorSet(self.PATTERNS)
+        results = selectors.select(root)
+        for pattern in self.PATTERNS:
+            self.assertEqual(results[pattern], ch.select(pattern, root), pattern)
+        el = root.get_element_by_id("2")
+        self.assertEqual(
+            selectors.match(el),
+            [p for p in self.PATTERNS if ch.match(p, el)],
+        )
+
+    def test_empty_set(self):
+        """Test an empty set."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        self.assertEqual(ch.SelectorSet([]).select(soup), {})
+
+        with self.assertRaises(TypeError):
+            ch.SelectorSet([]).select("not a tag")
@@ -80,6 +80,39 @@ class TestSoupContains(util.TestCase):
             flags=util.HTML,
         )
 
+    def test_contains_many(self):
+        """Test contains with many strings, some sharing prefixes or special characters."""
+
+        patterns = ['"th"'] + ['"that{}"'.format(i) for i in range(50)]
+
+        self.assert_selector(
+            self.MARKUP,
+            "body span:-soup-contains({})".format(", ".join(patterns[1:])),
+            [],
+            flags=util.HTML,
+        )
+
+        self.assert_selector(
+            self.MARKUP,
+            "body span:-soup-contains({})".format(", ".join(patterns)),
+            ["2"],
+            flags=util.HTML,
+        )
+
+        self.assert_selector(
+            self.MARKUP,
+            'body :-soup-contains("a.b", "works.", "(")',
+            ["1"],
+            flags=util.HTML,
+        )
+
+        self.assert_selector(
+            self.MARKUP,
+            'body :-soup-contains-own("that", "x", "works.")',
+            ["1", "2"],
+            flags=util.HTML,
+        )
+
     def test_contains_multiple(self):
         """Test contains multiple."""
 
@@ -120,6 +153,40 @@ class TestSoupContains(util.TestCase):
             flags=util.HTML,
         )
 
+    def test_contains_nested(self):
+        """Test contains on elements nested within one another."""
+
+        markup = """
+        <div id="1">
+        <div id="2">one <div id="3">two <span id="4">three</span></div></div>
+        <div id="5">four</div>
+        </div>
+        """
+
+        self.assert_selector(
+            markup,
+            'div:-soup-contains("two three")',
+            ["1", "2", "3"],
+            flags=util.HTML,
+        )
+
+        self.assert_selector(
+            markup,
+            'div:-soup-contains("missing", "one two")',
+            ["1", "2"],
+            flags=util.HTML,
+        )
+
+    def test_contains_with_contains_own(self):
+        """Test contains and contains own in the same compound selector."""
+
+        self.assert_selector(
+            self.MARKUP,
+            'div:-soup-contains-own("Testing"):-soup-contains("that")',
+            ["1"],
+            flags=util.HTML,
+        )
+
     def test_contains_bad(self):
         """Test contains when it finds no text."""
 
@@ -21,3 +21,34 @@ class TestDescendants(util.TestCase):
             ["1"],
             flags=util.HTML,
         )
+
+    def test_descendants_shared_ancestors(self):
+        """Test descendants that share ancestors with earlier candidates."""
+
+        self.assert_selector(
+            """
+            <div class="a">
+            <p id="1"><span id="2"></span></p>
+            <div class="b"><p id="3"><span id="4"></span></p></div>
+            </div>
+            <div class="b">
+            <p id="5"><span id="6"></span></p>
+            </div>
+            <p id="7"><span id="8"></span></p>
+            """,
+            ".a p span, .b > p > span",
+            ["2", "4", "6"],
+            flags=util.HTML,
+        )
+
+        self.assert_selector(
+            """
+            <div class="a">
+            <div class="b"><p id="1"><span id="2"></span></p></div>
+            <p id="3"><span id="4"></span></p>
+            </div>
+            """,
+            ".a .b span, div p:not(.b *)",
+            ["2", "3"],
+            flags=util.HTML,
+        )
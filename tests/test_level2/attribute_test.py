@@ -1,8 +1,12 @@
 """Test attribute selector."""
 
+import itertools
+import re
+
 from campbells import CampbellsSoup as CS
 
 from chinois import SelectorSyntaxError
+from chinois import css_match as cm
 
 from .. import util
 
@@ -360,3 +364,48 @@ class TestAttribute(util.TestCase):
             soup = CS("<span>text</span>", "html.parser")
             soup.span["foo"] = [["1"]]
             soup.select("span['foo']")
+
+    def test_operators_match_patterns(self):
+        """Test the attribute operators against the patterns they stand for."""
+
+        patterns = {
+            "=": r"^{}\Z",
+            "^=": r"^{}.*",
+            "$=": r".*?{}\Z",
+            "*=": r".*?{}.*",
+            "~=": r".*?(?:(?<=^)|(?<=[ \t\r\n\f])){}(?=(?:[ \t\r\n\f]|$)).*",
+            "|=": r"^{}(?:-.*)?\Z",
+        }
+        words = ["", "a", "b", "a-b", "ab", "a b", "a\tb", "-", " "]
+        for (op, pattern), expected in itertools.product(patterns.items(), words):
+            if op == "~=" and (not expected or re.search(r"\s", expected)):
+                regex = re.compile(pattern.format(r"[^\s\S]"), re.DOTALL)
+            else:
+                regex = re.compile(pattern.format(re.escape(expected)), re.DOTALL)
+            for parts in itertools.product(words, repeat=2):
+                value = "".join(parts)
+                self.assertEqual(
+                    cm.match_attribute_value(op, expected, value),
+                    regex.match(value) is not None,
+                    (op, expected, value),
+                )
+
+    def test_case_insensitive_unicode(self):
+        """Test that case is ignored beyond ASCII too."""
+
+        soup = CS(
+            '<span id="1" title="ÉTÉ"></span><span id="2" title="Été x"></span>',
+            "html.parser",
+        )
+        self.assertEqual(
+            [el["id"] for el in soup.select('[title="été" i]')],
+            ["1"],
+        )
+        self.assertEqual(
+            [el["id"] for el in soup.select('[title^="ÉT" i]')],
+            ["1", "2"],
+        )
+        self.assertEqual(
+            [el["id"] for el in soup.select('[title~="X" i]')],
+            ["2"],
+        )
@@ -197,6 +197,46 @@ class TestNthChild(util.TestCase):
             fragment = soup.p.extract()
             self.assertTrue(ch.match("p:nth-child(1)", fragment, flags=ch.DEBUG))
 
+    def test_nth_child_negative_step(self):
+        """Test `nth` child with a negative step counts from the first child."""
+
+        markup = """
+        <body>
+        <div><p id="0"></p></div>
+        <div><p id="1"></p><p id="2"></p><p id="3"></p></div>
+        </body>
+        """
+
+        self.assert_selector(markup, "p:nth-child(-n+1)", ["0", "1"], flags=util.HTML)
+
+        self.assert_selector(
+            markup,
+            "p:nth-last-child(-2n+3)",
+            ["0", "1", "3"],
+            flags=util.HTML,
+        )
+
+    def test_nth_child_many_siblings(self):
+        """Test `nth` child against a long list of siblings."""
+
+        markup = "<ul>{}</ul>".format(
+            "".join('<li id="{}"></li>'.format(i) for i in range(1, 501)),
+        )
+
+        self.assert_selector(
+            markup,
+            "li:nth-child(100n+3)",
+            ["3", "103", "203", "303", "403"],
+            flags=util.HTML,
+        )
+
+        self.assert_selector(
+            markup,
+            "li:nth-last-child(-n+2)",
+            ["499", "500"],
+            flags=util.HTML,
+        )
+
     def test_nth_child_with_bad_parameters(self):
         """Test that pseudo class fails with bad parameters (basically it doesn't match)."""
 
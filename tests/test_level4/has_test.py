@@ -72,6 +72,35 @@ class TestHas(util.TestCase):
 
         self.assert_selector(self.MARKUP, "p:has(~ .jjjj)", ["7", "8"], flags=util.HTML)
 
+    def test_has_descendant_nested(self):
+        """Test has descendant on elements nested within one another."""
+
+        self.assert_selector(
+            self.MARKUP,
+            "div:has(.zzzz)",
+            ["0", "4", "5", "6", "10"],
+            flags=util.HTML,
+        )
+
+        self.assert_selector(
+            self.MARKUP,
+            "div:has(.zzzz) > div:has(p.hhhh)",
+            ["4", "5", "6"],
+            flags=util.HTML,
+        )
+
+    def test_has_subsequent_sibling_shared(self):
+        """Test has subsequent sibling on runs of siblings."""
+
+        self.assert_selector(
+            self.MARKUP,
+            "p:has(~ p)",
+            ["1", "2", "7", "8"],
+            flags=util.HTML,
+        )
+
+        self.assert_selector(self.MARKUP, "p:has(~ .zzzz)", ["7"], flags=util.HTML)
+
     def test_has_child(self):
         """Test has2."""
 
@@ -159,6 +159,12 @@ def available_parsers(*parsers):
         raise pytest.skip("no available parsers")
 
 
+def ids(results):
+    """Get the IDs of the tags (or elements) found."""
+
+    return [el.get("id") for el in results]
+
+
 def requires_lxml(test):
     """Decorator that marks a test as requiring LXML."""
 
@@ -0,0 +1,130 @@
+"""Test walking descendants with subtrees skipped."""
+
+import xml.etree.ElementTree as ET
+
+import chinois as ch
+from chinois import css_match as cm
+from chinois import css_types as ct
+
+from . import util
+
+MARKUP = """
+<div id="top">
+  <p id="1">one <b id="2">two</b></p>
+  <iframe id="3"><p id="4">four <span id="5">five</span></p></iframe>
+  <div id="6"><iframe id="7"><span id="8">eight</span></iframe></div>
+  <p id="9">nine</p>
+</div>
+"""
+
+ALL = ["1", "2", "3", "4", "5", "6", "7", "8", "9"]
+
+
+def walk_ids(walk, skipped=()):
+    """Walk all tags, skipping the subtrees of those with the given IDs."""
+
+    found = []
+    for el in walk:
+        found.append(el.get("id"))
+        if el.get("id") in skipped:
+            walk.skip()
+    return found
+
+
+class TestWalk(util.TestCase):
+    """Test walking descendants."""
+
+    def session(self, tag):
+        """Start a session on a tag."""
+
+        return cm.CSSMatch(ct.SelectorList(), tag, None, 0)
+
+    def test_skip(self):
+        """Test that skipping passes over the whole subtree of the tag yielded last."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        session = self.session(soup)
+        top = soup.find(id="top")
+        self.assertEqual(walk_ids(session.walk_descendants(top)), ALL)
+        self.assertEqual(
+            walk_ids(session.walk_descendants(top), {"1", "6"}),
+            ["1", "3", "4", "5", "6", "9"],
+        )
+        # Skipping a tag without tags under it, or the last tag, changes nothing.
+        self.assertEqual(walk_ids(session.walk_descendants(top), {"5", "9"}), ALL)
+        self.assertEqual(walk_ids(session.walk_descendants(soup.find(id="5"))), [])
+        self.assertEqual(
+            list(session.walk_descendants(soup.find(id="2"), tags=False)),
+            ["two"],
+        )
+        self.assertEqual(
+            [node for node in session.walk_descendants(soup) if node.get("id")][0],
+            top,
+        )
+
+    def test_skip_text(self):
+        """Test skipping while walking all nodes."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        session = self.session(soup)
+        walk = session.walk_descendants(soup.find(id="1"), tags=False)
+        nodes = []
+        for node in walk:
+            nodes.append(node)
+            if node == "one ":
+                walk.skip()
+            elif getattr(node, "name", None) == "b":
+                walk.skip()
+        self.assertEqual(nodes, ["one ", soup.find(id="2")])
+
+    def test_no_iframe(self):
+        """Test that iframe content is left out without walking it."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        session = self.session(soup)
+        top = soup.find(id="top")
+        self.assertEqual(
+            walk_ids(session.get_descendants(top, no_iframe=True)),
+            ["1", "2", "3", "6", "7", "9"],
+        )
+        self.assertEqual(
+            session.get_text(top, no_iframe=True).split(),
+            ["one", "two", "nine"],
+        )
+        self.assertEqual(list(session.get_descendants(soup.iframe, no_iframe=True)), [])
+
+    def test_frozen(self):
+        """Test that a frozen document skips subtrees by position."""
+
+        soup = self.soup(MARKUP, "html.parser")
+        doc = ch.FrozenDocument(soup)
+        session = doc.session(ct.SelectorList(), None, 0)
+        top = doc.get_position(soup.find(id="top"))
+        walk = session.walk_descendants(top)
+        found = []
+        for pos in walk:
+            found.append(doc.elements[pos].get("id"))
+            if found[-1] in ("1", "6"):
+                walk.skip()
+        self.assertEqual(found, ["1", "3", "4", "5", "6", "9"])
+        nodes = list(
+            session.walk_descendants(doc.get_position(soup.find(id="1")), False),
+        )
+        self.assertEqual(nodes, ["one ", doc.get_position(soup.find(id="2")), "two"])
+
+    def test_element_tree(self):
+        """Test that an element tree skips subtrees."""
+
+        from chinois.css_etree import ElementTreeMatch
+
+        root = ET.fromstring(MARKUP.replace("<iframe", "<x").replace("</iframe", "</x"))
+        session = ElementTreeMatch(ct.SelectorList(), root, None, 0)
+        self.assertEqual(walk_ids(session.walk_descendants(root)), ALL)
+        self.assertEqual(
+            walk_ids(session.walk_descendants(root), {"1", "6"}),
+            ["1", "3", "4", "5", "6", "9"],
+        )
+        self.assertEqual(
+            list(session.walk_descendants(root[0], tags=False)),
+            ["one ", root[0][0], "two"],
+        )
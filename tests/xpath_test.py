@@ -0,0 +1,231 @@
+"""Test translating selectors to XPath and running them on lxml trees."""
+
+import gc
+import weakref
+
+import chinois as ch
+from chinois import css_xpath as cxp
+
+from . import util
+
+MARKUP = """
+<!DOCTYPE html>
+<html lang="en">
+<body>
+<div id="main" class="content wide">
+  <p id="1" class="sku">one</p>
+  <p id="2" class="sku&#12;new" data-Price="2.00" title="it's &quot;new&quot;">two</p>
+  <span id="price" class="Price" lang="en-US">3</span>
+  <div id="3" class="content">
+    <p id="4" class="sku other" title="-x-">four</p>
+    <p id="5"></p>
+    <p id="6"> </p>
+  </div>
+  <ul id="list"><li id="7">a</li><li id="8">b</li><li id="9">c</li><li id="10">d</li></ul>
+  <input id="11" type="CheckBox" name="a">
+</div>
+<DIV id="12" class="other"><!-- comment --> </DIV>
+</body>
+</html>
+"""
+
+PATTERNS = (
+    "p",
+    "DIV",
+    ".sku",
+    ".new",
+    "#price",
+    "#PRICE",
+    "div > p.sku",
+    "div p",
+    "div.content > p:first-child",
+    "p + span",
+    "p ~ div",
+    "span ~ *",
+    "p:nth-child(2n+1)",
+    "p:nth-child(-n+2)",
+    "li:nth-last-child(odd)",
+    "p:nth-of-type(2)",
+    "li:only-of-type, ul:only-child",
+    ":nth-child(2 of .sku)",
+    ":root",
+    "html:root > body",
+    ":empty",
+    "p:not(.sku)",
+    ":is(p, span).sku, #list > :last-child",
+    "[data-price]",
+    "[DATA-PRICE='2.00']",
+    "[type=checkbox i]",
+    "[type=checkbox]",
+    '[title~="it\'s"]',
+    "[title*='\"new']",
+    "[title|=x]",
+    "[title^='-' ][title$='-']",
+    "[lang|=en]",
+    "[class~=sku]",
+    "*",
+)
+
+XML = """
+<root xmlns="http://default.com" xmlns:a="http://a.com">
+  <a:Item id="1" a:Name="x">text</a:Item>
+  <Item id="2" Name="y"/>
+  <item id="3"/>
+  <a:Other id="4"/>
+</root>
+"""
+
+NAMESPACES = {"": "http://default.com", "a": "http://a.com"}
+
+
+class TestXPath(util.TestCase):
+    """Test XPath translation."""
+
+    def translate(self, pattern, namespaces=None, **kwargs):
+        """Translate a pattern."""
+
+        sel = ch.compile(pattern, namespaces)
+        return cxp.translate_selectors(sel.selectors, sel.namespaces, **kwargs)
+
+    def assert_unsupported(self, pattern, construct, **kwargs):
+        """Assert that a pattern is not translated, because of the given construct."""
+
+        translation = self.translate(pattern, **kwargs)
+        self.assertIsNone(translation.predicate, pattern)
+        self.assertIsNone(translation.xpath, pattern)
+        self.assertIn(construct, translation.unsupported, pattern)
+
+    def test_unsupported(self):
+        """Test that selectors which need more than the tree are reported."""
+
+        self.assert_unsupported(
+            "input:checked",
+            "HTML pseudo-classes such as `:checked` and `:link`",
+        )
+        self.assert_unsupported(
+            "* > p",
+            "a descendant or child combinator after a universal selector",
+        )
+        self.assert_unsupported("p:lang(en)", ":lang()")
+        self.assert_unsupported("div:has(> p)", ":has()")
+        self.assert_unsupported("div:scope", ":scope")
+        self.assert_unsupported("p:-soup-contains(one)", ":-soup-contains()")
+        self.assert_unsupported(
+            ":nth-of-type(2)",
+            ":nth-of-type() without a type selector",
+        )
+
+    def test_literals(self):
+        """Test quoting strings that XPath can't quote directly."""
+
+        self.assertEqual(cxp.literal("it's"), '"it\'s"')
+        self.assertEqual(cxp.literal("a'b\"c"), "concat('a', \"'\", 'b\"c')")
+        self.assertEqual(cxp.literal("a\fb"), "concat('a', str:decode-uri('%0C'), 'b')")
+
+    def test_translation_is_purged(self):
+        """Test that translations are kept with the selectors and go away with them."""
+
+        sel = ch.compile("div > p.sku")
+        translation = cxp.translate_selectors(sel.selectors, sel.namespaces)
+        self.assertIs(
+            cxp.translate_selectors(sel.selectors, sel.namespaces),
+            translation,
+        )
+        self.assertIsNot(
+            cxp.translate_selectors(sel.selectors, sel.namespaces, xml=True),
+            translation,
+        )
+        ref = weakref.ref(sel.selectors)
+        del sel
+        ch.purge()
+        gc.collect()
+        self.assertIsNone(ref())
+
+    @util.requires_lxml
+    def test_queries_are_purged(self):
+        """Test that compiled XPath queries go away with the selectors."""
+
+        from lxml import html
+
+        root = html.document_fromstring(MARKUP)
+        sel = ch.compile("div > p.sku")
+        self.assertEqual(util.ids(sel.select(root)), ["1", "2", "4"])
+        ref = weakref.ref(sel.selectors)
+        del sel
+        ch.purge()
+        gc.collect()
+        self.assertIsNone(ref())
+
+    @util.requires_lxml
+    def test_translation_runs_with_lxml(self):
+        """Test that a translation can be evaluated with lxml directly."""
+
+        from lxml import etree
+
+        tree = etree.fromstring(XML.strip())
+        translation = self.translate("Item, a|Other", NAMESPACES, xml=True)
+        self.assertEqual(
+            util.ids(tree.xpath(translation.xpath, namespaces=cxp.NAMESPACES)),
+            ["2", "4"],
+        )
+
+    @util.requires_lxml
+    def test_html_matches_python(self):
+        """Test that XPath selects exactly what matching in Python does on HTML."""
+
+        from lxml import html
+
+        from chinois import css_lxml as cl
+
+        tree = html.document_fromstring(MARKUP).getroottree()
+        for pattern in PATTERNS:
+            sel = ch.compile(pattern)
+            session = cl.LxmlMatch(sel.selectors, tree, sel.namespaces, sel.flags)
+            self.assertIsNotNone(session.queries, pattern)
+            results = list(session.select())
+            session.queries = None
+            self.assertEqual(results, list(session.select()), pattern)
+
+    @util.requires_lxml
+    def test_xml_matches_python(self):
+        """Test that XPath selects exactly what matching in Python does on XML."""
+
+        from lxml import etree
+
+        from chinois import css_lxml as cl
+
+        tree = etree.ElementTree(etree.fromstring(XML.strip()))
+        for pattern in (
+            "Item",
+            "a|Item",
+            "*|Item",
+            "|Item",
+            "item",
+            "[a|Name]",
+            "[Name]",
+            "[name]",
+            "Item + item",
+            ":root > a|*",
+            "*|*:nth-of-type(1)",
+        ):
+            sel = ch.compile(pattern, NAMESPACES)
+            session = cl.LxmlMatch(sel.selectors, tree, sel.namespaces, sel.flags)
+            results = list(session.select())
+            session.queries = None
+            self.assertEqual(results, list(session.select()), pattern)
+
+    @util.requires_lxml
+    def test_element_queries(self):
+        """Test matching, filtering, and finding the closest element with XPath."""
+
+        from lxml import html
+
+        root = html.document_fromstring(MARKUP)
+        inner = root.get_element_by_id("3")
+        self.assertTrue(ch.match("div.content > p.sku", inner[0]))
+        self.assertFalse(ch.match("div.wide > p", inner[0]))
+        self.assertIs(ch.closest("div.wide", inner[0]), root.get_element_by_id("main"))
+        self.assertEqual(util.ids(ch.filter("p:empty", inner)), ["5", "6"])
+        self.assertEqual(util.ids(ch.select("p", root, limit=2)), ["1", "2"])
+        # The document above the root element matches the universal selector.
+        self.assertEqual(ch.select("* > html", root.getroottree()), [root])